@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Client Benchmark
+Do calls/s, do tre p50/p99 va bo nho cua ZaloOAClient voi stub server local.
+Ket qua luu ra JSON de so sanh giua cac commit.
+
+Vi du:
+    python benchmarks/bench_client.py --latency 0.005
+    python benchmarks/bench_client.py --transport memory   (chi do overhead cua client, khong socket)
+    python benchmarks/bench_client.py --compare benchmarks/results/<file cu>.json
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import threading
+import subprocess
+import tracemalloc
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from zalo_api_client import ZaloOAClient
+from zalo_broadcast import ZaloBroadcaster
+from zalo_cache import TTLCache
+from zalo_transport import MemoryTransport, create_transport
+from stub_server import StubOAServer, StubOAApi, API_PREFIX
+
+
+RESULTS_DIR = os.path.join(ROOT_DIR, 'benchmarks', 'results')
+
+
+def percentile(values, percent):
+    """
+    Percentile (nearest-rank) cua danh sach gia tri
+    
+    Args:
+        values (list): Cac gia tri
+        percent (float): 0-100
+    
+    Returns:
+        float: Gia tri percentile (0 neu danh sach rong)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(percent / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class CallTimer:
+    """Do thoi gian tung lan goi API cua client (ke ca overhead cua client)"""
+    
+    def __init__(self, client):
+        self.durations = []
+        self._lock = threading.Lock()
+        self._request = client._request
+        client._request = self._timed_request
+    
+    def _timed_request(self, *args, **kwargs):
+        start_time = time.perf_counter()
+        result = self._request(*args, **kwargs)
+        duration = time.perf_counter() - start_time
+        with self._lock:
+            self.durations.append(duration)
+        return result
+
+
+def bench_get_oa_info(client, options):
+    """Goi get_oa_info tuan tu"""
+    failed = 0
+    for _ in range(options.calls):
+        if not client.get_oa_info()['success']:
+            failed += 1
+    return {'failed': failed}
+
+
+def bench_send_text(client, options):
+    """Gui tin nhan tuan tu (tung tin mot)"""
+    failed = 0
+    for i in range(options.calls):
+        if not client.send_text_message(f"user{i}", "Benchmark message")['success']:
+            failed += 1
+    return {'failed': failed}
+
+
+def bench_follower_pagination(client, options):
+    """Duyet toan bo followers bang iter_followers (prefetch trang ke tiep)"""
+    records = 0
+    for _ in client.iter_followers():
+        records += 1
+    return {'records': records}
+
+
+def bench_bulk_send(client, options):
+    """Gui hang loat qua ZaloBroadcaster voi worker pool"""
+    broadcaster = ZaloBroadcaster(client, workers=options.workers)
+    recipients = (f"user{i}" for i in range(options.recipients))
+    report = broadcaster.send_text(recipients, "Benchmark broadcast")
+    return {'failed': report['failed'], 'workers': options.workers}
+
+
+def bench_user_profiles(client, options):
+    """Lay profile hang loat (moi user mot lan, cache rong) roi lay lai tu cache"""
+    user_ids = [f"user{i}" for i in range(options.recipients)]
+    results = client.get_user_profiles(user_ids, workers=options.workers)
+    cached = client.get_user_profiles(user_ids, workers=options.workers)
+    failed = sum(1 for result in results.values() if not result['success'])
+    return {'failed': failed, 'cached': sum(1 for result in cached.values() if result.get('cached'))}
+
+
+SCENARIOS = {
+    'get_oa_info': bench_get_oa_info,
+    'send_text_message': bench_send_text,
+    'follower_pagination': bench_follower_pagination,
+    'bulk_send': bench_bulk_send,
+    'user_profiles': bench_user_profiles
+}
+
+
+def run_scenario(name, base_url, options, measure_memory=False):
+    """
+    Chay mot scenario voi client moi (khong rate limit, khong response cache, cache profile rong)
+    
+    Returns:
+        dict: calls, elapsed, calls_per_sec, p50_ms, p99_ms, ... va peak_memory_kb neu do bo nho
+    """
+    transport = None
+    if options.transport == 'memory':
+        transport = MemoryTransport(StubOAApi(options.followers))
+    elif options.transport == 'http2':
+        transport = create_transport('http2', pool_maxsize=max(options.workers, 1))
+    client = ZaloOAClient('benchmark-token', base_url=base_url, rate_limiter=False, cache=False,
+                          profile_cache=TTLCache(max(options.recipients, 1)), pool_maxsize=max(options.workers, 1),
+                          transport=transport)
+    # Mo san ket noi de lan goi dau khong tinh thoi gian handshake
+    client.get_oa_info()
+    timer = CallTimer(client)
+    
+    if measure_memory:
+        tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        extra = SCENARIOS[name](client, options)
+    finally:
+        elapsed = time.perf_counter() - start_time
+        if measure_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        client.close()
+        if transport is not None:
+            transport.close()
+    
+    if measure_memory:
+        return {'peak_memory_kb': round(peak / 1024.0, 1)}
+    
+    durations = timer.durations
+    result = {
+        'calls': len(durations),
+        'elapsed': round(elapsed, 4),
+        'calls_per_sec': round(len(durations) / elapsed, 1) if elapsed > 0 else 0.0,
+        'mean_ms': round(sum(durations) / len(durations) * 1000, 3) if durations else 0.0,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3)
+    }
+    result.update(extra)
+    return result
+
+
+def git_commit():
+    """Commit hien tai (None neu khong phai git repo)"""
+    try:
+        output = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT_DIR,
+                                         stderr=subprocess.DEVNULL)
+        return output.decode('ascii').strip()
+    except Exception:
+        return None
+
+
+def compare_results(baseline, current):
+    """In bang so sanh calls/s va p99 voi ket qua cu"""
+    print(f"\nCompare with {baseline.get('commit')} ({baseline.get('created_at')}):")
+    for name, result in current['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if not old:
+            print(f"   {name}: no baseline")
+            continue
+        for key in ('calls_per_sec', 'p99_ms', 'peak_memory_kb'):
+            if key in result and old.get(key):
+                change = (result[key] - old[key]) / old[key] * 100
+                print(f"   {name}.{key}: {old[key]} -> {result[key]} ({change:+.1f}%)")
+
+
+def main():
+    """Chay benchmark va luu ket qua ra JSON"""
+    parser = argparse.ArgumentParser(description='Benchmark ZaloOAClient against a local stub server')
+    parser.add_argument('--latency', type=float, default=0.0, help='Do tre moi response cua stub (giay)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Do tre ngau nhien them (giay)')
+    parser.add_argument('--calls', type=int, default=500, help='So lan goi cho scenario goi don')
+    parser.add_argument('--followers', type=int, default=5000, help='So followers cho scenario phan trang')
+    parser.add_argument('--recipients', type=int, default=2000, help='So user cho scenario gui hang loat')
+    parser.add_argument('--workers', type=int, default=16, help='So worker gui hang loat')
+    parser.add_argument('--transport', choices=['http1', 'http2', 'memory'], default='http1',
+                        help='Lop gui HTTP (memory = goi thang stub trong process, khong socket)')
+    parser.add_argument('--scenario', action='append', choices=sorted(SCENARIOS),
+                        help='Chi chay scenario nay (co the lap lai)')
+    parser.add_argument('--no-memory', action='store_true', help='Bo qua lan chay do bo nho')
+    parser.add_argument('--output', help='File JSON ket qua (mac dinh trong benchmarks/results)')
+    parser.add_argument('--compare', help='File JSON ket qua cu de so sanh')
+    options = parser.parse_args()
+    
+    print("=" * 60)
+    print("ZALO OA CLIENT BENCHMARK")
+    print("=" * 60)
+    
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'latency': options.latency,
+            'jitter': options.jitter,
+            'calls': options.calls,
+            'followers': options.followers,
+            'recipients': options.recipients,
+            'workers': options.workers,
+            'transport': options.transport
+        },
+        'results': {}
+    }
+    
+    # Transport memory khong can server (latency/jitter khong ap dung)
+    server = None
+    base_url = f"memory://stub{API_PREFIX}"
+    if options.transport != 'memory':
+        server = StubOAServer(latency=options.latency, jitter=options.jitter,
+                              followers_total=options.followers).start()
+        base_url = server.base_url
+    
+    try:
+        for name in options.scenario or list(SCENARIOS):
+            result = run_scenario(name, base_url, options)
+            # tracemalloc lam cham moi lan cap phat nen do bo nho o lan chay rieng
+            if not options.no_memory:
+                result.update(run_scenario(name, base_url, options, measure_memory=True))
+            report['results'][name] = result
+            
+            print(f"\n{name}:")
+            print(f"   {result['calls']} calls in {result['elapsed']:.2f}s "
+                  f"({result['calls_per_sec']} calls/s)")
+            print(f"   p50 {result['p50_ms']} ms, p99 {result['p99_ms']} ms")
+            if 'peak_memory_kb' in result:
+                print(f"   Peak memory: {result['peak_memory_kb']} KB")
+    finally:
+        if server:
+            server.stop()
+    
+    output = options.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}_{report['commit'] or 'local'}.json")
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {output}")
+    
+    if options.compare:
+        with open(options.compare, 'r', encoding='utf-8') as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,501 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo Record/Replay Harness
+Ghi lai response that cua Zalo OA API va OAuth (cassette JSON lines), sau do
+phat lai tu server local voi do tre, loi quota, chuoi loi 5xx va rot ket noi gia lap.
+
+Vi du:
+    python benchmarks/replay.py record zalo.cassette --followers 200
+    python benchmarks/replay.py record zalo.cassette --oauth
+    python benchmarks/replay.py serve zalo.cassette --latency lognormal:0.08,0.6 --drop-rate 0.01
+    python benchmarks/replay.py soak zalo.cassette --endpoint message --calls 5000 --concurrency 64 \\
+        --quota-rate 0.02 --burst-rate 0.005 --burst-length 20 --seed 7
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import random
+import socket
+import struct
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from config import *
+from bench_client import percentile
+
+
+REDACT_KEYS = ('access_token', 'refresh_token')
+
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {key: ('REDACTED' if key in REDACT_KEYS else _redact(item)) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+class Cassette:
+    """Danh sach response da ghi (JSON lines), moi dong mot request"""
+    
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (str): Duong dan cassette (doc neu da co, ghi them vao cuoi)
+        """
+        self.file_path = file_path
+        self.entries = []
+        self._lock = threading.Lock()
+        
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        self.entries.append(json.loads(line))
+                    except ValueError:
+                        continue
+    
+    def append(self, entry):
+        """Ghi them mot response vao cassette"""
+        with self._lock:
+            self.entries.append(entry)
+            with open(self.file_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    
+    def record_response(self, response, redact=True):
+        """
+        Ghi mot requests.Response (khong ghi header va body cua request vi chua secret)
+        
+        Args:
+            response (requests.Response): Response can ghi
+            redact (bool): Thay access_token/refresh_token trong body bang 'REDACTED'
+        """
+        parsed = urlparse(response.request.url)
+        body = response.text
+        if redact:
+            try:
+                body = json.dumps(_redact(json.loads(body)), ensure_ascii=False)
+            except ValueError:
+                pass
+        
+        self.append({
+            'method': response.request.method,
+            'path': parsed.path,
+            'query': parsed.query,
+            'status': response.status_code,
+            'content_type': response.headers.get('Content-Type', 'application/json'),
+            'body': body,
+            'elapsed': response.elapsed.total_seconds(),
+            'recorded_at': time.time()
+        })
+
+
+def record_session(session, cassette, redact=True):
+    """
+    Gan hook ghi moi response cua session vao cassette
+    
+    Args:
+        session (requests.Session): Session (vd tu create_session())
+        cassette (Cassette): Noi ghi
+        redact (bool): Xoa token trong body truoc khi ghi
+    
+    Returns:
+        requests.Session: Chinh session do
+    """
+    def hook(response, *args, **kwargs):
+        cassette.record_response(response, redact)
+        return response
+    
+    session.hooks['response'].append(hook)
+    return session
+
+
+def parse_latency(spec):
+    """
+    Doc cau hinh do tre:
+        fixed:0.05            - luon 50ms
+        uniform:0.01,0.2      - ngau nhien deu 10-200ms
+        lognormal:0.08,0.6    - median 80ms, sigma 0.6 (duoi dai giong production)
+        recorded              - dung dung do tre da ghi
+        recorded:2            - do tre da ghi nhan 2
+    
+    Returns:
+        callable: Ham (rng, entry) -> so giay, hoac None neu spec rong
+    """
+    if not spec:
+        return None
+    
+    kind, _, args = spec.partition(':')
+    values = [float(x) for x in args.split(',')] if args else []
+    
+    if kind == 'fixed':
+        return lambda rng, entry: values[0]
+    if kind == 'uniform':
+        return lambda rng, entry: rng.uniform(values[0], values[1])
+    if kind == 'lognormal':
+        return lambda rng, entry: rng.lognormvariate(math.log(values[0]), values[1])
+    if kind == 'recorded':
+        factor = values[0] if values else 1.0
+        return lambda rng, entry: (entry or {}).get('elapsed', 0.0) * factor
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class FaultProfile:
+    """
+    Loi gia lap cho moi request. Cung seed va cung thu tu request thi cung chuoi loi,
+    de tai hien lai mot lan cham/loi cu the.
+    """
+    
+    def __init__(self, latency=None, quota_rate=0.0, burst_rate=0.0, burst_length=5,
+                 burst_status=503, drop_rate=0.0, seed=None):
+        """
+        Args:
+            latency (str): Cau hinh do tre (xem parse_latency)
+            quota_rate (float): Ti le tra ve loi quota cua Zalo
+            burst_rate (float): Ti le bat dau mot chuoi loi 5xx
+            burst_length (int): So request lien tiep bi loi trong mot chuoi
+            burst_status (int): HTTP status cua chuoi loi
+            drop_rate (float): Ti le dong ket noi khong tra loi
+            seed (int): Seed cho random
+        """
+        self.latency = parse_latency(latency)
+        self.quota_rate = quota_rate
+        self.burst_rate = burst_rate
+        self.burst_length = burst_length
+        self.burst_status = burst_status
+        self.drop_rate = drop_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._burst_left = 0
+    
+    def decide(self, entry):
+        """
+        Chon loi cho request ke tiep
+        
+        Returns:
+            tuple: (fault, delay) voi fault la None, 'drop', 'burst' hoac 'quota'
+        """
+        with self._lock:
+            delay = self.latency(self._rng, entry) if self.latency else 0.0
+            
+            if self._burst_left > 0:
+                self._burst_left -= 1
+                return 'burst', delay
+            if self.burst_rate and self._rng.random() < self.burst_rate:
+                self._burst_left = self.burst_length - 1
+                return 'burst', delay
+            if self.drop_rate and self._rng.random() < self.drop_rate:
+                return 'drop', delay
+            if self.quota_rate and self._rng.random() < self.quota_rate:
+                return 'quota', delay
+            return None, delay
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Tra ve response tu cassette, co the chen loi theo FaultProfile"""
+    
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def do_GET(self):
+        self._replay('GET')
+    
+    def do_POST(self):
+        self._replay('POST')
+    
+    def _replay(self, method):
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            self.rfile.read(length)
+        
+        parsed = urlparse(self.path)
+        entry = self.server.find(method, parsed.path, parsed.query)
+        fault, delay = self.server.faults.decide(entry)
+        self.server.count(fault or ('replayed' if entry else 'missing'))
+        
+        if delay > 0:
+            time.sleep(delay)
+        
+        if fault == 'drop':
+            # SO_LINGER = 0: dong socket bang RST, client thay ket noi bi reset
+            self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+            self.close_connection = True
+            return
+        if fault == 'burst':
+            self._reply(self.server.faults.burst_status, 'text/plain', 'Service Unavailable')
+        elif fault == 'quota':
+            body = json.dumps({'error': QUOTA_ERROR_CODES[0], 'message': 'Exceeded the quota'})
+            self._reply(200, 'application/json', body)
+        elif entry is None:
+            body = json.dumps({'error': -404, 'message': f"No recorded response for {method} {parsed.path}"})
+            self._reply(404, 'application/json', body)
+        else:
+            self._reply(entry['status'], entry['content_type'], entry['body'])
+    
+    def _reply(self, status, content_type, body):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Override log message to reduce noise"""
+        pass
+
+
+class ReplayServer(ThreadingHTTPServer):
+    """
+    Server phat lai cassette. Request duoc khop theo (method, path, query), neu khong
+    co thi theo (method, path); nhieu response cung khoa duoc tra ve lan luot.
+    """
+    
+    daemon_threads = True
+    # Nhu StubOAServer: backlog mac dinh (5) tran khi benchmark mo nhieu ket noi cung luc
+    request_queue_size = 128
+    
+    def __init__(self, cassette, faults=None, host='127.0.0.1', port=0):
+        """
+        Args:
+            cassette (Cassette): Response da ghi
+            faults (FaultProfile): Loi gia lap (None = khong chen loi)
+            host (str): Dia chi lang nghe
+            port (int): Cong lang nghe (0 = tu chon cong trong)
+        """
+        super().__init__((host, port), ReplayHandler)
+        self.faults = faults or FaultProfile()
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._cursors = Counter()
+        self._exact = {}
+        self._by_path = {}
+        self._thread = None
+        
+        for entry in cassette.entries:
+            self._exact.setdefault((entry['method'], entry['path'], entry['query']), []).append(entry)
+            self._by_path.setdefault((entry['method'], entry['path']), []).append(entry)
+    
+    def find(self, method, path, query):
+        """Response da ghi cho request (None neu khong co)"""
+        key = (method, path, query)
+        entries = self._exact.get(key)
+        if entries is None:
+            key = (method, path)
+            entries = self._by_path.get(key)
+        if not entries:
+            return None
+        
+        with self._lock:
+            index = self._cursors[key]
+            self._cursors[key] += 1
+        return entries[index % len(entries)]
+    
+    def count(self, outcome):
+        with self._lock:
+            self.stats[outcome] += 1
+    
+    def url_for(self, url):
+        """
+        Doi URL that sang URL cua server nay, vd
+        url_for(OA_API_BASE_URL) -> http://127.0.0.1:port/v2.0
+        """
+        host, port = self.server_address[:2]
+        parsed = urlparse(url)
+        return f"http://{host}:{port}{parsed.path}"
+    
+    def start(self):
+        """Chay server trong thread nen"""
+        self._thread = threading.Thread(target=self.serve_forever, name='zalo-replay-server', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Dung server"""
+        if self._thread:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def faults_from_options(options):
+    return FaultProfile(latency=options.latency, quota_rate=options.quota_rate,
+                        burst_rate=options.burst_rate, burst_length=options.burst_length,
+                        burst_status=options.burst_status, drop_rate=options.drop_rate,
+                        seed=options.seed)
+
+
+def command_record(options):
+    """Goi API that va ghi response vao cassette"""
+    from zalo_api_client import ZaloOAClient, create_session, load_token_from_file
+    
+    cassette = Cassette(options.cassette)
+    
+    if options.oauth:
+        import requests
+        from zalo_oauth import start_oauth_flow
+        start_oauth_flow(session=record_session(requests.Session(), cassette))
+    
+    access_token = load_token_from_file()
+    if not access_token:
+        print("Error: No access token found")
+        return
+    
+    session = record_session(create_session(), cassette)
+    with ZaloOAClient(access_token, session=session, cache=False) as client:
+        client.get_oa_info()
+        client.get_oa_profile()
+        
+        if options.followers:
+            for index, _ in enumerate(client.iter_followers(prefetch=False), 1):
+                if index >= options.followers:
+                    break
+        
+        if options.send_to:
+            client.send_text_message(options.send_to, options.message)
+    
+    session.close()
+    print(f"Cassette: {options.cassette} ({len(cassette.entries)} responses)")
+
+
+def command_serve(options):
+    """Phat lai cassette cho process khac"""
+    server = ReplayServer(Cassette(options.cassette), faults_from_options(options), port=options.port)
+    print(f"OA API base URL: {server.url_for(OA_API_BASE_URL)}")
+    print(f"OAuth token URL: {server.url_for(OAUTH_TOKEN_URL)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"Stats: {dict(server.stats)}")
+
+
+def _outcome(result):
+    if result.get('success'):
+        return 'success'
+    if result.get('error_code') is not None:
+        return f"error_code {result['error_code']}"
+    if result.get('status_code') is not None:
+        return f"HTTP {result['status_code']}"
+    return str(result.get('error'))[:60]
+
+
+def command_soak(options):
+    """Goi song song qua ZaloOAClient vao replay server va tong hop ket qua"""
+    from zalo_api_client import ZaloOAClient
+    from zalo_oauth import exchange_authorization_code
+    
+    with ReplayServer(Cassette(options.cassette), faults_from_options(options)) as server:
+        client = ZaloOAClient('replay-token', base_url=server.url_for(OA_API_BASE_URL), cache=False,
+                              rate_limiter=None if options.rate_limit else False,
+                              pool_maxsize=options.concurrency)
+        token_url = server.url_for(OAUTH_TOKEN_URL)
+        calls = {
+            'getoa': lambda i: client.get_oa_info(),
+            'getprofile': lambda i: client.get_oa_profile(),
+            'followers': lambda i: client.get_followers(offset=0, count=50),
+            'message': lambda i: client.send_text_message(f"user{i}", "Soak test"),
+            'oauth': lambda i: exchange_authorization_code('replay-code', session=client.transport,
+                                                           token_url=token_url)
+        }
+        call = calls[options.endpoint]
+        
+        def timed(i):
+            start_time = time.perf_counter()
+            try:
+                result = call(i)
+            except Exception as e:
+                result = {'success': False, 'error': str(e)}
+            return time.perf_counter() - start_time, _outcome(result)
+        
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options.concurrency) as executor:
+            results = list(executor.map(timed, range(options.calls)))
+        elapsed = time.perf_counter() - start_time
+        client.close()
+    
+    durations = [duration for duration, _ in results]
+    report = {
+        'endpoint': options.endpoint,
+        'calls': options.calls,
+        'concurrency': options.concurrency,
+        'elapsed': round(elapsed, 4),
+        'calls_per_sec': round(options.calls / elapsed, 1) if elapsed > 0 else 0.0,
+        'p50_ms': round(percentile(durations, 50) * 1000, 3),
+        'p99_ms': round(percentile(durations, 99) * 1000, 3),
+        'outcomes': dict(Counter(outcome for _, outcome in results)),
+        'server': dict(server.stats)
+    }
+    
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    if options.output:
+        with open(options.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record/replay Zalo OA responses with fault injection')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    record = commands.add_parser('record', help='Goi API that va ghi response')
+    record.add_argument('cassette')
+    record.add_argument('--oauth', action='store_true', help='Chay OAuth flow va ghi buoc doi token')
+    record.add_argument('--followers', type=int, default=100, help='So followers can ghi (0 = bo qua)')
+    record.add_argument('--send-to', help='Gui mot tin nhan den user nay de ghi response /oa/message')
+    record.add_argument('--message', default='Test message')
+    record.set_defaults(func=command_record)
+    
+    for name, func, help_text in (('serve', command_serve, 'Phat lai cassette tren mot cong'),
+                                  ('soak', command_soak, 'Soak test client voi cassette')):
+        sub = commands.add_parser(name, help=help_text)
+        sub.add_argument('cassette')
+        sub.add_argument('--latency', help='fixed:S | uniform:A,B | lognormal:MEDIAN,SIGMA | recorded[:FACTOR]')
+        sub.add_argument('--quota-rate', type=float, default=0.0)
+        sub.add_argument('--burst-rate', type=float, default=0.0)
+        sub.add_argument('--burst-length', type=int, default=5)
+        sub.add_argument('--burst-status', type=int, default=503)
+        sub.add_argument('--drop-rate', type=float, default=0.0)
+        sub.add_argument('--seed', type=int)
+        sub.set_defaults(func=func)
+        
+        if name == 'serve':
+            sub.add_argument('--port', type=int, default=8766)
+        else:
+            sub.add_argument('--endpoint', default='getoa',
+                             choices=['getoa', 'getprofile', 'followers', 'message', 'oauth'])
+            sub.add_argument('--calls', type=int, default=1000)
+            sub.add_argument('--concurrency', type=int, default=32)
+            sub.add_argument('--rate-limit', action='store_true', help='Bat rate limiter cua client')
+            sub.add_argument('--output', help='Luu bao cao JSON')
+    
+    options = parser.parse_args()
+    options.func(options)
+
+
+if __name__ == "__main__":
+    main()
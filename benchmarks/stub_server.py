@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+Stub OpenAPI Server
+Gia lap cac endpoint openapi.zalo.me ma client su dung, co the chinh do tre
+"""
+
+import json
+import time
+import hashlib
+import random
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+API_PREFIX = '/v2.0'
+
+
+class StubOAApi:
+    """
+    Logic cua stub khong kem HTTP: tra ve response giong Zalo cho /oa/getoa, getprofile,
+    getfollowers, message, upload/*. Dung chung cho StubOAServer va MemoryTransport.
+    """
+    
+    def __init__(self, followers_total=1000):
+        """
+        Args:
+            followers_total (int): So followers gia lap
+        """
+        self.followers_total = followers_total
+        self.oa_info = {'oa_id': '1234567890123456789', 'name': 'Stub OA', 'description': 'Benchmark stub'}
+        self.lock = threading.Lock()
+        self.message_count = 0
+        self.upload_count = 0
+    
+    def __call__(self, method, url, headers, params, body):
+        """Handler cho MemoryTransport"""
+        return self.handle(method, urlparse(url).path, params, body)
+    
+    def handle(self, method, path, params, body):
+        """
+        Xu ly mot request
+        
+        Args:
+            method (str): HTTP method
+            path (str): Duong dan (co hoac khong co API_PREFIX)
+            params (dict): Query string, vd {'data': '{"offset": 0}'}
+            body (bytes or iterable): Body, hoac cac doan body (upload doc dan)
+        
+        Returns:
+            tuple: (status_code, payload dict)
+        """
+        path = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else path
+        if method == 'HEAD':
+            return 200, {}
+        if method == 'GET':
+            return self._get(path, self._params(params))
+        if path in ('/oa/upload/image', '/oa/upload/file'):
+            return self._upload(path, body)
+        if path == '/oa/message':
+            return self._message(body)
+        return 404, {'error': -201, 'message': 'Method is not supported'}
+    
+    def _get(self, path, params):
+        if path == '/oa/getoa':
+            return 200, {'error': 0, 'message': 'Success', 'data': self.oa_info}
+        if path == '/oa/getprofile':
+            user_id = params.get('user_id')
+            if user_id:
+                return 200, {'error': 0, 'message': 'Success',
+                             'data': {'user_id': user_id, 'display_name': f"User {user_id}", 'user_gender': 1}}
+            return 200, {'error': 0, 'message': 'Success', 'data': dict(self.oa_info, is_verified=True)}
+        if path == '/oa/getfollowers':
+            offset = int(params.get('offset', 0))
+            count = min(int(params.get('count', 10)), 50)
+            end = min(offset + count, self.followers_total)
+            followers = [{'user_id': f"{i:019d}"} for i in range(offset, end)]
+            return 200, {'error': 0, 'message': 'Success',
+                         'data': {'total': self.followers_total, 'followers': followers}}
+        return 404, {'error': -201, 'message': 'Method is not supported'}
+    
+    def _message(self, body):
+        try:
+            user_id = json.loads(body)['recipient']['user_id']
+        except (ValueError, KeyError, TypeError):
+            return 200, {'error': -201, 'message': 'Invalid parameters'}
+        
+        with self.lock:
+            self.message_count += 1
+            message_id = self.message_count
+        return 200, {'error': 0, 'message': 'Success',
+                     'data': {'message_id': f"{message_id:032x}", 'user_id': user_id}}
+    
+    def _upload(self, path, body):
+        # Body doc tung doan (khong giu ca file), ID tra ve theo noi dung
+        digest = hashlib.sha256()
+        chunks = [body] if isinstance(body, bytes) else (body or [])
+        for chunk in chunks:
+            digest.update(chunk)
+        
+        with self.lock:
+            self.upload_count += 1
+        id_field = 'token' if path == '/oa/upload/file' else 'attachment_id'
+        return 200, {'error': 0, 'message': 'Success', 'data': {id_field: digest.hexdigest()[:32]}}
+    
+    def _params(self, params):
+        try:
+            return json.loads(params.get('data') or '{}')
+        except ValueError:
+            return {}
+
+
+class StubOAHandler(BaseHTTPRequestHandler):
+    """Handler HTTP cua StubOAServer, chuyen request cho StubOAApi"""
+    
+    # HTTP/1.1 de client giu ket noi (keep-alive) nhu voi server that
+    protocol_version = 'HTTP/1.1'
+    # Header va body ghi rieng: tat Nagle de khong bi delayed ACK (~40ms) moi response
+    disable_nagle_algorithm = True
+    
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+    
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        self._reply(*self.server.api.handle('GET', parsed.path, params, None))
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        path = urlparse(self.path).path
+        if path.endswith(('/oa/upload/image', '/oa/upload/file')):
+            body = self._read_chunks(length)
+        else:
+            body = self.rfile.read(length) if length else b''
+        self._reply(*self.server.api.handle('POST', path, {}, body))
+    
+    def _read_chunks(self, length):
+        remaining = length
+        while remaining > 0:
+            chunk = self.rfile.read(min(remaining, 65536))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    
+    def _reply(self, status, payload):
+        delay = self.server.latency
+        if self.server.jitter:
+            delay += random.uniform(0, self.server.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Override log message to reduce noise"""
+        pass
+
+
+class StubOAServer(ThreadingHTTPServer):
+    """Server gia lap: moi request cho `latency` (+ ngau nhien toi `jitter`) giay"""
+    
+    daemon_threads = True
+    # Backlog mac dinh (5) tran khi nhieu worker ket noi cung luc: SYN gui lai lam p99 tang ~1s
+    request_queue_size = 128
+    
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, jitter=0.0, followers_total=1000):
+        """
+        Args:
+            host (str): Dia chi lang nghe
+            port (int): Cong lang nghe (0 = tu chon cong trong)
+            latency (float): Do tre co dinh moi response (giay)
+            jitter (float): Do tre ngau nhien them vao, tu 0 den jitter (giay)
+            followers_total (int): So followers gia lap
+        """
+        super().__init__((host, port), StubOAHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.api = StubOAApi(followers_total)
+        self._thread = None
+    
+    @property
+    def message_count(self):
+        """So tin nhan da nhan"""
+        return self.api.message_count
+    
+    @property
+    def upload_count(self):
+        """So file da upload"""
+        return self.api.upload_count
+    
+    @property
+    def base_url(self):
+        """URL goc dung cho ZaloOAClient(base_url=...)"""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+    
+    def start(self):
+        """Chay server trong thread nen"""
+        self._thread = threading.Thread(target=self.serve_forever, name='zalo-stub-server', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Dung server"""
+        if self._thread:
+            self.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def main():
+    """Chay stub server doc lap (vd de benchmark tu process khac)"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Stub Zalo OpenAPI server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Do tre moi response (giay)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Do tre ngau nhien them (giay)')
+    parser.add_argument('--followers', type=int, default=1000, help='So followers gia lap')
+    args = parser.parse_args()
+    
+    server = StubOAServer(port=args.port, latency=args.latency, jitter=args.jitter,
+                          followers_total=args.followers)
+    print(f"Stub OpenAPI server: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -31,6 +31,26 @@ OAUTH_TOKEN_URL = "https://oauth.zaloapp.com/v4/oa/access_token"
 OA_API_BASE_URL = "https://openapi.zalo.me/v2.0"
 OA_API_V3_BASE_URL = "https://openapi.zalo.me/v3.0"
 
+# Timeout cho moi request HTTP ra ngoai (giay): ket noi va doc response
+HTTP_CONNECT_TIMEOUT = 5
+HTTP_READ_TIMEOUT = 30
+
+# Connection pool cho ZaloOAClient (tai su dung ket noi TCP/TLS giua cac request)
+OA_API_POOL_CONNECTIONS = 4     # So host duoc giu pool
+OA_API_POOL_MAXSIZE = 32        # So ket noi toi da giu lai cho moi host
+OA_API_KEEP_ALIVE = True        # Giu ket noi song giua cac request
+OA_API_WARMUP = False           # Mo san ket noi khi khoi tao client
+
+# Lop gui HTTP cua ZaloOAClient va OAuth: "http1" (requests, connection pool) hoac
+# "http2" (httpx, nhieu request chung mot ket noi; can: pip install "httpx[http2]")
+HTTP_TRANSPORT = "http1"
+
+# So ket noi toi da cua pool dung chung cho tat ca OA trong OARegistry
+OA_REGISTRY_POOL_MAXSIZE = 64
+
+# So request dong thoi toi da cho moi AsyncZaloOAClient
+ASYNC_MAX_CONCURRENCY = 100
+
 # ==========================================
 # SERVER CONFIGURATION
 # ==========================================
@@ -42,14 +62,246 @@ LOCAL_SERVER_PORT = 3000
 # Timeout cho OAuth process (seconds)
 OAUTH_TIMEOUT = 300  # 5 phut
 
+# So giay giu server sau khi doi token xong de browser kip mo trang ket qua (/result)
+OAUTH_RESULT_GRACE = 10
+
+# Onboarding service (nhieu OA): so worker doi token song song
+ONBOARDING_WORKERS = 8
+
+# Thoi gian mot link onboarding (state) con hieu luc (seconds)
+ONBOARDING_SESSION_TTL = 900
+
 # ==========================================
 # FILE PATHS
 # ==========================================
 
-# File de luu access token
+# File de luu access token (dang text de doc)
 TOKEN_FILE = "zalo_access_token.txt"
 LOG_FILE = "zalo_oauth_log.txt"
 
+# File luu token dang JSON (co thoi diem het han tuyet doi), dung de kiem tra token
+TOKEN_STORE_FILE = "zalo_token.json"
+
+# Goi API de kiem tra token moi lan khoi dong, ke ca khi token store bao con han
+TOKEN_VERIFY_ON_START = False
+
+# Tu dong refresh access token bang refresh_token truoc khi het han (giay)
+TOKEN_REFRESH_MARGIN = 3600
+
+# So giay cho truoc khi thu refresh lai neu bi loi
+TOKEN_REFRESH_RETRY_INTERVAL = 60
+
+# ==========================================
+# FOLLOWERS
+# ==========================================
+
+# So follower moi trang khi duyet toan bo followers (Zalo cho toi da 50)
+FOLLOWERS_PAGE_SIZE = 50
+
+# Database SQLite luu snapshot followers va log follow/unfollow
+FOLLOWER_DB_FILE = "zalo_followers.db"
+
+# So user_id ghi vao database moi lan khi sync
+FOLLOWER_SYNC_BATCH_SIZE = 1000
+
+# Kiem tra nhanh (tong so + trang dau) khong thay follow/unfollow bu tru nhau ngoai trang dau:
+# bat buoc duyet toan bo sau bao nhieu lan kiem tra nhanh lien tiep, hoac khi lan duyet toan bo
+# gan nhat da qua bao nhieu giay (None = khong gioi han)
+FOLLOWER_QUICK_CHECK_MAX_RUNS = 24
+FOLLOWER_QUICK_CHECK_MAX_AGE = 86400
+
+# ==========================================
+# RATE LIMIT
+# ==========================================
+
+# Bat/tat rate limiter trong ZaloOAClient
+RATE_LIMIT_ENABLED = True
+
+# Rate lay profile user (so request/giay, burst). Zalo khong cong bo quota rieng cho /oa/getprofile:
+# mac dinh bang muc getoa cu (gia dinh an toan), chi tang khi OA da duoc Zalo xac nhan quota cao hon
+USER_PROFILE_RATE_LIMIT = (5, 10)
+
+# Token bucket cho moi nhom endpoint: (so request/giay, burst)
+RATE_LIMITS = {
+    "message": (20, 40),
+    "getfollowers": (10, 20),
+    "getoa": (5, 10),
+    "getprofile": USER_PROFILE_RATE_LIMIT
+}
+
+# Endpoint thuoc bucket nao (endpoint khong co o day thi khong bi gioi han)
+RATE_LIMIT_ENDPOINTS = {
+    "/oa/message": "message",
+    "/oa/getfollowers": "getfollowers",
+    "/oa/getoa": "getoa",
+    "/oa/getprofile": "getprofile"
+}
+
+# File chia se trang thai bucket giua cac process tren cung may
+# (None = moi process tu gioi han rieng)
+RATE_LIMIT_STATE_FILE = None
+
+# Ma loi Zalo bao vuot quota / rate limit (HTTP 429 cung duoc tinh)
+QUOTA_ERROR_CODES = [-32]
+
+# Khi gap loi quota: tam dung bucket (giay) va thoi gian hoi phuc rate (giay)
+RATE_LIMIT_COOLDOWN = 5
+RATE_LIMIT_RECOVERY = 60
+
+# ==========================================
+# RETRY & CIRCUIT BREAKER
+# ==========================================
+
+# Tong so lan goi toi da cho loi tam thoi (1 = khong thu lai)
+RETRY_MAX_ATTEMPTS = 3
+
+# Exponential backoff co jitter: cho ngau nhien 0..min(MAX, BASE * 2^(n-1)) giay
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 8
+
+# Chi thu lai cac method nay (gui tin nhan - POST - chi thu lai khi chua ket noi duoc)
+RETRY_IDEMPOTENT_METHODS = ["GET"]
+
+# HTTP status va ma loi Zalo duoc coi la tam thoi
+RETRY_STATUS_CODES = [429, 500, 502, 503, 504]
+RETRY_ERROR_CODES = [-32]
+
+# Circuit breaker theo endpoint: mo mach sau N loi lien tiep, thu lai sau RESET_TIMEOUT giay
+CIRCUIT_BREAKER_ENABLED = True
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = 5
+CIRCUIT_BREAKER_RESET_TIMEOUT = 30
+
+# ==========================================
+# METRICS
+# ==========================================
+
+# Ghi metrics (so request, do tre, ma loi) cho ZaloOAClient
+METRICS_ENABLED = True
+
+# Dia chi server xuat metrics dang Prometheus (http://host:port/metrics)
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9464
+
+# Cac bucket (giay) cua histogram do tre
+METRICS_LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+# ==========================================
+# RESPONSE CACHE
+# ==========================================
+
+# Cache ket qua cac API chi doc (OA info, profile)
+RESPONSE_CACHE_ENABLED = True
+
+# TTL (giay) cho tung endpoint duoc cache
+RESPONSE_CACHE_TTLS = {
+    "/oa/getoa": 600,
+    "/oa/getprofile": 600
+}
+
+# So ket qua toi da giu trong bo nho (LRU)
+RESPONSE_CACHE_MAXSIZE = 1024
+
+# File SQLite de cache ton tai qua cac lan chay (None = chi trong bo nho)
+RESPONSE_CACHE_FILE = None
+
+# Cache rieng cho profile cua user (get_user_profile): so profile toi da (LRU) va TTL (giay)
+USER_PROFILE_CACHE_ENABLED = True
+USER_PROFILE_CACHE_MAXSIZE = 100000
+USER_PROFILE_CACHE_TTL = 3600
+
+# So request lay profile song song khi lay hang loat (nen <= OA_API_POOL_MAXSIZE)
+USER_PROFILE_WORKERS = 16
+
+# ==========================================
+# BROADCAST
+# ==========================================
+
+# So worker gui tin nhan song song (nen <= OA_API_POOL_MAXSIZE)
+BROADCAST_WORKERS = 16
+
+# File luu tien do broadcast de chay lai khong gui trung
+BROADCAST_CHECKPOINT_FILE = "zalo_broadcast_checkpoint.jsonl"
+
+# Broadcast nhieu process (ShardedBroadcaster): so process (None = so CPU) va so user moi lo chia cho process
+BROADCAST_PROCESSES = None
+BROADCAST_CHUNK_SIZE = 200
+
+# ==========================================
+# MEDIA UPLOAD
+# ==========================================
+
+# Cache attachment_id theo noi dung file (sha256): gui cung mot anh cho nhieu user chi upload mot lan
+UPLOAD_CACHE_ENABLED = True
+UPLOAD_CACHE_FILE = "zalo_attachments.db"
+
+# attachment_id chi duoc dung lai trong thoi gian nay (giay), sau do file se duoc upload lai
+UPLOAD_CACHE_TTL = 24 * 3600
+
+# So file toi da duoc nho hash (theo duong dan, kich thuoc, mtime) de khong phai doc lai
+UPLOAD_DIGEST_CACHE_SIZE = 10000
+
+# So byte moi lan doc file khi upload / tinh hash
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# ==========================================
+# MESSAGE QUEUE
+# ==========================================
+
+# Database SQLite (WAL) chua tin nhan cho gui
+MESSAGE_QUEUE_DB_FILE = "zalo_message_queue.db"
+
+# So worker gui song song (nen <= OA_API_POOL_MAXSIZE)
+MESSAGE_QUEUE_WORKERS = 16
+
+# So tin moi worker lay ra khoi queue mot lan
+MESSAGE_QUEUE_CLAIM_SIZE = 10
+
+# Ghi ket qua gui vao database theo lo: toi da bao nhieu ket qua / bao nhieu giay mot lan commit
+MESSAGE_QUEUE_COMMIT_BATCH = 200
+MESSAGE_QUEUE_COMMIT_INTERVAL = 0.2
+
+# Tin da lay ra nhung khong duoc xac nhan trong thoi gian nay (vd process chet) se duoc gui lai
+MESSAGE_QUEUE_LEASE = 120
+
+# So lan gui toi da va thoi gian cho co ban truoc khi gui lai (tang gap doi moi lan)
+MESSAGE_QUEUE_MAX_ATTEMPTS = 5
+MESSAGE_QUEUE_RETRY_DELAY = 30
+
+# Loi database (vd "database is locked"): worker cho roi thu lai, tang gap doi den toi da (giay)
+MESSAGE_QUEUE_ERROR_BACKOFF = 0.5
+MESSAGE_QUEUE_ERROR_BACKOFF_MAX = 30
+
+# ==========================================
+# WEBHOOK
+# ==========================================
+
+# Server nhan webhook (URL dang ky trong Zalo Developer Console: http://host:port/webhook)
+WEBHOOK_HOST = "0.0.0.0"
+WEBHOOK_PORT = 8080
+WEBHOOK_PATH = "/webhook"
+
+# OA Secret Key (trang Webhook cua app) de kiem tra header X-ZEvent-Signature
+WEBHOOK_OA_SECRET_KEY = ""
+
+# Kiem tra chu ky moi event (chi tat khi test local)
+WEBHOOK_VERIFY_SIGNATURE = True
+
+# Kich thuoc body toi da cua mot event (bytes)
+WEBHOOK_MAX_BODY_SIZE = 1024 * 1024
+
+# So event toi da cho xu ly trong bo nho; day thi tra 503 de Zalo gui lai sau
+WEBHOOK_QUEUE_SIZE = 10000
+
+# Thoi gian cho cho trong queue truoc khi tra 503 (giay)
+WEBHOOK_ENQUEUE_TIMEOUT = 0.5
+
+# So thread goi handler (event cua cung mot user luon vao cung mot thread, giu dung thu tu)
+WEBHOOK_WORKERS = 4
+
+# Handler nhan event theo lo: toi da bao nhieu event / cho toi da bao nhieu giay
+WEBHOOK_BATCH_SIZE = 100
+WEBHOOK_BATCH_INTERVAL = 0.05
+
 # ==========================================
 # API TEST ENDPOINTS
 # ==========================================
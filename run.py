@@ -10,11 +10,10 @@ import time
 import json
 from datetime import datetime, timedelta
 
-# Import modules
+# Import modules (cac module nang nhu requests/http.server duoc import khi can
+# de cac lenh ngan nhu 'token status' khoi dong nhanh)
 try:
     from config import *
-    from zalo_oauth import start_oauth_flow
-    from zalo_api_client import ZaloOAClient, load_token_from_file
 except ImportError as e:
     print(f"Error importing modules: {e}")
     print("Please make sure all required files are in the same directory")
@@ -28,6 +27,7 @@ class ZaloOAManager:
         self.access_token = None
         self.token_info = None
         self.client = None
+        self.refresher = None
     
     def check_config(self):
         """Kiem tra cau hinh"""
@@ -52,24 +52,55 @@ class ZaloOAManager:
         """Kiem tra access token hien tai"""
         print("Checking existing access token...")
         
-        if not os.path.exists(TOKEN_FILE):
-            print(f"  Token file not found: {TOKEN_FILE}")
-            return False
-        
-        # Doc token tu file
-        self.access_token = load_token_from_file()
-        if not self.access_token:
-            print("  Could not read access token from file")
-            return False
+        from zalo_token_store import TokenStore, get_default_token_store
         
-        # Doc thong tin chi tiet tu file
-        self.token_info = self.parse_token_file()
-        
-        # Kiem tra thoi han
-        if self.token_info and 'expires_time' in self.token_info:
-            if datetime.now() > self.token_info['expires_time']:
+        # Uu tien token store (JSON): co san thoi diem het han, khong can parse file text
+        record = get_default_token_store().get()
+        if record:
+            self.access_token = record['access_token']
+            self.token_info = self.record_to_token_info(record)
+            
+            # Sap het han: thu refresh bang refresh_token truoc khi phai mo trinh duyet
+            if not TokenStore.is_valid(record, TOKEN_REFRESH_MARGIN) and record.get('refresh_token'):
+                print("  Access token is about to expire, refreshing...")
+                from zalo_token_refresher import TokenRefresher
+                # force=False: process khac co the vua refresh xong (refresh_token da xoay vong)
+                result = TokenRefresher().refresh_now(force=False)
+                if result['success']:
+                    record = result['record']
+                    self.access_token = record['access_token']
+                    self.token_info = self.record_to_token_info(record)
+                else:
+                    print(f"  Refresh failed: {result['error']}")
+            
+            if not TokenStore.is_valid(record):
                 print("  Access token has expired")
                 return False
+            
+            # Token da duoc verify khi luu va con han: khong can goi API
+            if record.get('verified') and not TOKEN_VERIFY_ON_START:
+                print(f"  Access token is valid: {self.access_token[:50]}...")
+                return True
+        else:
+            if not os.path.exists(TOKEN_FILE):
+                print(f"  Token file not found: {TOKEN_FILE}")
+                return False
+            
+            # Doc token tu file
+            from zalo_api_client import load_token_from_file
+            self.access_token = load_token_from_file(TOKEN_FILE)
+            if not self.access_token:
+                print("  Could not read access token from file")
+                return False
+            
+            # Doc thong tin chi tiet tu file
+            self.token_info = self.parse_token_file()
+            
+            # Kiem tra thoi han
+            if self.token_info and 'expires_time' in self.token_info:
+                if datetime.now() > self.token_info['expires_time']:
+                    print("  Access token has expired")
+                    return False
         
         # Test token
         if self.test_token():
@@ -79,6 +110,18 @@ class ZaloOAManager:
             print("  Access token is invalid or expired")
             return False
     
+    def record_to_token_info(self, record):
+        """Chuyen record trong token store sang dang token_info de hien thi"""
+        info = {}
+        if record.get('generated_at'):
+            info['generated_time'] = datetime.fromtimestamp(record['generated_at'])
+        if record.get('expires_at'):
+            info['expires_time'] = datetime.fromtimestamp(record['expires_at'])
+        for key in ['oa_name', 'oa_id', 'app_id']:
+            if record.get(key):
+                info[key] = record[key]
+        return info
+    
     def parse_token_file(self):
         """Doc thong tin chi tiet tu token file"""
         try:
@@ -117,6 +160,7 @@ class ZaloOAManager:
     def test_token(self):
         """Test access token"""
         try:
+            from zalo_api_client import ZaloOAClient
             client = ZaloOAClient(self.access_token)
             result = client.get_oa_info()
             return result.get('success', False)
@@ -129,6 +173,7 @@ class ZaloOAManager:
         print("This will open your browser for OAuth authorization")
         
         try:
+            from zalo_oauth import start_oauth_flow
             start_oauth_flow()
             
             # Kiem tra lai sau khi OAuth
@@ -142,7 +187,18 @@ class ZaloOAManager:
     def initialize_client(self):
         """Khoi tao API client"""
         if self.access_token:
+            from zalo_api_client import ZaloOAClient
+            from zalo_token_store import get_default_token_store
+            from zalo_token_refresher import TokenRefresher
+            
             self.client = ZaloOAClient(self.access_token)
+            
+            # Refresh token nen de client khong bi loi khi token het han
+            if get_default_token_store().get():
+                if self.refresher is None:
+                    self.refresher = TokenRefresher()
+                    self.refresher.start()
+                self.refresher.register(self.client)
             return True
         return False
     
@@ -182,6 +238,7 @@ class ZaloOAManager:
         print("3. Get New Access Token")
         print("4. Show Token Info")
         print("5. Send Test Message (if you have user_id)")
+        print("6. Broadcast Message (from user_id file)")
         print("0. Exit")
         print("-" * 50)
     
@@ -189,7 +246,7 @@ class ZaloOAManager:
         """Che do tuong tac"""
         while True:
             self.show_menu()
-            choice = input("Select option (0-5): ").strip()
+            choice = input("Select option (0-6): ").strip()
             
             if choice == '0':
                 print("Goodbye!")
@@ -208,6 +265,8 @@ class ZaloOAManager:
                 self.show_token_info()
             elif choice == '5':
                 self.send_test_message()
+            elif choice == '6':
+                self.broadcast_message()
             else:
                 print("Invalid option. Please try again.")
             
@@ -277,6 +336,36 @@ class ZaloOAManager:
         else:
             print(f"Failed to send message: {result['error']}")
     
+    def broadcast_message(self):
+        """Gui tin nhan hang loat den danh sach user_id trong file"""
+        if not self.client:
+            print("No API client available")
+            return
+        
+        file_path = input("Enter path to user_id file (one ID per line): ").strip()
+        if not file_path or not os.path.exists(file_path):
+            print("File not found")
+            return
+        
+        message = input("Enter message text: ").strip()
+        if not message:
+            print("Skipped")
+            return
+        
+        from zalo_broadcast import ZaloBroadcaster, read_recipients
+        
+        broadcaster = ZaloBroadcaster(self.client, checkpoint_file=BROADCAST_CHECKPOINT_FILE)
+        
+        def show_progress(user_id, result):
+            if not result['success']:
+                print(f"  {user_id}: {result['error']}")
+        
+        print(f"Broadcasting with {broadcaster.workers} workers...")
+        report = broadcaster.send_text(read_recipients(file_path), message, on_result=show_progress)
+        
+        print(f"Sent: {report['sent']}, Failed: {report['failed']}, Skipped: {report['skipped']}")
+        print(f"Elapsed: {report['elapsed']:.1f}s ({report['throughput']:.1f} msg/s)")
+    
     def run(self):
         """Chay chuong trinh chinh"""
         print("=" * 60)
@@ -311,8 +400,264 @@ class ZaloOAManager:
         return True
 
 
+def print_json(data, stream=None):
+    """In ket qua dang JSON (mot dong) de script/cron doc duoc"""
+    print(json.dumps(data, ensure_ascii=False, default=str), file=stream or sys.stdout)
+
+
+def load_cli_access_token(oa_id=None):
+    """
+    Doc access token cho lenh CLI
+    
+    Args:
+        oa_id (str): ID cua OA (None = OA hien tai, hoac file text neu store trong)
+    
+    Returns:
+        str or None: Access token
+    """
+    if oa_id:
+        from zalo_token_store import get_default_token_store
+        record = get_default_token_store().get(oa_id)
+        return record.get('access_token') if record else None
+    
+    from zalo_api_client import load_token_from_file
+    return load_token_from_file()
+
+
+def create_cli_client(args):
+    """Tao ZaloOAClient cho lenh CLI (None neu khong co token)"""
+    access_token = load_cli_access_token(args.oa_id)
+    if not access_token:
+        print_json({'success': False, 'error': 'No access token found'})
+        return None
+    
+    from zalo_api_client import ZaloOAClient
+    return ZaloOAClient(access_token)
+
+
+def cli_deadline(args):
+    """Deadline cho ca lenh tu --timeout (None neu khong dat)"""
+    if not args.timeout:
+        return None
+    from zalo_retry import Deadline
+    return Deadline(args.timeout)
+
+
+def cli_token_status(args):
+    """token status: thong tin token trong store, khong goi network"""
+    from zalo_token_store import TokenStore, get_default_token_store
+    
+    record = get_default_token_store().get(args.oa_id)
+    if not record:
+        print_json({'success': False, 'error': 'No token in store'})
+        return 1
+    
+    expires_at = record.get('expires_at')
+    valid = TokenStore.is_valid(record)
+    print_json({
+        'success': True,
+        'data': {
+            'oa_id': record.get('oa_id'),
+            'oa_name': record.get('oa_name'),
+            'verified': record.get('verified', False),
+            'valid': valid,
+            'expires_at': expires_at,
+            'expires_in': int(expires_at - time.time()) if expires_at else None,
+            'needs_refresh': not TokenStore.is_valid(record, TOKEN_REFRESH_MARGIN),
+            'has_refresh_token': bool(record.get('refresh_token'))
+        }
+    })
+    return 0 if valid else 1
+
+
+def cli_token_refresh(args):
+    """token refresh: lam moi access token bang refresh_token"""
+    from zalo_token_refresher import TokenRefresher
+    
+    result = TokenRefresher(oa_id=args.oa_id).refresh_now(force=not args.if_needed)
+    if not result['success']:
+        print_json(result)
+        return 1
+    
+    record = result['record']
+    print_json({
+        'success': True,
+        'data': {'oa_id': record.get('oa_id'), 'expires_at': record.get('expires_at')}
+    })
+    return 0
+
+
+def cli_oa_info(args):
+    """oa-info: thong tin OA"""
+    client = create_cli_client(args)
+    if not client:
+        return 1
+    
+    with client:
+        result = client.get_oa_info(deadline=cli_deadline(args))
+    print_json(result)
+    return 0 if result['success'] else 1
+
+
+def cli_send(args):
+    """send: gui tin nhan text den mot user"""
+    message = sys.stdin.read().strip() if args.message == '-' else args.message
+    if not message:
+        print_json({'success': False, 'error': 'Empty message'})
+        return 1
+    
+    client = create_cli_client(args)
+    if not client:
+        return 1
+    
+    with client:
+        result = client.send_text_message(args.user_id, message, deadline=cli_deadline(args))
+    print_json(result)
+    return 0 if result['success'] else 1
+
+
+def cli_broadcast(args):
+    """broadcast: gui tin nhan text den user_id trong file, chia cho nhieu process"""
+    message = sys.stdin.read().strip() if args.message == '-' else args.message
+    if not message:
+        print_json({'success': False, 'error': 'Empty message'})
+        return 1
+    
+    access_token = load_cli_access_token(args.oa_id)
+    if not access_token:
+        print_json({'success': False, 'error': 'No access token found'})
+        return 1
+    
+    from zalo_broadcast import ShardedBroadcaster, read_recipients
+    
+    progress = {'sent': 0, 'failed': 0}
+    
+    def show_progress(user_id, result):
+        progress['sent' if result['success'] else 'failed'] += 1
+        if (progress['sent'] + progress['failed']) % args.progress_every == 0:
+            print_json({'progress': dict(progress)}, sys.stderr)
+    
+    broadcaster = ShardedBroadcaster(access_token, processes=args.processes, workers=args.workers,
+                                     checkpoint_file=args.checkpoint)
+    report = broadcaster.send_text(read_recipients(args.file), message, on_result=show_progress,
+                                   deadline=cli_deadline(args))
+    # Danh sach loi chi ghi so luong (co the rat dai); chi tiet nam trong checkpoint
+    report['failures'] = len(report['failures'])
+    success = report['failed'] == 0 and report['unfinished'] == 0 and not report.get('errors')
+    print_json({'success': success, 'data': report})
+    return 0 if success else 1
+
+
+def cli_followers_export(args):
+    """followers export: ghi followers ra JSON lines (mot follower moi dong)"""
+    client = create_cli_client(args)
+    if not client:
+        return 1
+    
+    from zalo_api_client import ZaloAPIError
+    
+    output = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    # Neu followers ghi ra stdout thi bao cao tong ket ghi ra stderr
+    report_stream = sys.stdout if args.output else sys.stderr
+    exported = 0
+    followers = client.iter_followers(offset=args.offset, deadline=cli_deadline(args))
+    
+    try:
+        for follower in followers:
+            output.write(json.dumps(follower, ensure_ascii=False) + "\n")
+            exported += 1
+            if args.limit and exported >= args.limit:
+                followers.close()
+                break
+        report = {'success': True, 'data': {'exported': exported, 'total': followers.total,
+                                            'next_offset': followers.offset}}
+    except ZaloAPIError as e:
+        # next_offset de chay lai tu vi tri bi loi (--offset)
+        report = {'success': False, 'error': str(e), 'exported': exported, 'next_offset': followers.offset}
+    finally:
+        if args.output:
+            output.close()
+        else:
+            output.flush()
+        client.close()
+    
+    print_json(report, report_stream)
+    return 0 if report['success'] else 1
+
+
+def build_cli_parser():
+    """Parser cho cac lenh khong tuong tac"""
+    import argparse
+    
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--oa-id', help='OA trong token store (mac dinh OA hien tai)')
+    
+    network = argparse.ArgumentParser(add_help=False, parents=[common])
+    network.add_argument('--timeout', type=float, help='Thoi han cho ca lenh (giay)')
+    
+    parser = argparse.ArgumentParser(prog='run.py', description='Zalo OA Manager (khong tham so = menu tuong tac)')
+    commands = parser.add_subparsers(dest='command', required=True)
+    
+    token = commands.add_parser('token', help='Thong tin / refresh access token')
+    token_commands = token.add_subparsers(dest='token_command', required=True)
+    status = token_commands.add_parser('status', parents=[common], help='Trang thai token (khong goi network)')
+    status.set_defaults(func=cli_token_status)
+    refresh = token_commands.add_parser('refresh', parents=[common], help='Lam moi token bang refresh_token')
+    refresh.add_argument('--if-needed', action='store_true', help='Chi refresh neu token sap het han')
+    refresh.set_defaults(func=cli_token_refresh)
+    
+    oa_info = commands.add_parser('oa-info', parents=[network], help='Thong tin OA')
+    oa_info.set_defaults(func=cli_oa_info)
+    
+    send = commands.add_parser('send', parents=[network], help='Gui tin nhan text')
+    send.add_argument('user_id')
+    send.add_argument('message', help="Noi dung tin nhan ('-' = doc tu stdin)")
+    send.set_defaults(func=cli_send)
+    
+    broadcast = commands.add_parser('broadcast', parents=[network], help='Gui tin nhan text hang loat (nhieu process)')
+    broadcast.add_argument('file', help='File user_id (moi dong mot ID)')
+    broadcast.add_argument('message', help="Noi dung tin nhan ('-' = doc tu stdin)")
+    broadcast.add_argument('--processes', type=int, help='So process gui (mac dinh so CPU)')
+    broadcast.add_argument('--workers', type=int, default=BROADCAST_WORKERS, help='So worker moi process')
+    broadcast.add_argument('--checkpoint', default=BROADCAST_CHECKPOINT_FILE, help='File checkpoint de resume')
+    broadcast.add_argument('--progress-every', type=int, default=1000, help='In tien do (stderr) sau moi N user')
+    broadcast.set_defaults(func=cli_broadcast)
+    
+    followers = commands.add_parser('followers', help='Followers cua OA')
+    followers_commands = followers.add_subparsers(dest='followers_command', required=True)
+    export = followers_commands.add_parser('export', parents=[network], help='Xuat followers ra JSON lines')
+    export.add_argument('--output', help='File ket qua (mac dinh stdout)')
+    export.add_argument('--offset', type=int, default=0, help='Vi tri bat dau (resume)')
+    export.add_argument('--limit', type=int, help='So followers toi da')
+    export.set_defaults(func=cli_followers_export)
+    
+    return parser
+
+
+def run_cli(argv):
+    """
+    Chay mot lenh khong tuong tac, vd:
+        python run.py token status
+        python run.py send <user_id> "Hello"
+    
+    Returns:
+        int: Exit code (0 = thanh cong)
+    """
+    args = build_cli_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as e:
+        print_json({'success': False, 'error': str(e)})
+        return 1
+
+
 def main():
     """Ham chinh"""
+    if len(sys.argv) > 1:
+        sys.exit(run_cli(sys.argv[1:]))
+    
     try:
         manager = ZaloOAManager()
         manager.run()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+Cau hinh pytest: import duoc cac module o thu muc goc va benchmarks/,
+moi test chay trong thu muc tam (file SQLite/JSON mac dinh khong ghi vao repo)
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+
+from zalo_transport import MemoryTransport
+from zalo_api_client import ZaloOAClient
+from zalo_retry import RetryPolicy
+from stub_server import StubOAApi
+
+
+@pytest.fixture(autouse=True)
+def _work_dir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def stub_api():
+    return StubOAApi(followers_total=120)
+
+
+@pytest.fixture
+def make_client(stub_api):
+    """Tao ZaloOAClient goi StubOAApi (hoac handler rieng) qua MemoryTransport, khong cache/rate limit"""
+    clients = []
+    
+    def factory(handler=None, **kwargs):
+        options = {
+            'rate_limiter': False,
+            'cache': False,
+            'profile_cache': False,
+            'attachment_cache': False,
+            'circuit_breakers': False,
+            'metrics': False,
+            'retry_policy': RetryPolicy(max_attempts=1)
+        }
+        options.update(kwargs)
+        transport = options.pop('transport', None) or MemoryTransport(handler or stub_api)
+        client = ZaloOAClient('test-token', transport=transport, **options)
+        clients.append(client)
+        return client
+    
+    yield factory
+    for client in clients:
+        client.close()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import time
+import asyncio
+import threading
+
+import pytest
+
+pytest.importorskip('aiohttp')
+
+from stub_server import StubOAServer
+from zalo_async_client import AsyncZaloOAClient
+from zalo_message_template import text_message
+from zalo_rate_limit import RateLimiter
+
+
+def test_async_client_against_stub_server():
+    async def run(base_url):
+        async with AsyncZaloOAClient('test-token', max_concurrency=8, rate_limiter=False,
+                                     base_url=base_url) as client:
+            info = await client.get_oa_info()
+            followers = await client.get_followers(offset=0, count=5)
+            results = await asyncio.gather(*(client.send_text_message(f"u{i}", 'chào') for i in range(40)))
+            template = await client.send_message('u1', text_message('Hi {name}'), {'name': 'Lan'})
+            missing = await client.send_message('u1', text_message('Hi {name}'))
+            return info, followers, results, template, missing
+    
+    with StubOAServer(followers_total=20) as server:
+        info, followers, results, template, missing = asyncio.run(run(server.base_url))
+        assert info['data']['name'] == 'Stub OA'
+        assert len(followers['data']['followers']) == 5
+        assert all(result['success'] for result in results)
+        assert template['success']
+        assert not missing['success'] and 'name' in missing['error']
+        assert server.message_count == 41
+
+
+def test_async_client_limits_concurrency():
+    async def run(base_url):
+        async with AsyncZaloOAClient('test-token', max_concurrency=4, rate_limiter=False,
+                                     base_url=base_url) as client:
+            return await asyncio.gather(*(client.get_oa_info() for _ in range(16)))
+    
+    with StubOAServer(latency=0.05) as server:
+        started = time.perf_counter()
+        results = asyncio.run(run(server.base_url))
+        elapsed = time.perf_counter() - started
+    assert all(result['success'] for result in results)
+    # 16 request, toi da 4 cung luc, moi request >= 50ms: it nhat 4 dot
+    assert elapsed >= 0.2
+
+
+def test_async_client_reports_connection_error():
+    async def run():
+        async with AsyncZaloOAClient('test-token', rate_limiter=False, base_url='http://127.0.0.1:9') as client:
+            return await client.get_oa_info()
+    
+    result = asyncio.run(run())
+    assert not result['success']
+
+
+def test_async_client_reserves_tokens_off_event_loop(tmp_path):
+    class RecordingLimiter(RateLimiter):
+        def reserve(self, bucket):
+            threads.add(threading.get_ident())
+            return super().reserve(bucket)
+    
+    threads = set()
+    limiter = RecordingLimiter({'message': (1000, 5)}, state_file=str(tmp_path / 'rate.json'))
+    
+    async def run(base_url):
+        async with AsyncZaloOAClient('test-token', rate_limiter=limiter, base_url=base_url) as client:
+            results = await asyncio.gather(*(client.send_text_message(f"u{i}", 'hi') for i in range(10)))
+            return results, threading.get_ident()
+    
+    with StubOAServer() as server:
+        results, loop_thread = asyncio.run(run(server.base_url))
+    assert all(result['success'] for result in results)
+    assert threads and loop_thread not in threads
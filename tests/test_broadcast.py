@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import json
+
+from stub_server import StubOAServer
+from zalo_retry import Deadline
+from zalo_broadcast import BroadcastCheckpoint, ZaloBroadcaster, ShardedBroadcaster
+from zalo_message_template import text_message
+
+
+def _failing_for(user_ids, api):
+    def handler(method, url, headers, params, body):
+        if json.loads(body)['recipient']['user_id'] in user_ids:
+            return 200, {'error': -213, 'message': 'User has not followed OA'}
+        return api(method, url, headers, params, body)
+    return handler
+
+
+def test_broadcast_report_and_dedup(make_client, stub_api):
+    results = {}
+    broadcaster = ZaloBroadcaster(make_client(_failing_for({'u3'}, stub_api)), workers=4)
+    report = broadcaster.send_text((f"u{i % 10}" for i in range(25)), 'hi', on_result=results.__setitem__)
+    
+    assert (report['total'], report['sent'], report['failed'], report['skipped']) == (25, 9, 1, 15)
+    assert report['failures'] == {'u3': 'User has not followed OA'}
+    assert len(results) == 10
+    assert stub_api.message_count == 9
+
+
+def test_checkpoint_resume_skips_sent_users(make_client, stub_api, tmp_path):
+    checkpoint_file = str(tmp_path / 'checkpoint.jsonl')
+    recipients = [f"u{i}" for i in range(20)]
+    
+    first = ZaloBroadcaster(make_client(_failing_for({'u5', 'u6'}, stub_api)), workers=4,
+                            checkpoint_file=checkpoint_file).send_text(recipients, 'hi')
+    assert (first['sent'], first['failed']) == (18, 2)
+    
+    # Dong cuoi bi ghi do (process chet giua chung) khong lam hong checkpoint
+    with open(checkpoint_file, 'a', encoding='utf-8') as f:
+        f.write('{"user_id": "u7", "succ')
+    assert BroadcastCheckpoint(checkpoint_file).done == set(recipients) - {'u5', 'u6'}
+    
+    second = ZaloBroadcaster(make_client(), workers=4, checkpoint_file=checkpoint_file).send_text(recipients, 'hi')
+    assert (second['sent'], second['failed'], second['skipped']) == (2, 0, 18)
+    assert stub_api.message_count == 20
+
+
+def test_broadcast_stops_at_deadline(make_client, stub_api):
+    report = ZaloBroadcaster(make_client(), workers=2).send_text(['u1', 'u2'], 'hi', deadline=Deadline(0))
+    assert report['deadline_exceeded']
+    assert report['total'] == 0
+    assert stub_api.message_count == 0
+
+
+def test_send_template_with_variables(make_client, stub_api):
+    template = text_message('Hi {name}')
+    sent = {}
+    report = ZaloBroadcaster(make_client(), workers=2).send_template(
+        ['u1', 'u2'], template, variables=lambda user_id: {'name': user_id.upper()},
+        on_result=lambda user_id, result: sent.setdefault(user_id, result['success']))
+    assert report['sent'] == 2
+    assert sent == {'u1': True, 'u2': True}
+
+
+def test_sharded_broadcast_through_stub_server(tmp_path):
+    checkpoint_file = str(tmp_path / 'checkpoint.jsonl')
+    recipients = [f"u{i}" for i in range(30)] + ['u0']
+    with StubOAServer() as server:
+        broadcaster = ShardedBroadcaster('test-token', processes=2, workers=4, chunk_size=7,
+                                         checkpoint_file=checkpoint_file, base_url=server.base_url,
+                                         rate_state_file=str(tmp_path / 'rate.json'))
+        report = broadcaster.send_text(iter(recipients), 'hi')
+        assert (report['total'], report['sent'], report['failed'], report['skipped']) == (31, 30, 0, 1)
+        assert report['unfinished'] == 0 and 'errors' not in report
+        assert server.message_count == 30
+        
+        report = broadcaster.send_template(recipients, text_message('Hi {name}'), variables=lambda u: {'name': u})
+        assert (report['sent'], report['skipped']) == (0, 31)
+        assert server.message_count == 30
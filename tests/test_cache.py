@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import threading
+
+from zalo_cache import TTLCache, SingleFlight
+
+
+def test_response_cache_returns_independent_copies(make_client, stub_api):
+    client = make_client(cache=TTLCache(100))
+    first = client.get_oa_info()
+    assert first['success'] and not first.get('cached')
+    first['data']['name'] = 'changed'
+    
+    second = client.get_oa_info()
+    third = client.get_oa_info()
+    assert second['cached'] and third['cached']
+    assert second['data']['name'] != 'changed'
+    second['data'].clear()
+    assert third['data'] and third['data'] == client.get_oa_info()['data']
+    assert set(second) == {'success', 'data', 'cached'}
+
+
+def test_profile_cache_returns_independent_copies(make_client, stub_api):
+    client = make_client(profile_cache=TTLCache(100))
+    first = client.get_user_profile('u1')
+    assert first['success'] and not first.get('cached')
+    first['data']['display_name'] = 'changed'
+    
+    second = client.get_user_profile('u1')
+    assert second['cached']
+    assert second['data']['display_name'] != 'changed'
+    assert 'attempts' not in second and 'circuit_state' not in second
+
+
+def test_ttl_cache_expiry_and_invalidate():
+    cache = TTLCache(2)
+    cache.set('a:1', 1, 60)
+    cache.set('a:2', 2, -1)
+    assert cache.get('a:1') == 1
+    assert cache.get('a:2') is None
+    
+    cache.set('b:1', 3, 60)
+    cache.set('c:1', 4, 60)
+    assert cache.get('b:1') == 3
+    assert cache.get('a:1') is None  # LRU: bi day ra khi vuot maxsize
+    cache.invalidate('a:')
+    assert cache.get('a:1') is None
+    assert cache.get('c:1') == 4
+
+
+def test_single_flight_shares_one_call():
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+    
+    def func():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+    
+    flight = SingleFlight()
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('k', func)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(flight.do('k', func))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    release.set()
+    for thread in [leader] + followers:
+        thread.join(5)
+    assert results == ['value'] * 4
+    assert 1 <= len(calls) <= 4
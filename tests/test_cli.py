@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+import io
+import os
+import sys
+import json
+import subprocess
+
+import run
+from conftest import ROOT_DIR
+from zalo_token_store import TokenStore, build_token_record
+
+
+def _run_script(*argv):
+    env = dict(os.environ, PYTHONPATH=ROOT_DIR)
+    process = subprocess.run([sys.executable, os.path.join(ROOT_DIR, 'run.py')] + list(argv),
+                             capture_output=True, text=True, env=env, timeout=60)
+    return process.returncode, json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def test_token_status_without_and_with_store(tmp_path):
+    assert _run_script('token', 'status') == (1, {'success': False, 'error': 'No token in store'})
+    
+    record = build_token_record({'access_token': 'a', 'refresh_token': 'r', 'expires_in': 90000}, 'oa1')
+    TokenStore(str(tmp_path / 'zalo_token.json')).save(record)
+    code, output = _run_script('token', 'status')
+    assert code == 0
+    assert output['data']['oa_id'] == 'oa1' and output['data']['valid']
+    assert output['data']['has_refresh_token'] and not output['data']['needs_refresh']
+
+
+def test_token_status_does_not_import_network_modules():
+    code = ("import sys, run; run.run_cli(['token', 'status']); "
+            "print(json.dumps(sorted(m for m in ('requests', 'httpx', 'http.server') if m in sys.modules)))")
+    process = subprocess.run([sys.executable, '-c', 'import json; ' + code], capture_output=True, text=True,
+                             env=dict(os.environ, PYTHONPATH=ROOT_DIR), timeout=60)
+    assert json.loads(process.stdout.strip().splitlines()[-1]) == []
+
+
+def test_send_reads_message_from_stdin(monkeypatch, capsys, make_client, stub_api):
+    monkeypatch.setattr(run, 'create_cli_client', lambda args: make_client())
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('Xin chào\n'))
+    assert run.run_cli(['send', 'u1', '-']) == 0
+    assert json.loads(capsys.readouterr().out)['data']['user_id'] == 'u1'
+    assert stub_api.message_count == 1
+    
+    monkeypatch.setattr(sys, 'stdin', io.StringIO('  \n'))
+    assert run.run_cli(['send', 'u1', '-']) == 1
+    assert json.loads(capsys.readouterr().out)['error'] == 'Empty message'
+
+
+def test_followers_export_with_limit_and_resume(monkeypatch, capsys, make_client, tmp_path):
+    monkeypatch.setattr(run, 'create_cli_client', lambda args: make_client())
+    output = tmp_path / 'followers.jsonl'
+    assert run.run_cli(['followers', 'export', '--output', str(output), '--limit', '70']) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report['data'] == {'exported': 70, 'total': 120, 'next_offset': 70}
+    
+    assert run.run_cli(['followers', 'export', '--offset', '70']) == 0
+    captured = capsys.readouterr()
+    rest = [json.loads(line)['user_id'] for line in captured.out.splitlines()]
+    assert len(rest) == 50 and rest[0] == f"{70:019d}"
+    assert json.loads(captured.err)['data']['next_offset'] == 120
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from zalo_api_client import ZaloAPIError
+
+
+def _user_ids(followers):
+    return [follower['user_id'] for follower in followers]
+
+
+@pytest.mark.parametrize('prefetch', [True, False])
+def test_iterates_all_followers(make_client, stub_api, prefetch):
+    followers = list(make_client().iter_followers(page_size=50, prefetch=prefetch))
+    assert _user_ids(followers) == [f"{i:019d}" for i in range(stub_api.followers_total)]
+
+
+def test_resume_from_offset(make_client):
+    client = make_client()
+    iterator = client.iter_followers(page_size=50)
+    first = [next(iterator) for _ in range(70)]
+    assert iterator.offset == 70
+    iterator.close()
+    
+    rest = list(client.iter_followers(offset=iterator.offset, page_size=50))
+    assert _user_ids(first + rest) == _user_ids(client.iter_followers(page_size=50))
+    assert iterator.total == 120
+
+
+def test_page_error_raises(make_client, stub_api):
+    def handler(method, url, headers, params, body):
+        if '"offset": 50' in params['data']:
+            return 200, {'error': -32, 'message': 'Quota exceeded'}
+        return stub_api(method, url, headers, params, body)
+    
+    iterator = make_client(handler).iter_followers(page_size=50)
+    with pytest.raises(ZaloAPIError) as error:
+        list(iterator)
+    assert error.value.result['error_code'] == -32
+    assert iterator.offset == 50
+
+
+def test_empty_follower_list(make_client, stub_api):
+    stub_api.followers_total = 0
+    assert list(make_client().iter_followers()) == []
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+import json
+
+from zalo_follower_sync import FollowerStore
+
+
+class FollowersApi:
+    """Handler MemoryTransport tra ve danh sach followers co the thay doi giua cac lan sync"""
+    
+    def __init__(self, user_ids):
+        self.user_ids = list(user_ids)
+        self.pages = 0
+    
+    def __call__(self, method, url, headers, params, body):
+        data = json.loads(params['data'])
+        offset, count = data['offset'], data['count']
+        self.pages += 1
+        followers = [{'user_id': user_id} for user_id in self.user_ids[offset:offset + count]]
+        return 200, {'error': 0, 'message': 'Success', 'data': {'total': len(self.user_ids), 'followers': followers}}
+
+
+def _sync(store, client, **kwargs):
+    options = {'page_size': 50, 'max_quick_runs': None, 'max_age': None}
+    options.update(kwargs)
+    report = store.sync(client, **options)
+    assert report['success'], report
+    return report
+
+
+def test_full_sync_records_changes(tmp_path, make_client):
+    api = FollowersApi(f"u{i:03d}" for i in range(120))
+    client = make_client(api)
+    store = FollowerStore(str(tmp_path / 'followers.db'))
+    
+    report = _sync(store, client)
+    assert (report['status'], report['added'], report['removed']) == ('completed', 120, 0)
+    assert store.count() == 120
+    
+    api.user_ids.append('u999')
+    report = _sync(store, client)
+    assert (report['status'], report['added'], report['removed']) == ('completed', 1, 0)
+    assert [change['user_id'] for change in store.changes(report['sync_id'] - 1)] == ['u999']
+    store.close()
+
+
+def test_quick_check_forces_full_crawl_after_max_runs(tmp_path, make_client):
+    api = FollowersApi(f"u{i:03d}" for i in range(120))
+    client = make_client(api)
+    store = FollowerStore(str(tmp_path / 'followers.db'))
+    _sync(store, client)
+    
+    # Follow + unfollow ngoai trang dau: tong so va trang dau khong doi
+    api.user_ids[100] = 'u999'
+    statuses = [_sync(store, client, max_quick_runs=2)['status'] for _ in range(3)]
+    assert statuses == ['unchanged', 'unchanged', 'completed']
+    assert {change['user_id']: change['change'] for change in store.changes(1)} == {'u999': 'follow',
+                                                                                  'u100': 'unfollow'}
+    
+    pages = api.pages
+    assert _sync(store, client, max_quick_runs=2)['status'] == 'unchanged'
+    assert api.pages == pages + 1
+    store.close()
+
+
+def test_quick_check_forces_full_crawl_after_max_age(tmp_path, make_client):
+    api = FollowersApi(f"u{i:03d}" for i in range(60))
+    client = make_client(api)
+    store = FollowerStore(str(tmp_path / 'followers.db'))
+    _sync(store, client)
+    assert _sync(store, client, max_age=3600)['status'] == 'unchanged'
+    
+    store.conn.execute("UPDATE sync_runs SET finished_at = finished_at - 7200 WHERE status = 'completed'")
+    store.conn.commit()
+    assert _sync(store, client, max_age=3600)['status'] == 'completed'
+    assert _sync(store, client, max_age=3600)['status'] == 'unchanged'
+    assert _sync(store, client, quick_check=False)['status'] == 'completed'
+    store.close()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import os
+import hashlib
+
+from zalo_media import MultipartFileStream, AttachmentCache, file_digest
+
+
+def _write(path, data):
+    with open(path, 'wb') as f:
+        f.write(data)
+    return str(path)
+
+
+def test_multipart_stream_matches_length_and_rewinds(tmp_path):
+    file_path = _write(tmp_path / 'a.png', os.urandom(10000))
+    with MultipartFileStream(file_path) as body:
+        first = body.read(4096) + body.read()
+        assert len(first) == len(body)
+        assert body.boundary.encode() in first
+        assert open(file_path, 'rb').read() in first
+        
+        body.seek(0)
+        assert body.read() == first
+
+
+def test_client_does_not_open_default_cache_until_upload(make_client):
+    make_client(attachment_cache=None)
+    assert not os.path.exists('zalo_attachments.db')
+
+
+def test_upload_reuses_attachment_id(make_client, stub_api, tmp_path):
+    file_path = _write(tmp_path / 'banner.png', b'banner' * 1000)
+    client = make_client(attachment_cache=AttachmentCache(None))
+    
+    first = client.upload_image(file_path)
+    second = client.upload_image(file_path)
+    assert first['success'] and not first.get('cached')
+    assert second['cached']
+    assert second['data']['attachment_id'] == first['data']['attachment_id']
+    assert stub_api.upload_count == 1
+    
+    # File dung 'token' thay vi 'attachment_id'
+    assert 'token' in client.upload_file(file_path)['data']
+    assert stub_api.upload_count == 2
+
+
+def test_attachment_cache_persists_and_expires(tmp_path):
+    db_file = str(tmp_path / 'cache.db')
+    cache = AttachmentCache(db_file, ttl=60)
+    cache.set('oa', 'image', 'hash1', 'att-1')
+    cache.close()
+    
+    cache = AttachmentCache(db_file, ttl=60)
+    assert cache.get('oa', 'image', 'hash1') == 'att-1'
+    assert cache.get('other-oa', 'image', 'hash1') is None
+    cache.invalidate(attachment_id='att-1')
+    assert cache.get('oa', 'image', 'hash1') is None
+    
+    cache.ttl = -1
+    cache.set('oa', 'image', 'hash2', 'att-2')
+    assert cache.get('oa', 'image', 'hash2') is None
+    assert cache.purge_expired() == 1
+    cache.close()
+
+
+def test_file_digest(tmp_path):
+    data = os.urandom(200000)
+    assert file_digest(_write(tmp_path / 'f.bin', data), chunk_size=1000) == hashlib.sha256(data).hexdigest()
+
+
+def test_digest_cache_is_bounded(tmp_path):
+    cache = AttachmentCache(None, digest_cache_size=2)
+    paths = [_write(tmp_path / f"f{i}.bin", f"data {i}".encode()) for i in range(3)]
+    cache.digest(paths[0])
+    cache.digest(paths[1])
+    cache.digest(paths[0])
+    assert cache.digest(paths[2]) == hashlib.sha256(b"data 2").hexdigest()
+    
+    # Giu file dung gan nhat, bo file dung lau nhat
+    assert len(cache._digests) == 2
+    assert sorted(key[0] for key in cache._digests) == sorted(os.path.abspath(path) for path in (paths[0], paths[2]))
+    cache.close()
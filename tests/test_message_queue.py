@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+import threading
+
+from zalo_message_queue import MessageQueue, MessageQueueWorker
+
+
+def _queue(tmp_path, **kwargs):
+    return MessageQueue(str(tmp_path / 'queue.db'), **kwargs)
+
+
+def _status(queue):
+    return {status: count for status, count in queue.stats().items() if count}
+
+
+def test_enqueue_dedup_and_claim_lease(tmp_path):
+    queue = _queue(tmp_path)
+    assert queue.enqueue('u1', 'a', dedup_key='k1') is not None
+    assert queue.enqueue('u1', 'a again', dedup_key='k1') is None
+    queue.enqueue_many([('u2', 'b'), ('u3', 'c')])
+    
+    items = queue.claim(2, lease=60)
+    assert [item['user_id'] for item in items] == ['u1', 'u2']
+    # Tin dang duoc giu khong bi lay lai boi worker khac
+    assert [item['user_id'] for item in queue.claim(10, lease=60)] == ['u3']
+    assert queue.claim(10) == []
+    assert _status(queue) == {'inflight': 3}
+    queue.close()
+
+
+def test_ack_sent_retry_and_failed(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2, retry_delay=0)
+    queue.enqueue_many([('u1', 'a'), ('u2', 'b'), ('u3', 'c')])
+    first, second, third = queue.claim(10)
+    queue.ack([
+        (first, {'success': True, 'data': {'message_id': 'm1'}}),
+        (second, {'success': False, 'error': 'HTTP 503', 'status_code': 503}),
+        (third, {'success': False, 'error': 'Invalid user', 'error_code': -213}),
+    ])
+    assert _status(queue) == {'sent': 1, 'pending': 1, 'failed': 1}
+    
+    retried = queue.claim(10)
+    assert [(item['user_id'], item['attempts']) for item in retried] == [('u2', 1)]
+    queue.ack([(retried[0], {'success': False, 'error': 'HTTP 503', 'status_code': 503})])
+    assert _status(queue) == {'sent': 1, 'failed': 2}
+    
+    row = queue.conn.execute("SELECT message_id, attempts FROM messages WHERE user_id = 'u1'").fetchone()
+    assert row == ('m1', 1)
+    queue.close()
+
+
+def test_expired_lease_is_redelivered(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue('u1', 'a')
+    # Process lay tin roi chet truoc khi ack: het lease thi tin duoc lay lai
+    assert len(queue.claim(10, lease=-1)) == 1
+    redelivered = queue.claim(10, lease=60)
+    assert [item['user_id'] for item in redelivered] == ['u1']
+    
+    # Lan gui bi gian doan van duoc tinh
+    assert redelivered[0]['attempts'] == 1
+    
+    queue.release(redelivered)
+    assert _status(queue) == {'pending': 1}
+    assert queue.claim(10)[0]['attempts'] == 1
+    queue.close()
+
+
+def test_message_failed_after_repeated_expired_leases(tmp_path):
+    queue = _queue(tmp_path, max_attempts=3)
+    queue.enqueue('u1', 'a')
+    # Tin lam worker chet moi lan gui: khong duoc gui lai mai
+    for _ in range(3):
+        assert len(queue.claim(10, lease=-1)) == 1
+    assert queue.claim(10) == []
+    assert _status(queue) == {'failed': 1}
+    row = queue.conn.execute("SELECT attempts, error FROM messages").fetchone()
+    assert row == (3, 'Lease expired')
+    queue.close()
+
+
+def test_late_ack_does_not_overwrite_new_claim(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue('u1', 'a')
+    stale = queue.claim(10, lease=-1)
+    current = queue.claim(10, lease=60)
+    
+    # Worker cu ack sau khi tin da duoc lay lai: bi bo qua
+    queue.ack([(stale[0], {'success': False, 'error': 'Invalid user', 'error_code': -213})])
+    queue.release(stale)
+    assert _status(queue) == {'inflight': 1}
+    
+    queue.ack([(current[0], {'success': True, 'data': {'message_id': 'm1'}})])
+    assert _status(queue) == {'sent': 1}
+    assert queue.conn.execute("SELECT message_id, attempts FROM messages").fetchone() == ('m1', 2)
+    queue.close()
+
+
+def test_worker_drains_queue_through_client(tmp_path, make_client, stub_api):
+    queue = _queue(tmp_path)
+    queue.enqueue_many((f"u{i}", f"hello {i}") for i in range(50))
+    report = MessageQueueWorker(queue, make_client(), workers=4, claim_size=5, commit_batch=7).drain()
+    
+    assert (report['sent'], report['failed'], report['errors']) == (50, 0, 0)
+    assert report['queue']['sent'] == 50
+    assert stub_api.message_count == 50
+    queue.close()
+
+
+def test_worker_survives_claim_errors(tmp_path, make_client, stub_api):
+    queue = _queue(tmp_path)
+    queue.enqueue_many((f"u{i}", 'hi') for i in range(10))
+    claim = queue.claim
+    failures = []
+    
+    def flaky_claim(limit, lease):
+        if len(failures) < 3:
+            failures.append(1)
+            raise sqlite3.OperationalError('database is locked')
+        return claim(limit, lease)
+    
+    queue.claim = flaky_claim
+    worker = MessageQueueWorker(queue, make_client(), workers=1, error_backoff=0.01)
+    report = worker.drain()
+    assert report['errors'] == 3
+    assert report['sent'] == 10
+    queue.close()
+
+
+def test_worker_retries_failed_ack(tmp_path, make_client, stub_api):
+    queue = _queue(tmp_path)
+    queue.enqueue_many((f"u{i}", 'hi') for i in range(5))
+    ack = queue.ack
+    failures = []
+    
+    def flaky_ack(results):
+        if not failures:
+            failures.append(1)
+            raise sqlite3.OperationalError('database is locked')
+        return ack(results)
+    
+    queue.ack = flaky_ack
+    report = MessageQueueWorker(queue, make_client(), workers=2, error_backoff=0.01).drain()
+    assert report['errors'] == 1
+    assert report['queue']['sent'] == 5
+    queue.close()
+
+
+def test_stop_releases_unsent_items(tmp_path, make_client):
+    started = threading.Event()
+    release = threading.Event()
+    
+    def slow_api(method, url, headers, params, body):
+        started.set()
+        release.wait(5)
+        return 200, {'error': 0, 'message': 'Success', 'data': {'message_id': 'm'}}
+    
+    queue = _queue(tmp_path)
+    queue.enqueue_many((f"u{i}", 'hi') for i in range(5))
+    worker = MessageQueueWorker(queue, make_client(slow_api), workers=1, claim_size=5).start()
+    started.wait(5)
+    stopper = threading.Thread(target=worker.stop)
+    stopper.start()
+    while not worker._stopping.is_set():
+        stopper.join(0.01)
+    release.set()
+    stopper.join(10)
+    
+    # Tin dang gui duoc ghi la da gui, cac tin con lai tra ve pending (khong tinh la mot lan gui)
+    assert _status(queue) == {'sent': 1, 'pending': 4}
+    assert queue.claim(10)[0]['attempts'] == 0
+    queue.close()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import json
+
+import pytest
+
+from zalo_message_template import (MessageTemplate, TEXT_MESSAGE, text_message, image_message, list_message,
+                                   button_message, url_button, query_button, phone_button, encode_value)
+
+VALUES = [
+    'hello',
+    'Xin chào 👋',
+    'quote " backslash \\ slash /',
+    'new\nline\ttab\x00\x1f',
+    'lone surrogate \ud800 here',
+    '{braces} {{x}}',
+    '',
+    12345678901234567890,
+    3.5,
+    True,
+    None,
+]
+
+
+def _expected(user_id, message):
+    return {'recipient': {'user_id': user_id}, 'message': message}
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_text_message_matches_json(value):
+    assert json.loads(TEXT_MESSAGE.render('u1', text=value)) == _expected('u1', {'text': value})
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_inline_variable_matches_str_format(value):
+    template = text_message('Hi {name}, bye {name}!')
+    assert json.loads(template.render('u1', name=value)) == _expected('u1', {'text': f"Hi {value}, bye {value}!"})
+
+
+@pytest.mark.parametrize('user_id', ['1234567890123456789', 1234567890123456789, 'a"b'])
+def test_recipient_keeps_json_type(user_id):
+    assert json.loads(TEXT_MESSAGE.render(user_id, text='x'))['recipient']['user_id'] == user_id
+
+
+def test_static_text_with_surrogate_compiles():
+    template = text_message('fixed \udfff text')
+    assert json.loads(template.render('u1')) == _expected('u1', {'text': 'fixed \udfff text'})
+
+
+def test_encode_value_is_valid_json_fragment():
+    for value in VALUES:
+        assert json.loads(b'"' + encode_value(value) + b'"') == str(value)
+
+
+def test_builders_match_json():
+    buttons = [url_button('Open {name}', 'https://example.com/{code}'), query_button('Ask', '#ask'),
+               phone_button('Call', '0900000000')]
+    elements = [{'title': 'Hello {name}', 'subtitle': 'Sub', 'image_url': 'https://img/1.png',
+                 'url': 'https://example.com'}]
+    variables = {'name': 'Lan "A"', 'code': 42}
+    
+    message = json.loads(list_message(elements, buttons).render('u1', **variables))['message']
+    payload = message['attachment']['payload']
+    assert payload['template_type'] == 'list'
+    assert payload['elements'][0]['title'] == 'Hello Lan "A"'
+    assert payload['elements'][0]['default_action'] == {'type': 'oa.open.url', 'url': 'https://example.com'}
+    assert payload['buttons'][0] == {'title': 'Open Lan "A"', 'type': 'oa.open.url',
+                                     'payload': {'url': 'https://example.com/42'}}
+    
+    message = json.loads(button_message('Hi {name}', buttons[1:]).render('u1', name='B'))['message']
+    assert message['text'] == 'Hi B'
+    assert len(message['attachment']['payload']['buttons']) == 2
+    
+    message = json.loads(image_message(attachment_id='att-1', text='caption').render('u1'))['message']
+    assert message['attachment']['payload']['elements'] == [{'media_type': 'image', 'attachment_id': 'att-1'}]
+
+
+def test_invalid_templates_rejected():
+    with pytest.raises(ValueError):
+        text_message('{name!r}')
+    with pytest.raises(ValueError):
+        text_message('{0}')
+    with pytest.raises(ValueError):
+        image_message()
+    with pytest.raises(KeyError):
+        text_message('Hi {name}').render('u1')
+
+
+def test_send_message_returns_error_instead_of_raising(make_client, stub_api):
+    client = make_client()
+    result = client.send_message('u1', text_message('Hi {name}'))
+    assert not result['success']
+    assert 'name' in result['error']
+    
+    result = client.send_message('u1', text_message('{value}'), {'value': object()})
+    assert not result['success']
+    assert stub_api.message_count == 0
+
+
+def test_send_text_message_through_stub(make_client, stub_api):
+    client = make_client()
+    result = client.send_text_message('u1', 'surrogate \ud800 ok')
+    assert result['success']
+    assert result['data']['user_id'] == 'u1'
+    assert stub_api.message_count == 1
+
+
+def test_template_variables_listed():
+    template = MessageTemplate({'text': '{a} {b} {a}'})
+    assert template.variables == ['user_id', 'a', 'b']
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import urllib.request
+
+from zalo_cache import TTLCache
+from zalo_retry import RetryPolicy
+from zalo_metrics import ClientMetrics, Counter, Histogram, start_metrics_server
+
+
+def test_counter_and_histogram_render():
+    counter = Counter('calls_total', 'Calls', ('endpoint',))
+    counter.inc('/a')
+    counter.inc('/a', amount=2)
+    counter.inc('say "hi"\n')
+    assert counter.value('/a') == 3
+    assert 'calls_total{endpoint="say \\"hi\\"\\n"} 1' in counter.render()
+    
+    histogram = Histogram('latency_seconds', 'Latency', ('endpoint',), buckets=[0.1, 1.0])
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, '/a')
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{endpoint="/a",le="0.1"} 2' in lines
+    assert 'latency_seconds_bucket{endpoint="/a",le="1.0"} 3' in lines
+    assert 'latency_seconds_bucket{endpoint="/a",le="+Inf"} 4' in lines
+    assert 'latency_seconds_count{endpoint="/a"} 4' in lines
+
+
+def test_client_records_requests_retries_and_cache_hits(make_client, stub_api):
+    def handler(method, url, headers, params, body):
+        if method == 'POST' or 'getfollowers' in url:
+            return 503, {'error': -1, 'message': 'Service unavailable'}
+        return stub_api(method, url, headers, params, body)
+    
+    metrics = ClientMetrics()
+    client = make_client(handler, metrics=metrics, cache=TTLCache(10),
+                         retry_policy=RetryPolicy(max_attempts=2, base_delay=0.001))
+    client.get_oa_info()
+    client.get_oa_info()
+    client.get_followers()
+    client.send_text_message('u1', 'hi')
+    
+    assert metrics.requests.value('/oa/getoa', 200, '') == 1
+    assert metrics.cache_hits.value('/oa/getoa') == 1
+    assert metrics.requests.value('/oa/getfollowers', 503, '') == 2
+    assert metrics.retries.value('/oa/getfollowers') == 1
+    # POST khong tu gui lai sau khi da toi Zalo
+    assert metrics.requests.value('/oa/message', 503, '') == 1
+    assert metrics.retries.value('/oa/message') == 0
+    assert 'zalo_api_request_duration_seconds_count{endpoint="/oa/getfollowers"} 2' in metrics.render()
+
+
+def test_metrics_server_exports_prometheus_text():
+    metrics = ClientMetrics()
+    metrics.observe_request('/oa/getoa', 0.01, 200, None)
+    server = start_metrics_server(port=0, host='127.0.0.1', metrics=metrics)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            body = response.read().decode('utf-8')
+            assert response.headers['Content-Type'].startswith('text/plain')
+        assert 'zalo_api_requests_total{endpoint="/oa/getoa",status="200",error_code=""} 1' in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+import time
+
+import zalo_token_refresher
+from config import CIRCUIT_BREAKER_FAILURE_THRESHOLD
+from zalo_oa_registry import OARegistry
+from zalo_token_store import TokenStore
+from zalo_transport import MemoryTransport
+
+
+def _registry(tmp_path, handler):
+    return OARegistry(store=TokenStore(str(tmp_path / 'tokens.json')), session=MemoryTransport(handler))
+
+
+def test_clients_share_session_and_keep_their_tokens(tmp_path, stub_api):
+    tokens = []
+    
+    def handler(method, url, headers, params, body):
+        tokens.append(headers.get('access_token'))
+        return stub_api(method, url, headers, params, body)
+    
+    with _registry(tmp_path, handler) as registry:
+        first = registry.register('oa1', 'token-1', 'refresh-1', expires_at=time.time() + 86400)
+        second = registry.register('oa2', 'token-2', 'refresh-2', expires_at=time.time() + 86400)
+        assert registry.client('oa1') is first
+        assert first.transport is second.transport is registry.session
+        
+        assert registry.call('oa1', 'send_text_message', 'u1', 'hi')['success']
+        assert registry.call('oa2', 'send_text_message', 'u1', 'hi')['success']
+        assert tokens == ['token-1', 'token-2']
+        assert registry.call('missing', 'get_oa_info') == {'success': False, 'error': 'No token for OA missing'}
+        assert registry.token_info('oa1')['valid']
+    
+    # Registry moi doc lai token tu store
+    with _registry(tmp_path, stub_api) as registry:
+        assert sorted(registry.load_from_store()) == ['oa1', 'oa2']
+        assert registry.client('oa2').access_token == 'token-2'
+
+
+def test_register_keeps_existing_refresh_token(tmp_path, stub_api):
+    with _registry(tmp_path, stub_api) as registry:
+        registry.register('oa1', 'token-1', 'refresh-1')
+        registry.register('oa1', 'token-2')
+        assert registry.store.get('oa1')['refresh_token'] == 'refresh-1'
+        assert registry.client('oa1').access_token == 'token-2'
+
+
+def test_refresh_updates_registered_client(tmp_path, stub_api, monkeypatch):
+    monkeypatch.setattr(zalo_token_refresher, 'refresh_access_token', lambda refresh_token: {
+        'success': True, 'access_token': 'token-new', 'refresh_token': 'refresh-new', 'expires_in': 90000})
+    with _registry(tmp_path, stub_api) as registry:
+        client = registry.register('oa1', 'token-old', 'refresh-old', expires_at=time.time() + 10)
+        assert registry._refreshers['oa1'].refresh_now()['success']
+        assert client.access_token == 'token-new'
+        assert registry.store.get('oa1')['refresh_token'] == 'refresh-new'
+
+
+def test_breaker_open_for_one_oa_does_not_block_others(tmp_path, stub_api):
+    def handler(method, url, headers, params, body):
+        if headers.get('access_token') == 'token-1':
+            return 503, {'error': 'unavailable'}
+        return stub_api(method, url, headers, params, body)
+    
+    with _registry(tmp_path, handler) as registry:
+        registry.register('oa1', 'token-1', 'refresh-1', expires_at=time.time() + 86400)
+        registry.register('oa2', 'token-2', 'refresh-2', expires_at=time.time() + 86400)
+        assert registry.client('oa1').circuit_breakers is not registry.client('oa2').circuit_breakers
+        
+        for _ in range(CIRCUIT_BREAKER_FAILURE_THRESHOLD):
+            registry.call('oa1', 'send_text_message', 'u1', 'hi')
+        result = registry.call('oa1', 'send_text_message', 'u1', 'hi')
+        assert result['error'].startswith('Circuit breaker open')
+        assert registry.call('oa2', 'send_text_message', 'u1', 'hi')['success']
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+import webbrowser
+import urllib.request
+
+import zalo_oauth
+from config import OAUTH_STATE
+from zalo_transport import MemoryTransport
+from zalo_oauth import exchange_authorization_code, start_oauth_flow
+
+
+def _token_api(method, url, headers, params, body):
+    if body.get('code') == 'good-code':
+        return 200, {'access_token': 'A', 'refresh_token': 'R', 'expires_in': '90000'}
+    return 200, {'error': -14002, 'message': 'Invalid authorization code'}
+
+
+def test_exchange_authorization_code():
+    transport = MemoryTransport(_token_api)
+    result = exchange_authorization_code('good-code', session=transport)
+    assert result == {'success': True, 'access_token': 'A', 'refresh_token': 'R', 'expires_in': '90000'}
+    
+    result = exchange_authorization_code('bad-code', session=transport)
+    assert not result['success']
+    assert result['error'] == 'Invalid authorization code'
+
+
+def test_result_page_served_before_server_stops(monkeypatch):
+    servers = []
+    create_oauth_server = zalo_oauth.create_oauth_server
+    
+    def create_on_free_port(session=None):
+        server = create_oauth_server('127.0.0.1', 0, session=session)
+        servers.append(server)
+        return server
+    
+    pages = []
+    threads = []
+    
+    def browser(url):
+        # Browser that: callback tu Zalo, doi ti roi moi theo meta-refresh sang /result
+        def run():
+            base = f"http://127.0.0.1:{servers[0].server_address[1]}"
+            urllib.request.urlopen(f"{base}/?code=bad-code&oa_id=1&state={OAUTH_STATE}", timeout=5).read()
+            time.sleep(0.3)
+            pages.append(urllib.request.urlopen(f"{base}/result", timeout=5).read().decode('utf-8'))
+        threads.append(threading.Thread(target=run, daemon=True))
+        threads[0].start()
+        return True
+    
+    monkeypatch.setattr(zalo_oauth, 'create_oauth_server', create_on_free_port)
+    monkeypatch.setattr(webbrowser, 'open', browser)
+    start_oauth_flow(session=MemoryTransport(_token_api))
+    threads[0].join(5)
+    
+    assert servers[0].oauth_done.is_set()
+    assert not servers[0].oauth_result['success']
+    assert len(pages) == 1
+    assert 'Invalid authorization code' in pages[0]
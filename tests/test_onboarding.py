@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import json
+import threading
+import http.client
+
+from config import OAUTH_TOKEN_URL
+from zalo_onboarding import OnboardingService, SESSION_DONE, SESSION_FAILED, SESSION_EXPIRED
+from zalo_token_store import TokenStore
+from zalo_transport import MemoryTransport
+
+
+def _zalo(stub_api):
+    """Handler gia lap ca OAuth (doi code) va OA API: token access-good<n> thuoc OA oa<n>"""
+    def handler(method, url, headers, params, body):
+        if url == OAUTH_TOKEN_URL:
+            code = body['code']
+            if code.startswith('good'):
+                return 200, {'access_token': f"access-{code}", 'refresh_token': f"refresh-{code}",
+                             'expires_in': '90000'}
+            return 200, {'error': -14002, 'message': 'Invalid authorization code'}
+        if url.endswith('/oa/getoa'):
+            token = headers.get('access_token')
+            if token == 'access-good-revoked':
+                return 200, {'error': -216, 'message': 'Access token is invalid'}
+            oa_info = dict(stub_api.oa_info, oa_id=token.replace('access-good', 'oa'))
+            return 200, {'error': 0, 'message': 'Success', 'data': oa_info}
+        return stub_api(method, url, headers, params, body)
+    return handler
+
+
+def _service(tmp_path, stub_api, **kwargs):
+    return OnboardingService(host='127.0.0.1', port=0, store=TokenStore(str(tmp_path / 'tokens.json')),
+                             http_session=MemoryTransport(_zalo(stub_api)), **kwargs)
+
+
+def _get(service, path):
+    connection = http.client.HTTPConnection('127.0.0.1', service.server.server_address[1], timeout=10)
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        return response.status, response.read().decode('utf-8')
+    finally:
+        connection.close()
+
+
+def test_parallel_onboarding_saves_each_oa(tmp_path, stub_api):
+    with _service(tmp_path, stub_api) as service:
+        sessions = [service.new_session(f"customer-{i}") for i in range(6)]
+        threads = [threading.Thread(target=_get, args=(service, f"/?code=good{i}&oa_id=oa{i}&state={s['state']}"))
+                   for i, s in enumerate(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+        
+        for i, session in enumerate(sessions):
+            assert service.wait(session['state'], 10)['status'] == SESSION_DONE
+            status, body = _get(service, f"/result?state={session['state']}")
+            assert status == 200 and 'Stub OA' in body
+            assert f"access-good{i}" not in body
+        
+        status, body = _get(service, f"/status?state={sessions[0]['state']}")
+        assert json.loads(body)['oa_name'] == 'Stub OA'
+    
+    tokens = TokenStore(str(tmp_path / 'tokens.json')).all()
+    assert {oa_id: record['refresh_token'] for oa_id, record in tokens.items()} == {
+        f"oa{i}": f"refresh-good{i}" for i in range(6)}
+
+
+def test_failed_reused_and_unknown_links(tmp_path, stub_api):
+    with _service(tmp_path, stub_api) as service:
+        state = service.new_session()['state']
+        _get(service, f"/?code=bad&oa_id=oa1&state={state}")
+        session = service.wait(state, 10)
+        assert session['status'] == SESSION_FAILED
+        assert session['error'] == 'Invalid authorization code'
+        
+        # Link da dung cho OA khac / state la / callback lap lai
+        assert 'already been used' in _get(service, f"/?code=good&oa_id=oa2&state={state}")[1]
+        assert 'Unknown onboarding link' in _get(service, '/?code=good&oa_id=oa1&state=nope')[1]
+        assert _get(service, '/status?state=nope')[0] == 404
+        assert TokenStore(str(tmp_path / 'tokens.json')).all() == {}
+
+
+def test_expired_link_rejected(tmp_path, stub_api):
+    with _service(tmp_path, stub_api, session_ttl=-1) as service:
+        state = service.new_session()['state']
+        assert 'expired' in _get(service, f"/?code=good&oa_id=oa1&state={state}")[1]
+        assert service.get_session(state)['status'] == SESSION_EXPIRED
+
+
+def test_token_saved_under_verified_oa(tmp_path, stub_api):
+    with _service(tmp_path, stub_api) as service:
+        # Khong co oa_id tren URL / oa_id gia: van luu theo OA cua token
+        first, second = service.new_session()['state'], service.new_session()['state']
+        _get(service, f"/?code=good1&state={first}")
+        _get(service, f"/?code=good2&oa_id=oa1&state={second}")
+        assert service.wait(first, 10)['oa_id'] == 'oa1'
+        assert service.wait(second, 10)['oa_id'] == 'oa2'
+        
+        # Khong xac minh duoc OA thi session that bai va khong luu token
+        state = service.new_session()['state']
+        _get(service, f"/?code=good-revoked&oa_id=oa3&state={state}")
+        session = service.wait(state, 10)
+        assert session['status'] == SESSION_FAILED
+        assert session['error'] == 'Cannot verify OA: Access token is invalid'
+    
+    tokens = TokenStore(str(tmp_path / 'tokens.json')).all()
+    assert {oa_id: record['refresh_token'] for oa_id, record in tokens.items()} == {
+        'oa1': 'refresh-good1', 'oa2': 'refresh-good2'}
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+import time
+
+from config import RATE_LIMITS, USER_PROFILE_RATE_LIMIT
+from zalo_rate_limit import RateLimiter, endpoint_bucket
+
+
+def test_profile_bucket_uses_configured_rate():
+    assert endpoint_bucket('/oa/getprofile') == 'getprofile'
+    assert RATE_LIMITS['getprofile'] == USER_PROFILE_RATE_LIMIT
+    assert USER_PROFILE_RATE_LIMIT[0] <= RATE_LIMITS['getoa'][0]
+
+
+def test_burst_then_wait():
+    limiter = RateLimiter({'b': (100, 3)}, state_file=None)
+    assert all(limiter.reserve('b') <= 0 for _ in range(3))
+    assert limiter.reserve('b') > 0
+    assert not limiter.acquire('b', timeout=0)
+    
+    started = time.time()
+    assert limiter.acquire('b', timeout=1)
+    assert time.time() - started < 0.5
+
+
+def test_penalize_blocks_bucket():
+    limiter = RateLimiter({'b': (100, 10)}, state_file=None, cooldown=0.2)
+    limiter.penalize('b')
+    assert not limiter.acquire('b', timeout=0.05)
+    assert limiter.acquire('b', timeout=1)
+
+
+def test_shared_state_file(tmp_path):
+    state_file = str(tmp_path / 'rate.json')
+    first = RateLimiter({'b': (0.001, 2)}, state_file=state_file)
+    second = RateLimiter({'b': (0.001, 2)}, state_file=state_file)
+    assert first.reserve('b') <= 0
+    assert second.reserve('b') <= 0
+    assert first.reserve('b') > 0
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import json
+import random
+
+import pytest
+
+from config import OA_API_BASE_URL, QUOTA_ERROR_CODES
+from replay import Cassette, FaultProfile, ReplayServer, record_session, parse_latency, _redact
+from stub_server import StubOAServer, API_PREFIX
+from zalo_transport import create_session
+
+
+def _record(tmp_path, make_client):
+    cassette = Cassette(str(tmp_path / 'zalo.cassette'))
+    session = record_session(create_session(), cassette)
+    with StubOAServer(followers_total=30) as server:
+        client = make_client(transport=session, base_url=server.base_url)
+        recorded = [client.get_oa_info(), client.send_text_message('u1', 'hi')]
+    session.close()
+    return cassette, recorded
+
+
+def test_record_and_replay(tmp_path, make_client):
+    cassette, recorded = _record(tmp_path, make_client)
+    assert [entry['path'] for entry in cassette.entries] == [f"{API_PREFIX}/oa/getoa", f"{API_PREFIX}/oa/message"]
+    assert len(Cassette(cassette.file_path).entries) == 2
+    
+    session = create_session()
+    try:
+        with ReplayServer(Cassette(cassette.file_path)) as server:
+            client = make_client(transport=session, base_url=server.url_for(OA_API_BASE_URL))
+            assert client.get_oa_info()['data'] == recorded[0]['data']
+            assert client.send_text_message('u2', 'hi')['data'] == recorded[1]['data']
+            assert client.get_followers()['status_code'] == 404
+            assert server.stats == {'replayed': 2, 'missing': 1}
+    finally:
+        session.close()
+
+
+def test_injected_faults(tmp_path, make_client):
+    cassette, _ = _record(tmp_path, make_client)
+    session = create_session()
+    try:
+        with ReplayServer(cassette, FaultProfile(quota_rate=1.0)) as server:
+            client = make_client(transport=session, base_url=server.url_for(OA_API_BASE_URL))
+            assert client.get_oa_info()['error_code'] == QUOTA_ERROR_CODES[0]
+        
+        with ReplayServer(cassette, FaultProfile(burst_rate=1.0, burst_length=2)) as server:
+            client = make_client(transport=session, base_url=server.url_for(OA_API_BASE_URL))
+            assert client.get_oa_info()['status_code'] == 503
+        
+        with ReplayServer(cassette, FaultProfile(drop_rate=1.0)) as server:
+            client = make_client(transport=session, base_url=server.url_for(OA_API_BASE_URL))
+            assert 'exception' in client.get_oa_info()
+    finally:
+        session.close()
+
+
+def test_fault_sequence_is_reproducible_with_seed():
+    def sequence():
+        faults = FaultProfile(latency='uniform:0.01,0.02', quota_rate=0.2, burst_rate=0.1, drop_rate=0.1, seed=7)
+        return [faults.decide(None) for _ in range(200)]
+    
+    assert sequence() == sequence()
+    assert {fault for fault, _ in sequence()} == {None, 'quota', 'burst', 'drop'}
+
+
+def test_parse_latency_and_redact():
+    rng = random.Random(1)
+    assert parse_latency('fixed:0.05')(rng, None) == 0.05
+    assert 0.01 <= parse_latency('uniform:0.01,0.2')(rng, None) <= 0.2
+    assert parse_latency('recorded:2')(rng, {'elapsed': 0.1}) == 0.2
+    assert parse_latency('') is None
+    with pytest.raises(ValueError):
+        parse_latency('pareto:1')
+    
+    body = {'access_token': 'secret', 'data': [{'refresh_token': 'secret', 'name': 'x'}]}
+    assert 'secret' not in json.dumps(_redact(body))
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import time
+
+import requests
+
+from config import HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+from zalo_transport import MemoryTransport
+from zalo_retry import (CircuitBreaker, CircuitBreakerRegistry, RetryPolicy, Deadline,
+                        CIRCUIT_CLOSED, CIRCUIT_OPEN, CIRCUIT_HALF_OPEN)
+from zalo_rate_limit import RateLimiter
+
+
+class FlakyApi:
+    """Handler tra 503 khi failing = True"""
+    
+    def __init__(self):
+        self.failing = True
+        self.calls = 0
+    
+    def __call__(self, method, url, headers, params, body):
+        self.calls += 1
+        if self.failing:
+            return 503, {'error': -1, 'message': 'Service unavailable'}
+        return 200, {'error': 0, 'message': 'Success', 'data': {'message_id': 'm1'}}
+
+
+def test_breaker_opens_and_allows_single_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_CLOSED
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+    assert not breaker.allow()
+    
+    time.sleep(0.06)
+    assert breaker.state == CIRCUIT_HALF_OPEN
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CIRCUIT_CLOSED
+
+
+def test_breaker_failed_trial_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CIRCUIT_OPEN
+
+
+def test_breaker_release_returns_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def _open_breaker(client, api):
+    for _ in range(2):
+        client.send_text_message('u1', 'hello')
+    assert client.circuit_breakers.get('/oa/message').state == CIRCUIT_OPEN
+    assert client.send_text_message('u1', 'hello')['error'].startswith('Circuit breaker open')
+    api.failing = False
+    time.sleep(0.06)
+
+
+def test_half_open_trial_released_when_rate_limit_deadline_expires(make_client):
+    api = FlakyApi()
+    limiter = RateLimiter({'message': (1, 1)}, state_file=None)
+    client = make_client(api, circuit_breakers=CircuitBreakerRegistry(2, 0.05), rate_limiter=limiter)
+    _open_breaker(client, api)
+    
+    # Bucket da het token: tra ve truoc khi gui, khong duoc giu luot thu cua breaker
+    result = client.send_text_message('u1', 'hello', deadline=Deadline(0.01))
+    assert result['error'] == 'Deadline exceeded'
+    assert result['attempts'] == 0
+    
+    time.sleep(1.0)
+    result = client.send_text_message('u1', 'hello')
+    assert result['success']
+    assert result['circuit_state'] == CIRCUIT_CLOSED
+
+
+def test_half_open_trial_released_when_deadline_expired(make_client):
+    api = FlakyApi()
+    client = make_client(api, circuit_breakers=CircuitBreakerRegistry(2, 0.05))
+    _open_breaker(client, api)
+    
+    calls = api.calls
+    assert client.send_text_message('u1', 'hello', deadline=Deadline(0))['error'] == 'Deadline exceeded'
+    assert api.calls == calls
+    assert client.send_text_message('u1', 'hello')['success']
+
+
+def test_transient_errors_are_retried(make_client):
+    api = FlakyApi()
+    client = make_client(api, retry_policy=RetryPolicy(max_attempts=3, base_delay=0.001))
+    result = client.get_oa_info()
+    assert not result['success']
+    assert result['attempts'] == 3
+    
+    api.failing = False
+    assert client.get_oa_info()['attempts'] == 1
+
+
+def test_retry_policy_delay_is_capped():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=2.0)
+    assert all(0 <= policy.delay(attempt) <= 2.0 for attempt in range(1, 10))
+
+
+class RecordingTransport(MemoryTransport):
+    """MemoryTransport ghi lai timeout cua moi request"""
+    
+    def __init__(self, handler):
+        super().__init__(handler)
+        self.timeouts = []
+    
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        self.timeouts.append(timeout)
+        return super().request(method, url, headers=headers, params=params, data=data, timeout=timeout)
+
+
+def test_deadline_caps_request_timeout(make_client, stub_api):
+    transport = RecordingTransport(stub_api)
+    client = make_client(transport=transport)
+    assert client.get_oa_info()['success']
+    assert client.get_oa_info(deadline=Deadline(2))['success']
+    
+    assert transport.timeouts[0] == (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+    connect_timeout, read_timeout = transport.timeouts[1]
+    assert connect_timeout <= min(HTTP_CONNECT_TIMEOUT, 2) and read_timeout <= 2
+
+
+def test_no_retry_when_backoff_exceeds_deadline(make_client):
+    api = FlakyApi()
+    policy = RetryPolicy(max_attempts=5)
+    policy.delay = lambda attempt: 10.0
+    client = make_client(api, retry_policy=policy)
+    started = time.monotonic()
+    result = client.get_oa_info(deadline=Deadline(0.5))
+    assert result['attempts'] == 1
+    assert time.monotonic() - started < 0.5
+
+
+def test_transport_exception_becomes_error_result(make_client):
+    def handler(method, url, headers, params, body):
+        raise requests.exceptions.ConnectionError('connection reset')
+    
+    result = make_client(handler, retry_policy=RetryPolicy(max_attempts=2, base_delay=0.001)).get_oa_info()
+    assert not result['success']
+    assert result['exception'] == 'ConnectionError'
+    assert result['attempts'] == 2
+
+
+def test_deadline_remaining_and_timeout():
+    deadline = Deadline(0.05)
+    assert not deadline.expired()
+    assert deadline.timeout(5, 30)[1] <= 0.05
+    time.sleep(0.06)
+    assert deadline.expired()
+    assert deadline.remaining() == 0.0
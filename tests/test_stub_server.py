@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import time
+import threading
+import urllib.request
+
+from stub_server import StubOAServer
+
+
+def test_stub_server_accepts_burst_of_new_connections():
+    latencies = []
+    with StubOAServer(latency=0.05) as server:
+        url = f"{server.base_url}/oa/getoa"
+        
+        def fetch():
+            started = time.perf_counter()
+            urllib.request.urlopen(url, timeout=10).read()
+            latencies.append(time.perf_counter() - started)
+        
+        threads = [threading.Thread(target=fetch) for _ in range(64)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+    
+    assert len(latencies) == 64
+    # Tran backlog se lam mot so ket noi cho SYN gui lai (>= 1s)
+    assert max(latencies) < 0.9
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+import time
+
+import run
+import zalo_token_store
+import zalo_token_refresher
+from zalo_token_store import TokenStore, build_token_record
+from zalo_token_refresher import TokenRefresher
+
+
+def _record(oa_id, access_token='access', refresh_token='refresh', expires_in=3600):
+    return build_token_record({'access_token': access_token, 'refresh_token': refresh_token,
+                               'expires_in': expires_in}, oa_id)
+
+
+def test_refresher_saves_while_holding_store_lock(tmp_path, monkeypatch):
+    file_path = str(tmp_path / 'tokens.json')
+    store = TokenStore(file_path)
+    store.save(_record('oa1', access_token='old', refresh_token='r1', expires_in=10))
+    monkeypatch.setattr(zalo_token_refresher, 'refresh_access_token', lambda refresh_token: {
+        'success': True, 'access_token': 'new', 'refresh_token': 'r2', 'expires_in': 3600})
+    
+    refresher = TokenRefresher(store=store, oa_id='oa1')
+    result = refresher.refresh_now()
+    assert result['success']
+    
+    record = TokenStore(file_path).get('oa1')
+    assert record['access_token'] == 'new'
+    assert record['refresh_token'] == 'r2'
+    assert record['expires_at'] > time.time() + 3000
+
+
+def _refresh_must_not_run(refresh_token):
+    raise AssertionError('refresh_token already rotated by another process')
+
+
+def test_refresh_without_force_keeps_token_rotated_elsewhere(tmp_path, monkeypatch):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    store.save(_record('oa1', access_token='rotated', refresh_token='r2', expires_in=90000))
+    monkeypatch.setattr(zalo_token_refresher, 'refresh_access_token', _refresh_must_not_run)
+    
+    result = TokenRefresher(store=store, oa_id='oa1').refresh_now(force=False)
+    assert result['success']
+    assert result['record']['access_token'] == 'rotated'
+
+
+def test_check_token_does_not_refresh_again_after_rotation(tmp_path, monkeypatch):
+    store = TokenStore(str(tmp_path / 'tokens.json'))
+    stale = _record('oa1', access_token='old', refresh_token='r1', expires_in=10)
+    stale['verified'] = True
+    store.save(stale)
+    monkeypatch.setattr(zalo_token_store, '_default_store', store)
+    monkeypatch.setattr(zalo_token_refresher, 'refresh_access_token', _refresh_must_not_run)
+    
+    # Process khac refresh xong ngay sau khi check_token doc token cu
+    rotated = _record('oa1', access_token='rotated', refresh_token='r2', expires_in=90000)
+    rotated['verified'] = True
+    reads = []
+    
+    def get(oa_id=None):
+        reads.append(oa_id)
+        if len(reads) == 1:
+            return dict(stale)
+        return rotated
+    
+    monkeypatch.setattr(store, 'get', get)
+    manager = run.ZaloOAManager()
+    assert manager.check_token()
+    assert manager.access_token == 'rotated'
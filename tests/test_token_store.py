@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import json
+import time
+import threading
+import multiprocessing
+
+from zalo_token_store import TokenStore, build_token_record
+
+
+def _record(oa_id, access_token='access', refresh_token='refresh', expires_in=3600):
+    return build_token_record({'access_token': access_token, 'refresh_token': refresh_token,
+                               'expires_in': expires_in}, oa_id)
+
+
+def _save_many(file_path, prefix, count):
+    store = TokenStore(file_path)
+    for i in range(count):
+        store.save(_record(f"{prefix}-{i}"), make_current=False)
+
+
+def test_save_and_reload(tmp_path):
+    file_path = str(tmp_path / 'tokens.json')
+    store = TokenStore(file_path)
+    store.save(_record('oa1'))
+    store.save(_record('oa2'), make_current=False)
+    
+    other = TokenStore(file_path)
+    assert other.get()['oa_id'] == 'oa1'
+    assert other.get('oa2')['access_token'] == 'access'
+    assert set(other.all()) == {'oa1', 'oa2'}
+
+
+def test_save_does_not_overwrite_other_instance_writes(tmp_path):
+    file_path = str(tmp_path / 'tokens.json')
+    first = TokenStore(file_path)
+    second = TokenStore(file_path)
+    first.load()
+    second.load()
+    
+    first.save(_record('oa1'))
+    second.save(_record('oa2'))
+    assert set(TokenStore(file_path).all()) == {'oa1', 'oa2'}
+
+
+def test_concurrent_save_from_threads_and_processes(tmp_path):
+    file_path = str(tmp_path / 'tokens.json')
+    workers = [threading.Thread(target=_save_many, args=(file_path, f"t{n}", 20)) for n in range(4)]
+    context = multiprocessing.get_context('spawn')
+    processes = [context.Process(target=_save_many, args=(file_path, f"p{n}", 20)) for n in range(2)]
+    for worker in workers + processes:
+        worker.start()
+    for worker in workers + processes:
+        worker.join(60)
+    assert all(process.exitcode == 0 for process in processes)
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        tokens = json.load(f)['tokens']
+    assert len(tokens) == 6 * 20
+
+
+def test_is_valid():
+    assert TokenStore.is_valid(_record('oa1', expires_in=100))
+    assert not TokenStore.is_valid(_record('oa1', expires_in=100), margin=200)
+    assert not TokenStore.is_valid(None)
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from stub_server import StubOAServer
+from zalo_transport import create_transport, MemoryTransport
+
+
+@pytest.fixture(scope='module')
+def stub_server():
+    with StubOAServer(followers_total=60) as server:
+        yield server
+
+
+def _transport(kind):
+    if kind == 'http2':
+        pytest.importorskip('httpx')
+        pytest.importorskip('h2')
+    return create_transport(kind, pool_maxsize=4)
+
+
+@pytest.mark.parametrize('kind', ['http1', 'http2'])
+def test_client_over_http_transports(kind, stub_server, make_client, tmp_path):
+    transport = _transport(kind)
+    try:
+        client = make_client(transport=transport, base_url=stub_server.base_url)
+        assert client.warmup()
+        assert client.get_oa_info()['data']['name'] == 'Stub OA'
+        
+        result = client.send_text_message('u1', 'Xin chào "bạn"')
+        assert result['success'] and result['data']['user_id'] == 'u1'
+        
+        file_path = tmp_path / 'image.png'
+        file_path.write_bytes(b'\x89PNG' + b'x' * 100000)
+        assert 'attachment_id' in client.upload_image(str(file_path))['data']
+        assert len(list(client.iter_followers())) == 60
+    finally:
+        transport.close()
+
+
+def test_http_error_status_becomes_result(stub_server, make_client):
+    transport = _transport('http1')
+    try:
+        result = make_client(transport=transport, base_url=stub_server.base_url)._request('GET', '/oa/unknown')
+        assert not result['success']
+        assert result['status_code'] == 404
+    finally:
+        transport.close()
+
+
+def test_memory_transport_encodes_payloads():
+    transport = MemoryTransport(lambda method, url, headers, params, body: (200, body.decode('utf-8')))
+    response = transport.request('POST', 'http://x/y', data='{"a": "ă"}')
+    assert response.status_code == 200
+    assert response.json() == {'a': 'ă'}
+    assert transport.request_count == 1
+    
+    with pytest.raises(ValueError):
+        create_transport('http3')
+
+
+class CountingStubServer(StubOAServer):
+    """Stub server dem so ket noi TCP da nhan"""
+    
+    connections = 0
+    
+    def get_request(self):
+        self.connections += 1
+        return super().get_request()
+
+
+@pytest.mark.parametrize('keep_alive, expected', [(True, 1), (False, 10)])
+def test_http1_session_reuses_connections(make_client, keep_alive, expected):
+    transport = create_transport('http1', pool_maxsize=4, keep_alive=keep_alive)
+    try:
+        with CountingStubServer() as server:
+            client = make_client(transport=transport, base_url=server.base_url)
+            for i in range(10):
+                assert client.send_text_message(f"u{i}", 'hi')['success']
+            assert server.connections == expected
+    finally:
+        transport.close()
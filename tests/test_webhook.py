@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+import json
+import socket
+import threading
+import http.client
+
+from zalo_webhook import WebhookReceiver, compute_signature, verify_signature, SIGNATURE_HEADER
+
+APP_ID = 'app-1'
+SECRET = 'secret-key'
+
+
+def _event(user_id, text='hi', timestamp='1700000000000'):
+    return {'app_id': APP_ID, 'event_name': 'user_send_text', 'timestamp': timestamp,
+            'sender': {'id': user_id}, 'message': {'text': text}}
+
+
+def _signed(event):
+    body = json.dumps(event).encode('utf-8')
+    return body, 'mac=' + compute_signature(body, event['timestamp'], APP_ID, SECRET)
+
+
+def _receiver(**kwargs):
+    options = {'host': '127.0.0.1', 'port': 0, 'secret_key': SECRET, 'app_id': APP_ID, 'workers': 2,
+               'batch_interval': 0.01}
+    options.update(kwargs)
+    return WebhookReceiver(**options)
+
+
+def _post(connection, body, signature, path='/webhook'):
+    connection.request('POST', path, body=body, headers={SIGNATURE_HEADER: signature,
+                                                         'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def test_verify_signature():
+    body, signature = _signed(_event('u1'))
+    event = json.loads(body)
+    assert verify_signature(body, event, signature, APP_ID, SECRET)
+    assert verify_signature(body, event, signature[4:].upper(), APP_ID, SECRET)
+    assert verify_signature(body, event, signature, '', SECRET)
+    assert not verify_signature(body, event, signature, APP_ID, 'other-secret')
+    assert not verify_signature(body + b' ', event, signature, APP_ID, SECRET)
+    assert not verify_signature(body, event, None, APP_ID, SECRET)
+    assert not verify_signature(body, event, 'mac=é' + signature[5:], APP_ID, SECRET)
+
+
+def test_receive_status_codes():
+    receiver = _receiver()
+    try:
+        body, signature = _signed(_event('u1'))
+        assert receiver.receive(body, signature)[0] == 200
+        assert receiver.receive(body, 'mac=' + '0' * 64)[0] == 401
+        assert receiver.receive(b'not json', signature)[0] == 400
+        assert receiver.receive(b'[1, 2]', signature)[0] == 400
+        stats = receiver.stats()
+        assert (stats['accepted'], stats['unauthorized'], stats['invalid']) == (1, 1, 2)
+    finally:
+        receiver.server.server_close()
+
+
+def test_verify_requires_secret():
+    try:
+        WebhookReceiver(host='127.0.0.1', port=0, secret_key='', verify=True)
+    except ValueError:
+        return
+    raise AssertionError("ValueError expected")
+
+
+def test_backpressure_returns_503_when_queue_full():
+    receiver = _receiver(workers=1, queue_size=2, enqueue_timeout=0.01)
+    try:
+        body, signature = _signed(_event('u1'))
+        statuses = [receiver.receive(body, signature)[0] for _ in range(3)]
+        assert statuses == [200, 200, 503]
+        assert receiver.stats()['busy'] == 1
+    finally:
+        receiver.server.server_close()
+
+
+def test_events_processed_in_order_per_user():
+    received = []
+    with _receiver(batch_size=10) as receiver:
+        receiver.add_handler(received.extend)
+        connection = http.client.HTTPConnection('127.0.0.1', receiver.server.server_address[1])
+        for i in range(50):
+            body, signature = _signed(_event(f"u{i % 3}", text=str(i)))
+            assert _post(connection, body, signature) == 200
+        connection.close()
+    
+    assert len(received) == 50
+    for user in ('u0', 'u1', 'u2'):
+        texts = [int(event['message']['text']) for event in received if event['sender']['id'] == user]
+        assert texts == sorted(texts)
+
+
+def test_handler_filter_by_event_name():
+    texts = []
+    with _receiver() as receiver:
+        @receiver.on('user_send_text')
+        def on_text(events):
+            texts.extend(events)
+        
+        follow = dict(_event('u1'), event_name='follow', follower={'id': 'u1'})
+        for event in (_event('u1'), follow):
+            assert receiver.receive(*_signed(event))[0] == 200
+    assert [event['event_name'] for event in texts] == ['user_send_text']
+
+
+def test_close_rejects_keep_alive_requests_and_drains():
+    received = []
+    receiver = _receiver().start()
+    receiver.add_handler(received.extend)
+    connection = http.client.HTTPConnection('127.0.0.1', receiver.server.server_address[1])
+    body, signature = _signed(_event('u1'))
+    assert _post(connection, body, signature) == 200
+    
+    receiver.close()
+    # Ket noi keep-alive van con handler thread: event sau khi dong phai bi tu choi, khong mat
+    assert _post(connection, body, signature) == 503
+    connection.close()
+    assert len(received) == 1
+    assert receiver.stats()['processed'] == 1
+
+
+def test_close_waits_for_in_flight_receive():
+    release = threading.Event()
+    receiver = _receiver(workers=1, queue_size=1, enqueue_timeout=5).start()
+    processed = []
+    
+    def slow(events):
+        release.wait(5)
+        processed.extend(events)
+    
+    receiver.add_handler(slow)
+    results = []
+    senders = [threading.Thread(target=lambda i=i: results.append(receiver.receive(*_signed(_event('u1', str(i))))))
+               for i in range(3)]
+    for sender in senders:
+        sender.start()
+    
+    closer = threading.Thread(target=receiver.close)
+    closer.start()
+    closer.join(0.2)
+    assert closer.is_alive()
+    release.set()
+    closer.join(10)
+    for sender in senders:
+        sender.join(10)
+    
+    accepted = sum(1 for status, _ in results if status == 200)
+    assert len(processed) == accepted
+
+
+def test_invalid_content_length_rejected():
+    with _receiver() as receiver:
+        cases = (('-1', b'400'), ('abc', b'400'), (str(receiver.max_body_size + 1), b'413'))
+        for value, expected in cases:
+            with socket.create_connection(receiver.server.server_address[:2], timeout=5) as sock:
+                sock.sendall(f"POST /webhook HTTP/1.1\r\nHost: x\r\nContent-Length: {value}\r\n\r\n".encode())
+                assert sock.recv(1024).split(b'\r\n')[0].split(b' ')[1] == expected
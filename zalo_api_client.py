@@ -4,98 +4,273 @@ Zalo OA API Client
 Su dung access token de goi cac Zalo OA API
 """
 
-import requests
+import os
+import copy
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from config import *
+from zalo_rate_limit import get_default_rate_limiter, endpoint_bucket, is_quota_error
+from zalo_cache import get_default_response_cache, get_default_profile_cache, token_fingerprint, SingleFlight
+from zalo_token_store import get_default_token_store
+from zalo_retry import RetryPolicy, get_default_circuit_breakers, is_transient_error, is_retry_safe
+from zalo_metrics import get_default_metrics
+from zalo_message_template import TEXT_MESSAGE
+from zalo_media import MultipartFileStream, get_default_attachment_cache
+from zalo_transport import create_session, create_transport
 
 
 class ZaloOAClient:
     """Client de goi Zalo OA APIs"""
     
-    def __init__(self, access_token):
+    def __init__(self, access_token, session=None,
+                 pool_connections=OA_API_POOL_CONNECTIONS,
+                 pool_maxsize=OA_API_POOL_MAXSIZE,
+                 keep_alive=OA_API_KEEP_ALIVE,
+                 warmup=OA_API_WARMUP,
+                 rate_limiter=None,
+                 cache=None,
+                 profile_cache=None,
+                 attachment_cache=None,
+                 retry_policy=None,
+                 circuit_breakers=None,
+                 metrics=None,
+                 base_url=OA_API_BASE_URL,
+                 transport=None):
         """
         Khoi tao client voi access token
         
         Args:
             access_token (str): Access token da lay duoc
+            session (requests.Session): Session/transport dung chung (neu None se tu tao)
+            pool_connections (int): So host duoc giu pool
+            pool_maxsize (int): So ket noi toi da moi host
+            keep_alive (bool): Giu ket noi song giua cac request
+            warmup (bool): Mo san ket noi den OA API khi khoi tao
+            rate_limiter (RateLimiter): Rate limiter (None = dung chung trong process, False = tat)
+            cache (TTLCache): Cache cho API chi doc (None = dung chung trong process, False = tat)
+            profile_cache (TTLCache): Cache profile user (None = dung chung trong process, False = tat)
+            attachment_cache (AttachmentCache): Cache attachment_id da upload (None = dung chung, False = tat)
+            retry_policy (RetryPolicy): Chinh sach thu lai (mac dinh tu config)
+            circuit_breakers (CircuitBreakerRegistry): Breaker theo endpoint (None = dung chung, False = tat)
+            metrics (ClientMetrics): Noi ghi metrics (None = dung chung trong process, False = tat)
+            base_url (str): URL goc cua OA API (vd server gia lap khi benchmark)
+            transport (Transport): Lop gui HTTP, vd HTTP2Transport hoac MemoryTransport
+                                   (None = dung session, hoac tao theo HTTP_TRANSPORT)
         """
         self.access_token = access_token
         self.headers = {
             'access_token': access_token,
             'Content-Type': 'application/json'
         }
+        self._token_key = token_fingerprint(access_token)
+        self.base_url = base_url
+        
+        # Transport chi bi dong boi client neu client tu tao ra no
+        self._owns_transport = transport is None and session is None
+        self.transport = transport or session or create_transport(HTTP_TRANSPORT, pool_connections,
+                                                                  pool_maxsize, keep_alive)
+        self.rate_limiter = get_default_rate_limiter() if rate_limiter is None else (rate_limiter or None)
+        self.cache = get_default_response_cache() if cache is None else (cache or None)
+        self.profile_cache = get_default_profile_cache() if profile_cache is None else (profile_cache or None)
+        self._profile_calls = SingleFlight()
+        # Cache mac dinh (file SQLite) chi duoc mo o lan upload dau tien
+        self._attachment_cache = attachment_cache
+        self._upload_calls = SingleFlight()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breakers = get_default_circuit_breakers() if circuit_breakers is None else (circuit_breakers or None)
+        self.metrics = get_default_metrics() if metrics is None else (metrics or None)
+        
+        if warmup:
+            self.warmup()
+    
+    def warmup(self):
+        """
+        Mo san ket noi TCP/TLS den OA API de request dau tien khong phai cho handshake
+        
+        Returns:
+            bool: True neu ket noi thanh cong
+        """
+        try:
+            self.transport.request('HEAD', self.base_url, timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+            return True
+        except Exception:
+            return False
+    
+    @property
+    def attachment_cache(self):
+        """Cache attachment_id da upload (None neu tat)"""
+        if self._attachment_cache is None:
+            self._attachment_cache = get_default_attachment_cache() or False
+        return self._attachment_cache or None
     
-    def get_oa_info(self):
+    def set_access_token(self, access_token):
+        """
+        Doi access token cua client, xoa cache cua token cu
+        
+        Args:
+            access_token (str): Access token moi
+        """
+        old_key = self._token_key
+        self.access_token = access_token
+        self.headers = {
+            'access_token': access_token,
+            'Content-Type': 'application/json'
+        }
+        self._token_key = token_fingerprint(access_token)
+        
+        if old_key != self._token_key:
+            for cache in (self.cache, self.profile_cache):
+                if cache:
+                    cache.invalidate(old_key)
+    
+    def invalidate_cache(self):
+        """Xoa cac ket qua da cache cua token hien tai"""
+        for cache in (self.cache, self.profile_cache):
+            if cache:
+                cache.invalidate(self._token_key)
+    
+    def close(self):
+        """Dong cac ket noi trong pool (neu transport do client tao ra)"""
+        if self._owns_transport and self.transport is not None:
+            self.transport.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+    
+    def get_oa_info(self, deadline=None):
         """
         Lay thong tin Official Account
         
+        Args:
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
         Returns:
             dict: Thong tin OA hoac error
         """
-        url = f"{OA_API_BASE_URL}/oa/getoa"
-        
-        try:
-            response = requests.get(url, headers={'access_token': self.access_token})
-            return self._handle_response(response)
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return self._request('GET', '/oa/getoa', deadline=deadline)
     
-    def get_oa_profile(self):
+    def get_oa_profile(self, deadline=None):
         """
         Lay profile cua OA
         
+        Args:
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
         Returns:
             dict: Profile OA hoac error
         """
-        url = f"{OA_API_BASE_URL}/oa/getprofile"
-        
-        try:
-            response = requests.get(url, headers={'access_token': self.access_token})
-            return self._handle_response(response)
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return self._request('GET', '/oa/getprofile', deadline=deadline)
     
-    def send_text_message(self, user_id, message):
+    def send_text_message(self, user_id, message, deadline=None):
         """
         Gui tin nhan text den user
         
         Args:
             user_id (str): ID cua user nhan tin nhan
             message (str): Noi dung tin nhan
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
             
         Returns:
             dict: Ket qua gui tin nhan
         """
-        url = f"{OA_API_BASE_URL}/oa/message"
-        
-        data = {
-            "recipient": {
-                "user_id": user_id
-            },
-            "message": {
-                "text": message
-            }
-        }
+        return self.send_message(user_id, TEXT_MESSAGE, {'text': message}, deadline)
+    
+    def send_message(self, user_id, template, variables=None, deadline=None):
+        """
+        Gui tin nhan tu template da compile (text, anh, list, button)
         
+        Args:
+            user_id (str): ID cua user nhan tin nhan
+            template (MessageTemplate): Template tu zalo_message_template
+            variables (dict): Gia tri cac bien {ten_bien} cua user nay
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
+        Returns:
+            dict: Ket qua gui tin nhan
+        """
         try:
-            response = requests.post(url, headers=self.headers, data=json.dumps(data))
-            return self._handle_response(response)
+            body = template.render(user_id, **(variables or {}))
         except Exception as e:
-            return {'success': False, 'error': str(e)}
+            return {'success': False, 'error': f"Template error: {type(e).__name__}: {str(e)}"}
+        return self._request('POST', '/oa/message', headers=self.headers, data=body, deadline=deadline)
     
-    def get_followers(self, offset=0, count=10):
+    def upload_image(self, file_path, deadline=None):
+        """
+        Upload anh (jpg/png) de gui bang image_message(attachment_id=...)
+        
+        Args:
+            file_path (str): Duong dan file anh
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
+        Returns:
+            dict: Ket qua, data['attachment_id'] la ID de gui ('cached': True neu khong phai upload lai)
+        """
+        return self._upload('/oa/upload/image', 'image', 'attachment_id', file_path, deadline)
+    
+    def upload_file(self, file_path, deadline=None):
+        """
+        Upload file (pdf/doc/docx) de gui kem tin nhan
+        
+        Args:
+            file_path (str): Duong dan file
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
+        Returns:
+            dict: Ket qua, data['token'] la ID de gui file ('cached': True neu khong phai upload lai)
+        """
+        return self._upload('/oa/upload/file', 'file', 'token', file_path, deadline)
+    
+    def _upload(self, path, kind, id_field, file_path, deadline):
+        # File doc dan tu dia; cung noi dung (sha256) da upload thi dung lai attachment_id con han
+        attachment_cache = self.attachment_cache
+        if not attachment_cache:
+            return self._post_file(path, file_path, deadline)
+        
+        content_hash = attachment_cache.digest(file_path)
+        
+        def lookup():
+            attachment_id = attachment_cache.get(self._token_key, kind, content_hash)
+            if attachment_id:
+                return {'success': True, 'data': {id_field: attachment_id}, 'cached': True}
+            return None
+        
+        def upload():
+            # Kiem tra lai: thread khac co the vua upload xong
+            result = lookup()
+            if result:
+                return result
+            result = self._post_file(path, file_path, deadline)
+            data = result.get('data') if result['success'] else None
+            attachment_id = data.get(id_field) if isinstance(data, dict) else None
+            if attachment_id:
+                attachment_cache.set(self._token_key, kind, content_hash, attachment_id,
+                                     os.path.basename(file_path), os.path.getsize(file_path))
+            return result
+        
+        return lookup() or self._upload_calls.do(f"{kind}:{content_hash}", upload)
+    
+    def _post_file(self, path, file_path, deadline):
+        with MultipartFileStream(file_path) as body:
+            headers = {'access_token': self.access_token, 'Content-Type': body.content_type}
+            return self._request('POST', path, headers=headers, data=body, deadline=deadline)
+    
+    def get_followers(self, offset=0, count=10, deadline=None):
         """
         Lay danh sach followers
         
         Args:
             offset (int): Vi tri bat dau
             count (int): So luong can lay
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
             
         Returns:
             dict: Danh sach followers hoac error
         """
-        url = f"{OA_API_BASE_URL}/oa/getfollowers"
-        
         params = {
             'data': json.dumps({
                 'offset': offset,
@@ -103,61 +278,401 @@ class ZaloOAClient:
             })
         }
         
-        try:
-            response = requests.get(url, headers={'access_token': self.access_token}, params=params)
-            return self._handle_response(response)
-        except Exception as e:
-            return {'success': False, 'error': str(e)}
+        return self._request('GET', '/oa/getfollowers', params=params, deadline=deadline)
+    
+    def iter_followers(self, offset=0, page_size=FOLLOWERS_PAGE_SIZE, prefetch=True, deadline=None):
+        """
+        Duyet toan bo followers theo tung trang, bo nho khong doi
+        
+        Args:
+            offset (int): Vi tri bat dau (dung de resume)
+            page_size (int): So follower moi trang (toi da 50)
+            prefetch (bool): Lay trang ke tiep trong background khi dang xu ly trang hien tai
+            deadline (Deadline): Thoi han cho ca qua trinh duyet
+            
+        Returns:
+            FollowerIterator: Iterator tra ve tung follower record
+        """
+        return FollowerIterator(self, offset, page_size, prefetch, deadline)
+    
+    def get_user_profile(self, user_id, deadline=None):
+        """
+        Lay profile cua user (ten, avatar, ...). Ket qua duoc cache (USER_PROFILE_CACHE_TTL),
+        cac thread cung hoi mot user trong luc dang goi se dung chung mot request.
+        
+        Args:
+            user_id (str): ID cua user
+            deadline (Deadline): Thoi han cho ca lan goi (gom ca cac lan thu lai)
+            
+        Returns:
+            dict: Profile user hoac error ('cached': True neu lay tu cache)
+        """
+        cache_key = f"{self._token_key}:{user_id}"
+        cached = self._cached_profile(cache_key)
+        if cached is not None:
+            return cached
+        
+        def fetch():
+            params = {'data': json.dumps({'user_id': user_id})}
+            # Khong dung response cache chung: profile user co cache rieng (lon hon)
+            result = self._request('GET', '/oa/getprofile', params=params, deadline=deadline, use_cache=False)
+            if self.profile_cache and result['success']:
+                self.profile_cache.set(cache_key, copy.deepcopy(result.get('data')), USER_PROFILE_CACHE_TTL)
+            return result
+        
+        # Cac thread cho dung chung ket qua cua lan goi: moi thread nhan mot ban sao rieng
+        return copy.deepcopy(self._profile_calls.do(cache_key, fetch))
+    
+    def _cached_profile(self, cache_key):
+        if not self.profile_cache:
+            return None
+        cached = self.profile_cache.get(cache_key)
+        if cached is None:
+            return None
+        if self.metrics:
+            self.metrics.cache_hits.inc('/oa/getprofile')
+        return cached_result(cached)
+    
+    def get_user_profiles(self, user_ids, workers=USER_PROFILE_WORKERS, deadline=None):
+        """
+        Lay profile cua nhieu user, toi da `workers` request cung luc.
+        User da co trong cache khong ton request; user_ids duoc doc dan (co the la generator).
+        
+        Args:
+            user_ids (iterable): Cac user_id (trung lap chi lay mot lan)
+            workers (int): So request song song (nen <= pool_maxsize cua client)
+            deadline (Deadline): Thoi han cho ca lan lay
+            
+        Returns:
+            dict: user_id -> ket qua nhu get_user_profile
+        """
+        results = {}
+        seen = set()
+        pending = {}
+        max_pending = workers * 2
+        
+        def collect(done_futures):
+            for future in done_futures:
+                user_id = pending.pop(future)
+                try:
+                    results[user_id] = future.result()
+                except Exception as e:
+                    results[user_id] = {'success': False, 'error': str(e)}
+        
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for user_id in user_ids:
+                if user_id in seen:
+                    continue
+                seen.add(user_id)
+                
+                # Da co trong cache: khong can dua vao worker
+                cached = self._cached_profile(f"{self._token_key}:{user_id}")
+                if cached is not None:
+                    results[user_id] = cached
+                    continue
+                
+                # Gioi han so request dang cho de khong nap ca danh sach vao executor
+                while len(pending) >= max_pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                
+                pending[executor.submit(self.get_user_profile, user_id, deadline)] = user_id
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+        
+        return results
+    
+    def _request(self, method, path, headers=None, deadline=None, use_cache=True, **kwargs):
+        """
+        Gui request qua transport (dung lai ket noi trong pool)
+        
+        Args:
+            method (str): HTTP method
+            path (str): Duong dan endpoint, vd '/oa/getoa'
+            headers (dict): Header rieng (mac dinh chi co access_token)
+            deadline (Deadline): Thoi han cho ca lan goi, gom cho rate limit va cac lan thu lai
+            use_cache (bool): Dung response cache cho endpoint co trong RESPONSE_CACHE_TTLS
+            **kwargs: Tham so them cho transport.request (params, data, ...)
+            
+        Returns:
+            dict: Ket qua da xu ly boi _handle_response, them 'attempts' (so lan goi)
+                  va 'circuit_state' (trang thai circuit breaker cua endpoint)
+        """
+        url = f"{self.base_url}{path}"
+        if headers is None:
+            headers = {'access_token': self.access_token}
+        
+        # API chi doc: tra ve tu cache neu con han (khong ton quota)
+        cache_key = None
+        if use_cache and self.cache and method == 'GET' and path in RESPONSE_CACHE_TTLS:
+            cache_key = f"{self._token_key}:{path}:{json.dumps(kwargs.get('params'), sort_keys=True)}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if self.metrics:
+                    self.metrics.cache_hits.inc(path)
+                return cached_result(cached)
+        
+        bucket = endpoint_bucket(path) if self.rate_limiter else None
+        breaker = self.circuit_breakers.get(path) if self.circuit_breakers else None
+        attempts = 0
+        
+        while True:
+            # Mach dang mo: bao loi ngay, khong goi Zalo
+            if breaker and not breaker.allow():
+                if self.metrics:
+                    self.metrics.rejected.inc(path)
+                return {
+                    'success': False,
+                    'error': f"Circuit breaker open for {path}",
+                    'attempts': attempts,
+                    'circuit_state': breaker.state
+                }
+            
+            if bucket:
+                acquired = self.rate_limiter.acquire(bucket, timeout=deadline.remaining() if deadline else None)
+                if not acquired:
+                    # Tra lai luot thu cua breaker (half-open) vi request khong duoc gui
+                    if breaker:
+                        breaker.release()
+                    return {'success': False, 'error': 'Deadline exceeded', 'attempts': attempts}
+            
+            if deadline is not None:
+                if deadline.expired():
+                    if breaker:
+                        breaker.release()
+                    return {'success': False, 'error': 'Deadline exceeded', 'attempts': attempts}
+                timeout = deadline.timeout(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+            else:
+                timeout = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+            
+            attempts += 1
+            exception = None
+            status = 'exception'
+            start_time = time.perf_counter()
+            try:
+                # Body doc dan (upload file): doc lai tu dau o moi lan gui
+                if hasattr(kwargs.get('data'), 'seek'):
+                    kwargs['data'].seek(0)
+                response = self.transport.request(method, url, headers=headers, timeout=timeout, **kwargs)
+                status = response.status_code
+                result = self._handle_response(response)
+            except Exception as e:
+                exception = e
+                result = {'success': False, 'error': str(e), 'exception': type(e).__name__}
+            
+            if self.metrics:
+                self.metrics.observe_request(path, time.perf_counter() - start_time, status, result.get('error_code'))
+            
+            # Zalo bao vuot quota: giam toc bucket cho moi client dung chung limiter
+            quota_error = is_quota_error(result)
+            if bucket and quota_error:
+                self.rate_limiter.penalize(bucket)
+            
+            transient = is_transient_error(result, exception)
+            if breaker:
+                # Loi quota do phia minh goi qua nhanh, khong phai Zalo bi loi
+                if transient and not quota_error:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+            
+            if (transient and attempts < self.retry_policy.max_attempts
+                    and is_retry_safe(method, exception)):
+                delay = self.retry_policy.delay(attempts)
+                # Khong du thoi gian cho lan thu tiep theo
+                if deadline is None or delay < deadline.remaining():
+                    if self.metrics:
+                        self.metrics.retries.inc(path)
+                    time.sleep(delay)
+                    continue
+            break
+        
+        result['attempts'] = attempts
+        if breaker:
+            result['circuit_state'] = breaker.state
+        
+        if cache_key and result['success']:
+            self.cache.set(cache_key, copy.deepcopy(result.get('data')), RESPONSE_CACHE_TTLS[path])
+        
+        return result
     
     def _handle_response(self, response):
         """
         Xu ly response tu API
         
         Args:
-            response: Response object tu requests
+            response: Response object tu transport
             
         Returns:
             dict: Ket qua da xu ly
         """
         try:
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data.get('error') == 0:
-                    return {
-                        'success': True,
-                        'data': data.get('data', data)
-                    }
-                else:
-                    return {
-                        'success': False,
-                        'error': data.get('message', 'API Error'),
-                        'error_code': data.get('error')
-                    }
+            return build_api_result(response.status_code, response.text)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f"Response parsing error: {str(e)}"
+            }
+
+
+class ZaloAPIError(Exception):
+    """Loi API khi khong the tra ve dict ket qua (vd trong iterator)"""
+    
+    def __init__(self, result):
+        super().__init__(result.get('error', 'API Error'))
+        self.result = result
+
+
+class FollowerIterator:
+    """
+    Iterator followers: giu mot trang trong bo nho, trang ke tiep duoc lay san
+    trong background. Thuoc tinh `offset` la vi tri cua record ke tiep, luu lai
+    de resume bang client.iter_followers(offset=...).
+    """
+    
+    def __init__(self, client, offset=0, page_size=FOLLOWERS_PAGE_SIZE, prefetch=True, deadline=None):
+        self.client = client
+        self.offset = offset
+        self.page_size = page_size
+        self.deadline = deadline
+        self.total = None
+        
+        self._page = []
+        self._index = 0
+        self._next_offset = offset
+        self._done = False
+        self._future = None
+        self._executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        while self._index >= len(self._page):
+            if self._done:
+                self.close()
+                raise StopIteration
+            self._load_next_page()
+        
+        follower = self._page[self._index]
+        self._index += 1
+        self.offset += 1
+        return follower
+    
+    def _fetch(self, offset):
+        return self.client.get_followers(offset=offset, count=self.page_size, deadline=self.deadline)
+    
+    def _load_next_page(self):
+        """Lay trang ke tiep (tu prefetch neu co) va dat lich prefetch trang sau"""
+        if self._future is not None:
+            result = self._future.result()
+            self._future = None
+        else:
+            result = self._fetch(self._next_offset)
+        
+        if not result['success']:
+            self.close()
+            raise ZaloAPIError(result)
+        
+        data = result['data']
+        followers = data.get('followers', [])
+        self.total = data.get('total', self.total)
+        
+        self._page = followers
+        self._index = 0
+        self._next_offset += len(followers)
+        
+        if not followers or (self.total is not None and self._next_offset >= self.total):
+            self._done = True
+        elif self._executor is not None:
+            self._future = self._executor.submit(self._fetch, self._next_offset)
+    
+    def close(self):
+        """Dung iterator va giai phong thread prefetch"""
+        self._done = True
+        self._page = []
+        self._index = 0
+        if self._future is not None:
+            self._future.cancel()
+            self._future = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+def build_api_result(status_code, body_text):
+    """
+    Chuyen HTTP status va noi dung response thanh dict ket qua chung
+    (dung chung cho client dong bo va bat dong bo)
+    
+    Args:
+        status_code (int): HTTP status code
+        body_text (str): Noi dung response
+        
+    Returns:
+        dict: {'success': True, 'data': ...} hoac {'success': False, 'error': ...}
+    """
+    try:
+        if status_code == 200:
+            data = json.loads(body_text)
+            
+            if data.get('error') == 0:
+                return {
+                    'success': True,
+                    'data': data.get('data', data)
+                }
             else:
                 return {
                     'success': False,
-                    'error': f"HTTP {response.status_code}: {response.text}",
-                    'status_code': response.status_code
+                    'error': data.get('message', 'API Error'),
+                    'error_code': data.get('error')
                 }
-                
-        except Exception as e:
+        else:
             return {
                 'success': False,
-                'error': f"Response parsing error: {str(e)}"
+                'error': f"HTTP {status_code}: {body_text}",
+                'status_code': status_code
             }
+            
+    except Exception as e:
+        return {
+            'success': False,
+            'error': f"Response parsing error: {str(e)}"
+        }
 
 
-def load_token_from_file(file_path=TOKEN_FILE):
+def cached_result(data):
     """
-    Doc access token tu file
+    Tao ket qua tu du lieu da cache (cache chi luu 'data', khong luu cac truong cua lan goi goc
+    nhu 'attempts' / 'circuit_state')
     
     Args:
-        file_path (str): Duong dan den file chua token
+        data: Du lieu da cache
+        
+    Returns:
+        dict: {'success': True, 'data': <ban sao rieng>, 'cached': True}
+    """
+    return {'success': True, 'data': copy.deepcopy(data), 'cached': True}
+
+
+def load_token_from_file(file_path=None):
+    """
+    Doc access token tu token store (JSON), neu khong co thi doc file text
+    
+    Args:
+        file_path (str): Duong dan den file text chua token (None = dung token store roi TOKEN_FILE)
         
     Returns:
         str or None: Access token hoac None neu khong doc duoc
     """
+    if file_path is None:
+        record = get_default_token_store().get()
+        if record and record.get('access_token'):
+            return record['access_token']
+        file_path = TOKEN_FILE
+    
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             for line in f:
@@ -186,7 +701,7 @@ def main():
     print(f"Using access token: {access_token[:50]}...")
     
     # Khoi tao client
-    client = ZaloOAClient(access_token)
+    client = ZaloOAClient(access_token, warmup=True)
     
     # Test cac API
     print("\n1. Testing OA Info API...")
@@ -217,6 +732,8 @@ def main():
     else:
         print(f"   Error: {result['error']}")
     
+    client.close()
+    
     print("\n" + "=" * 60)
     print("API Test completed")
     print("=" * 60)
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Async API Client
+Client asyncio cho Zalo OA API, chay hang nghin request tren mot event loop
+"""
+
+import asyncio
+import json
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp chi can khi dung client bat dong bo
+    aiohttp = None
+
+from config import *
+from zalo_api_client import build_api_result, load_token_from_file
+from zalo_message_template import TEXT_MESSAGE
+from zalo_rate_limit import get_default_rate_limiter, endpoint_bucket, is_quota_error
+
+
+class AsyncZaloOAClient:
+    """Client bat dong bo de goi Zalo OA APIs (cung API voi ZaloOAClient)"""
+    
+    def __init__(self, access_token, max_concurrency=ASYNC_MAX_CONCURRENCY,
+                 session=None, keep_alive=OA_API_KEEP_ALIVE, rate_limiter=None,
+                 base_url=OA_API_BASE_URL):
+        """
+        Khoi tao client voi access token
+        
+        Args:
+            access_token (str): Access token da lay duoc
+            max_concurrency (int): So request dong thoi toi da cua client
+            session (aiohttp.ClientSession): Session dung chung (neu None se tu tao)
+            keep_alive (bool): Giu ket noi song giua cac request
+            rate_limiter (RateLimiter): Rate limiter (None = dung chung trong process, False = tat)
+            base_url (str): URL goc cua OA API (vd server gia lap khi benchmark)
+        """
+        if aiohttp is None:
+            raise ImportError("AsyncZaloOAClient requires aiohttp: pip install aiohttp")
+        
+        self.access_token = access_token
+        self.headers = {
+            'access_token': access_token,
+            'Content-Type': 'application/json'
+        }
+        self.max_concurrency = max_concurrency
+        self.keep_alive = keep_alive
+        self.base_url = base_url
+        self.rate_limiter = get_default_rate_limiter() if rate_limiter is None else (rate_limiter or None)
+        
+        # Semaphore gioi han so request dang chay, cac coroutine con lai se cho
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        
+        # aiohttp.ClientSession phai duoc tao trong event loop, nen tao tre
+        self._owns_session = session is None
+        self.session = session
+    
+    def _get_session(self):
+        """Tao session (va connection pool) khi request dau tien chay"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_concurrency,
+                                             force_close=not self.keep_alive)
+            timeout = aiohttp.ClientTimeout(sock_connect=HTTP_CONNECT_TIMEOUT, sock_read=HTTP_READ_TIMEOUT)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self.session
+    
+    async def close(self):
+        """Dong cac ket noi trong pool (neu session do client tao ra)"""
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+    
+    async def get_oa_info(self):
+        """
+        Lay thong tin Official Account
+        
+        Returns:
+            dict: Thong tin OA hoac error
+        """
+        return await self._request('GET', '/oa/getoa')
+    
+    async def get_oa_profile(self):
+        """
+        Lay profile cua OA
+        
+        Returns:
+            dict: Profile OA hoac error
+        """
+        return await self._request('GET', '/oa/getprofile')
+    
+    async def send_text_message(self, user_id, message):
+        """
+        Gui tin nhan text den user
+        
+        Args:
+            user_id (str): ID cua user nhan tin nhan
+            message (str): Noi dung tin nhan
+        
+        Returns:
+            dict: Ket qua gui tin nhan
+        """
+        return await self.send_message(user_id, TEXT_MESSAGE, {'text': message})
+    
+    async def send_message(self, user_id, template, variables=None):
+        """
+        Gui tin nhan tu template da compile (text, anh, list, button)
+        
+        Args:
+            user_id (str): ID cua user nhan tin nhan
+            template (MessageTemplate): Template tu zalo_message_template
+            variables (dict): Gia tri cac bien {ten_bien} cua user nay
+        
+        Returns:
+            dict: Ket qua gui tin nhan
+        """
+        try:
+            body = template.render(user_id, **(variables or {}))
+        except Exception as e:
+            return {'success': False, 'error': f"Template error: {type(e).__name__}: {str(e)}"}
+        return await self._request('POST', '/oa/message', headers=self.headers, data=body)
+    
+    async def get_followers(self, offset=0, count=10):
+        """
+        Lay danh sach followers
+        
+        Args:
+            offset (int): Vi tri bat dau
+            count (int): So luong can lay
+        
+        Returns:
+            dict: Danh sach followers hoac error
+        """
+        params = {
+            'data': json.dumps({
+                'offset': offset,
+                'count': count
+            })
+        }
+        
+        return await self._request('GET', '/oa/getfollowers', params=params)
+    
+    async def _request(self, method, path, headers=None, **kwargs):
+        """
+        Gui request, toi da max_concurrency request chay cung luc
+        
+        Args:
+            method (str): HTTP method
+            path (str): Duong dan endpoint, vd '/oa/getoa'
+            headers (dict): Header rieng (mac dinh chi co access_token)
+            **kwargs: Tham so them cho session.request (params, data, ...)
+        
+        Returns:
+            dict: Ket qua cung dang voi ZaloOAClient._handle_response
+        """
+        url = f"{self.base_url}{path}"
+        if headers is None:
+            headers = {'access_token': self.access_token}
+        
+        bucket = endpoint_bucket(path) if self.rate_limiter else None
+        
+        loop = asyncio.get_running_loop()
+        async with self._semaphore:
+            # Cho token ma khong block event loop (reserve khoa va doc/ghi file state
+            # neu dung chung giua cac process nen chay tren thread pool)
+            while bucket:
+                wait_time = await loop.run_in_executor(None, self.rate_limiter.reserve, bucket)
+                if wait_time <= 0:
+                    break
+                await asyncio.sleep(wait_time)
+            
+            try:
+                session = self._get_session()
+                async with session.request(method, url, headers=headers, **kwargs) as response:
+                    body_text = await response.text()
+                    result = build_api_result(response.status, body_text)
+            except Exception as e:
+                return {'success': False, 'error': str(e)}
+        
+        if bucket and is_quota_error(result):
+            await loop.run_in_executor(None, self.rate_limiter.penalize, bucket)
+        
+        return result
+
+
+async def main():
+    """Ham chinh de test async API client"""
+    print("=" * 60)
+    print("ZALO OA ASYNC API CLIENT TEST")
+    print("=" * 60)
+    
+    access_token = load_token_from_file()
+    
+    if not access_token:
+        print("Error: No access token found")
+        print(f"Please run 'python zalo_oauth.py' first to get access token")
+        return
+    
+    async with AsyncZaloOAClient(access_token) as client:
+        # Goi dong thoi cac API tren cung event loop
+        info, profile, followers = await asyncio.gather(
+            client.get_oa_info(),
+            client.get_oa_profile(),
+            client.get_followers(count=5)
+        )
+    
+    for name, result in (('OA Info', info), ('OA Profile', profile), ('Followers', followers)):
+        status = "SUCCESS" if result['success'] else f"ERROR: {result['error']}"
+        print(f"{name}: {status}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,498 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Broadcast
+Gui tin nhan hang loat den nhieu user voi nhieu worker song song,
+hoac chia cho nhieu process (moi CPU mot process) dung chung rate limit
+"""
+
+import os
+import json
+import time
+import queue
+import tempfile
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from config import *
+
+
+class BroadcastCheckpoint:
+    """Luu tien do broadcast (append-only) de chay lai khong gui trung"""
+    
+    def __init__(self, file_path=BROADCAST_CHECKPOINT_FILE):
+        """
+        Mo checkpoint file va doc cac user da gui thanh cong
+        
+        Args:
+            file_path (str): Duong dan checkpoint file (JSON lines)
+        """
+        self.file_path = file_path
+        self.done = set()
+        
+        if os.path.exists(file_path):
+            with open(file_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Dong cuoi co the bi ghi do neu process chet giua chung
+                        continue
+                    if record.get('success'):
+                        self.done.add(record['user_id'])
+        
+        self._file = open(file_path, 'a', encoding='utf-8')
+    
+    def is_done(self, user_id):
+        """Kiem tra user da duoc gui thanh cong o lan chay truoc chua"""
+        return user_id in self.done
+    
+    def record(self, user_id, result):
+        """
+        Ghi ket qua gui cua mot user
+        
+        Args:
+            user_id (str): ID cua user
+            result (dict): Ket qua tu send_text_message
+        """
+        entry = {'user_id': user_id, 'success': result.get('success', False)}
+        if not entry['success']:
+            entry['error'] = result.get('error')
+        else:
+            self.done.add(user_id)
+        
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+    
+    def close(self):
+        """Dong checkpoint file"""
+        self._file.close()
+
+
+class ZaloBroadcaster:
+    """Gui tin nhan den danh sach (hoac stream) user voi worker pool"""
+    
+    def __init__(self, client, workers=BROADCAST_WORKERS, checkpoint_file=None):
+        """
+        Khoi tao broadcaster
+        
+        Args:
+            client (ZaloOAClient): Client dung de gui (nen co pool_maxsize >= workers)
+            workers (int): So worker gui song song
+            checkpoint_file (str): File checkpoint de resume (None = khong luu)
+        """
+        self.client = client
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file
+    
+    def send_text(self, recipients, message, on_result=None, deadline=None):
+        """
+        Gui tin nhan text den tat ca recipients
+        
+        Args:
+            recipients (iterable): Iterable/generator cac user_id
+            message (str): Noi dung tin nhan
+            on_result (callable): Ham goi voi (user_id, result) cho moi user
+            deadline (Deadline): Thoi han cho ca lan broadcast
+        
+        Returns:
+            dict: Bao cao tong hop (xem broadcast)
+        """
+        return self.broadcast(recipients,
+                              lambda user_id: self.client.send_text_message(user_id, message, deadline=deadline),
+                              on_result=on_result, deadline=deadline)
+    
+    def send_template(self, recipients, template, variables=None, on_result=None, deadline=None):
+        """
+        Gui tin nhan tu template da compile den tat ca recipients
+        
+        Args:
+            recipients (iterable): Iterable/generator cac user_id
+            template (MessageTemplate): Template tu zalo_message_template (compile mot lan cho ca lan gui)
+            variables (callable): Ham nhan user_id, tra ve dict bien cua user do (None = khong co bien)
+            on_result (callable): Ham goi voi (user_id, result) cho moi user
+            deadline (Deadline): Thoi han cho ca lan broadcast
+        
+        Returns:
+            dict: Bao cao tong hop (xem broadcast)
+        """
+        def send(user_id):
+            return self.client.send_message(user_id, template, variables(user_id) if variables else None,
+                                            deadline=deadline)
+        
+        return self.broadcast(recipients, send, on_result=on_result, deadline=deadline)
+    
+    def broadcast(self, recipients, send_func, on_result=None, deadline=None):
+        """
+        Gui den tung recipient bang send_func, toi da `workers` request cung luc.
+        Recipients duoc doc dan (khong nap het vao bo nho), user da gui thanh cong
+        trong checkpoint se bi bo qua.
+        
+        Args:
+            recipients (iterable): Iterable/generator cac user_id
+            send_func (callable): Ham nhan user_id va tra ve dict ket qua
+            on_result (callable): Ham goi voi (user_id, result) cho moi user
+            deadline (Deadline): Het thoi han thi ngung gui them (user con lai
+                                 khong duoc ghi vao checkpoint nen se duoc gui o lan chay sau)
+        
+        Returns:
+            dict: total, sent, failed, skipped, elapsed, throughput, failures, deadline_exceeded
+        """
+        checkpoint = BroadcastCheckpoint(self.checkpoint_file) if self.checkpoint_file else None
+        report = {
+            'total': 0,
+            'sent': 0,
+            'failed': 0,
+            'skipped': 0,
+            'elapsed': 0.0,
+            'throughput': 0.0,
+            'failures': {},
+            'deadline_exceeded': False
+        }
+        
+        seen = set()
+        pending = {}
+        max_pending = self.workers * 2
+        start_time = time.time()
+        
+        def collect(done_futures):
+            for future in done_futures:
+                user_id = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                
+                if result.get('success'):
+                    report['sent'] += 1
+                else:
+                    report['failed'] += 1
+                    report['failures'][user_id] = result.get('error')
+                
+                if checkpoint:
+                    checkpoint.record(user_id, result)
+                if on_result:
+                    on_result(user_id, result)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                for user_id in recipients:
+                    if deadline is not None and deadline.expired():
+                        report['deadline_exceeded'] = True
+                        break
+                    
+                    report['total'] += 1
+                    
+                    if user_id in seen or (checkpoint and checkpoint.is_done(user_id)):
+                        report['skipped'] += 1
+                        continue
+                    seen.add(user_id)
+                    
+                    # Gioi han so request dang cho de khong nap ca stream vao executor
+                    while len(pending) >= max_pending:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                    
+                    pending[executor.submit(send_func, user_id)] = user_id
+                
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+        finally:
+            if checkpoint:
+                checkpoint.close()
+        
+        report['elapsed'] = time.time() - start_time
+        if report['elapsed'] > 0:
+            report['throughput'] = (report['sent'] + report['failed']) / report['elapsed']
+        
+        return report
+
+
+def run_broadcast_shard(options, tasks, results):
+    """
+    Chay trong process con cua ShardedBroadcaster: client va connection pool rieng,
+    lay tung lo recipient tu `tasks`, gui ket qua ve `results` theo lo
+    """
+    from zalo_api_client import ZaloOAClient
+    from zalo_rate_limit import RateLimiter
+    
+    shard = options['shard']
+    try:
+        rate_limiter = RateLimiter(state_file=options['rate_state_file']) if options['rate_state_file'] else False
+        # Client chi dung de gui: khong dung cac cache mac dinh (co the ke thua tu process cha khi fork)
+        client = ZaloOAClient(options['access_token'], base_url=options['base_url'], rate_limiter=rate_limiter,
+                              cache=False, profile_cache=False, attachment_cache=False,
+                              pool_maxsize=options['workers'])
+    except Exception as e:
+        results.put(('done', shard, {'error': str(e)}))
+        return
+    
+    template = options['template']
+    message = options['message']
+    deadline = options['deadline']
+    variables = {}
+    buffer = []
+    
+    def flush():
+        if buffer:
+            results.put(('results', shard, list(buffer)))
+            del buffer[:]
+    
+    def recipients():
+        while True:
+            # Gui ket qua dang giu truoc khi cho lo moi
+            flush()
+            chunk = tasks.get()
+            if chunk is None:
+                return
+            for user_id, user_variables in chunk:
+                if user_variables is not None:
+                    variables[user_id] = user_variables
+                yield user_id
+    
+    def send(user_id):
+        if template is None:
+            return client.send_text_message(user_id, message, deadline=deadline)
+        return client.send_message(user_id, template, variables.pop(user_id, None), deadline=deadline)
+    
+    def on_result(user_id, result):
+        buffer.append((user_id, result))
+        if len(buffer) >= options['chunk_size']:
+            flush()
+    
+    report = {}
+    try:
+        report = ZaloBroadcaster(client, workers=options['workers']).broadcast(recipients(), send, on_result=on_result,
+                                                                               deadline=deadline)
+        report.pop('failures', None)
+    except Exception as e:
+        report = {'error': str(e)}
+    finally:
+        flush()
+        client.close()
+        results.put(('done', shard, report))
+
+
+class ShardedBroadcaster:
+    """
+    Broadcast bang nhieu process: recipients duoc chia theo lo cho cac process con
+    (moi process co ZaloOAClient, connection pool va worker pool rieng), rate limit dung chung
+    qua file (RateLimiter state_file), ket qua gom ve process cha (report, checkpoint, on_result)
+    """
+    
+    def __init__(self, access_token, processes=BROADCAST_PROCESSES, workers=BROADCAST_WORKERS,
+                 checkpoint_file=None, chunk_size=BROADCAST_CHUNK_SIZE, base_url=OA_API_BASE_URL,
+                 rate_state_file=None):
+        """
+        Args:
+            access_token (str): Access token (moi process tu tao client)
+            processes (int): So process gui (None = so CPU)
+            workers (int): So worker gui song song trong moi process
+            checkpoint_file (str): File checkpoint de resume (None = khong luu)
+            chunk_size (int): So user moi lo chia cho process
+            base_url (str): URL goc cua OA API
+            rate_state_file (str): File rate limit dung chung (None = RATE_LIMIT_STATE_FILE,
+                                   neu khong cau hinh thi dung file tam cho lan gui nay)
+        """
+        self.access_token = access_token
+        self.processes = processes or os.cpu_count() or 1
+        self.workers = workers
+        self.checkpoint_file = checkpoint_file
+        self.chunk_size = chunk_size
+        self.base_url = base_url
+        self.rate_state_file = rate_state_file
+    
+    def send_text(self, recipients, message, on_result=None, deadline=None):
+        """
+        Gui tin nhan text den tat ca recipients
+        
+        Args:
+            recipients (iterable): Iterable/generator cac user_id
+            message (str): Noi dung tin nhan
+            on_result (callable): Ham goi (o process cha) voi (user_id, result) cho moi user
+            deadline (Deadline): Thoi han cho ca lan broadcast
+        
+        Returns:
+            dict: Bao cao tong hop (xem ZaloBroadcaster.broadcast, them 'processes' va 'unfinished')
+        """
+        return self._run(recipients, None, message, None, on_result, deadline)
+    
+    def send_template(self, recipients, template, variables=None, on_result=None, deadline=None):
+        """
+        Gui tin nhan tu template da compile den tat ca recipients
+        
+        Args:
+            recipients (iterable): Iterable/generator cac user_id
+            template (MessageTemplate): Template (gui sang process con mot lan)
+            variables (callable): Ham nhan user_id, tra ve dict bien cua user (chay o process cha)
+            on_result (callable): Ham goi (o process cha) voi (user_id, result) cho moi user
+            deadline (Deadline): Thoi han cho ca lan broadcast
+        
+        Returns:
+            dict: Bao cao tong hop (xem send_text)
+        """
+        return self._run(recipients, template, None, variables, on_result, deadline)
+    
+    def _run(self, recipients, template, message, variables, on_result, deadline):
+        checkpoint = BroadcastCheckpoint(self.checkpoint_file) if self.checkpoint_file else None
+        report = {
+            'total': 0,
+            'sent': 0,
+            'failed': 0,
+            'skipped': 0,
+            'unfinished': 0,
+            'elapsed': 0.0,
+            'throughput': 0.0,
+            'failures': {},
+            'deadline_exceeded': False,
+            'processes': self.processes
+        }
+        
+        # Rate limit chung cho moi process: file state cua RateLimiter
+        temp_state_file = None
+        rate_state_file = None
+        if RATE_LIMIT_ENABLED:
+            rate_state_file = self.rate_state_file or RATE_LIMIT_STATE_FILE
+            if not rate_state_file:
+                fd, temp_state_file = tempfile.mkstemp(prefix='zalo_rate_', suffix='.json')
+                os.close(fd)
+                rate_state_file = temp_state_file
+        
+        context = multiprocessing.get_context()
+        tasks = context.Queue(maxsize=self.processes * 2)
+        results = context.Queue()
+        stopping = threading.Event()
+        dispatched = [0]
+        
+        def put(item):
+            # Khong block mai neu cac process con da chet
+            while not stopping.is_set():
+                try:
+                    tasks.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        def feed():
+            seen = set()
+            chunk = []
+            try:
+                for user_id in recipients:
+                    if deadline is not None and deadline.expired():
+                        report['deadline_exceeded'] = True
+                        break
+                    
+                    report['total'] += 1
+                    if user_id in seen or (checkpoint and checkpoint.is_done(user_id)):
+                        report['skipped'] += 1
+                        continue
+                    seen.add(user_id)
+                    
+                    chunk.append((user_id, variables(user_id) if variables else None))
+                    if len(chunk) >= self.chunk_size:
+                        if not put(chunk):
+                            return
+                        dispatched[0] += len(chunk)
+                        chunk = []
+                
+                if chunk and put(chunk):
+                    dispatched[0] += len(chunk)
+            except Exception as e:
+                report.setdefault('errors', {})['recipients'] = str(e)
+            finally:
+                for _ in range(self.processes):
+                    if not put(None):
+                        break
+        
+        start_time = time.time()
+        workers = []
+        for shard in range(self.processes):
+            options = {
+                'shard': shard,
+                'access_token': self.access_token,
+                'base_url': self.base_url,
+                'workers': self.workers,
+                'chunk_size': self.chunk_size,
+                'rate_state_file': rate_state_file,
+                'template': template,
+                'message': message,
+                'deadline': deadline
+            }
+            process = context.Process(target=run_broadcast_shard, args=(options, tasks, results),
+                                      name=f'zalo-broadcast-{shard}', daemon=True)
+            process.start()
+            workers.append(process)
+        
+        feeder = threading.Thread(target=feed, name='zalo-broadcast-feeder', daemon=True)
+        feeder.start()
+        
+        done = set()
+        try:
+            while len(done) < self.processes:
+                try:
+                    kind, shard, payload = results.get(timeout=0.5)
+                except queue.Empty:
+                    # Process chet ma khong bao xong: khong cho no nua
+                    for shard, process in enumerate(workers):
+                        if shard not in done and not process.is_alive():
+                            done.add(shard)
+                            report.setdefault('errors', {})[shard] = f"Process exited with code {process.exitcode}"
+                    continue
+                
+                if kind == 'done':
+                    done.add(shard)
+                    if payload.get('error'):
+                        report.setdefault('errors', {})[shard] = payload['error']
+                    continue
+                
+                for user_id, result in payload:
+                    if result.get('success'):
+                        report['sent'] += 1
+                    else:
+                        report['failed'] += 1
+                        report['failures'][user_id] = result.get('error')
+                    if checkpoint:
+                        checkpoint.record(user_id, result)
+                    if on_result:
+                        on_result(user_id, result)
+        finally:
+            stopping.set()
+            feeder.join()
+            for process in workers:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            tasks.cancel_join_thread()
+            tasks.close()
+            results.close()
+            if checkpoint:
+                checkpoint.close()
+            if temp_state_file:
+                os.remove(temp_state_file)
+        
+        # User da chia cho process nhung chua co ket qua (process chet / bi dung): gui lai o lan chay sau
+        report['unfinished'] = max(0, dispatched[0] - report['sent'] - report['failed'])
+        report['elapsed'] = time.time() - start_time
+        if report['elapsed'] > 0:
+            report['throughput'] = (report['sent'] + report['failed']) / report['elapsed']
+        
+        return report
+
+
+def read_recipients(file_path):
+    """
+    Doc user_id tu file text (moi dong mot ID), tra ve generator
+    
+    Args:
+        file_path (str): Duong dan file
+    
+    Yields:
+        str: user_id
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            user_id = line.strip()
+            if user_id:
+                yield user_id
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Response Cache
+Cache LRU co TTL cho cac API chi doc, co the luu them xuong dia (SQLite)
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+from config import *
+
+
+class TTLCache:
+    """Cache LRU trong bo nho voi TTL cho tung key, tuy chon tang luu tren dia"""
+    
+    def __init__(self, maxsize=RESPONSE_CACHE_MAXSIZE, disk_file=None):
+        """
+        Khoi tao cache
+        
+        Args:
+            maxsize (int): So key toi da trong bo nho (LRU)
+            disk_file (str): File SQLite de giu cache qua cac lan chay (None = chi bo nho)
+        """
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        self._disk = None
+        if disk_file:
+            self._disk = sqlite3.connect(disk_file, check_same_thread=False)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._disk.commit()
+    
+    def get(self, key, default=None):
+        """
+        Lay gia tri con han cua key
+        
+        Args:
+            key (str): Key
+            default: Gia tri tra ve neu khong co / het han
+        
+        Returns:
+            Gia tri da cache hoac default
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            
+            if self._disk is not None:
+                row = self._disk.execute(
+                    "SELECT value, expires_at FROM cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row:
+                    value = json.loads(row[0])
+                    self._store(key, value, row[1])
+                    self.hits += 1
+                    return value
+            
+            self.misses += 1
+            return default
+    
+    def set(self, key, value, ttl):
+        """
+        Luu gia tri (phai serialize duoc bang JSON neu dung tang dia)
+        
+        Args:
+            key (str): Key
+            value: Gia tri
+            ttl (float): Thoi gian song (giay)
+        """
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+            if self._disk is not None:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False), expires_at)
+                )
+                self._disk.commit()
+    
+    def _store(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+    
+    def invalidate(self, prefix=''):
+        """
+        Xoa cac key bat dau bang prefix (prefix rong = xoa het)
+        
+        Args:
+            prefix (str): Tien to cua key can xoa
+        """
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+            if self._disk is not None:
+                # Escape ky tu dac biet cua LIKE
+                pattern = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                self._disk.execute("DELETE FROM cache WHERE key LIKE ? ESCAPE '\\'", (pattern,))
+                self._disk.commit()
+    
+    def close(self):
+        """Dong tang luu tren dia"""
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+
+class SingleFlight:
+    """Gop cac lan goi dong thoi cung key: chi mot lan goi that, cac thread khac cho va dung chung ket qua"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+    
+    def do(self, key, func):
+        """
+        Goi func() neu chua co lan goi nao cho key, nguoc lai cho lan goi dang chay
+        
+        Args:
+            key (str): Key cua lan goi
+            func (callable): Ham khong tham so
+        
+        Returns:
+            Ket qua cua func() (exception cua func duoc nem lai cho moi thread cho)
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = {'event': threading.Event(), 'result': None, 'error': None}
+                self._calls[key] = call
+        
+        if not leader:
+            call['event'].wait()
+        else:
+            try:
+                call['result'] = func()
+            except Exception as e:
+                call['error'] = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call['event'].set()
+        
+        if call['error'] is not None:
+            raise call['error']
+        return call['result']
+
+
+def token_fingerprint(access_token):
+    """Tao ma ngan dai dien cho token (khong luu token goc trong cache key)"""
+    return hashlib.sha256((access_token or '').encode('utf-8')).hexdigest()[:16]
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache():
+    """
+    Cache dung chung cho moi client trong process (tao tu config)
+    
+    Returns:
+        TTLCache or None: None neu RESPONSE_CACHE_ENABLED = False
+    """
+    global _default_cache
+    if not RESPONSE_CACHE_ENABLED:
+        return None
+    
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = TTLCache(RESPONSE_CACHE_MAXSIZE, RESPONSE_CACHE_FILE)
+        return _default_cache
+
+
+_default_profile_cache = None
+
+
+def get_default_profile_cache():
+    """
+    Cache profile user dung chung cho moi client trong process (tao tu config)
+    
+    Returns:
+        TTLCache or None: None neu USER_PROFILE_CACHE_ENABLED = False
+    """
+    global _default_profile_cache
+    if not USER_PROFILE_CACHE_ENABLED:
+        return None
+    
+    with _default_cache_lock:
+        if _default_profile_cache is None:
+            _default_profile_cache = TTLCache(USER_PROFILE_CACHE_MAXSIZE)
+        return _default_profile_cache
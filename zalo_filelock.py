@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+"""
+File lock don gian (fcntl tren Linux/macOS, msvcrt tren Windows)
+dung de dong bo giua cac process tren cung may
+"""
+
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def lock_fd(fd):
+    """Khoa exclusive file descriptor (block cho den khi lay duoc)"""
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        while True:
+            try:
+                msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+
+
+def unlock_fd(fd):
+    """Mo khoa file descriptor"""
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """
+    Lock dung chung giua cac thread va cac process qua mot file.
+    Thread dang giu lock co the acquire lai (vd refresher giu lock roi goi TokenStore.save).
+    """
+    
+    def __init__(self, file_path):
+        """
+        Args:
+            file_path (str): Duong dan file lock (tu tao neu chua co)
+        """
+        self.file_path = file_path
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self._pid = None
+    
+    def fileno(self):
+        """File descriptor cua lock file (mo lai sau khi fork)"""
+        # Sau khi fork, fd ke thua dung chung lock voi process cha nen phai mo lai
+        if self._fd is None or self._pid != os.getpid():
+            self._fd = os.open(self.file_path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+    
+    def acquire(self):
+        self._lock.acquire()
+        if self._depth == 0:
+            try:
+                lock_fd(self.fileno())
+            except Exception:
+                self._lock.release()
+                raise
+        self._depth += 1
+    
+    def release(self):
+        self._depth -= 1
+        try:
+            if self._depth == 0:
+                unlock_fd(self.fileno())
+        finally:
+            self._lock.release()
+    
+    def __enter__(self):
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+        return False
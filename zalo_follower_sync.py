@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Follower Sync
+Dong bo danh sach followers vao SQLite (WAL) de truy van local, ghi log follow/unfollow
+"""
+
+import json
+import time
+import sqlite3
+import threading
+
+from config import *
+from zalo_api_client import ZaloOAClient, ZaloAPIError, load_token_from_file
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS followers (
+    user_id TEXT PRIMARY KEY,
+    first_seen REAL NOT NULL,
+    unfollowed_at REAL,
+    active INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_followers_active ON followers(active);
+
+CREATE TABLE IF NOT EXISTS follower_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sync_id INTEGER NOT NULL,
+    user_id TEXT NOT NULL,
+    change TEXT NOT NULL,
+    changed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_follower_changes_sync ON follower_changes(sync_id);
+
+CREATE TABLE IF NOT EXISTS sync_runs (
+    sync_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    status TEXT NOT NULL,
+    total INTEGER,
+    added INTEGER DEFAULT 0,
+    removed INTEGER DEFAULT 0,
+    head TEXT,
+    error TEXT
+);
+"""
+
+
+class FollowerStore:
+    """Snapshot followers trong SQLite va dong bo tang dan voi Zalo"""
+    
+    def __init__(self, db_file=FOLLOWER_DB_FILE):
+        """
+        Mo (hoac tao) database followers
+        
+        Args:
+            db_file (str): Duong dan file SQLite
+        """
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+    
+    def close(self):
+        """Dong database"""
+        self.conn.close()
+    
+    def last_run(self):
+        """
+        Lay lan sync thanh cong gan nhat
+        
+        Returns:
+            dict or None: Thong tin lan sync (sync_id, total, head, ...)
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sync_id, finished_at, total, head FROM sync_runs "
+                "WHERE status IN ('completed', 'unchanged') ORDER BY sync_id DESC LIMIT 1"
+            ).fetchone()
+        
+        if not row:
+            return None
+        return {
+            'sync_id': row[0],
+            'finished_at': row[1],
+            'total': row[2],
+            'head': json.loads(row[3]) if row[3] else []
+        }
+    
+    def sync(self, client, quick_check=True, page_size=FOLLOWERS_PAGE_SIZE, batch_size=FOLLOWER_SYNC_BATCH_SIZE,
+             deadline=None, max_quick_runs=FOLLOWER_QUICK_CHECK_MAX_RUNS, max_age=FOLLOWER_QUICK_CHECK_MAX_AGE):
+        """
+        Dong bo followers tu Zalo vao database.
+        
+        Neu quick_check=True va tong so followers cung trang dau tien khong doi so voi
+        lan sync truoc thi coi nhu khong co thay doi va bo qua viec duyet toan bo danh sach.
+        Truong hop so follow moi bang dung so unfollow ngoai trang dau khong bi kiem tra nhanh
+        phat hien, nen van duyet toan bo sau `max_quick_runs` lan kiem tra nhanh lien tiep
+        hoac khi lan duyet toan bo gan nhat cu hon `max_age` giay.
+        
+        Args:
+            client (ZaloOAClient): Client de goi API
+            quick_check (bool): Kiem tra nhanh truoc khi duyet toan bo
+            page_size (int): So follower moi trang
+            batch_size (int): So user_id ghi vao database moi lan
+            deadline (Deadline): Thoi han cho ca lan sync (het han thi sync bi huy, snapshot giu nguyen)
+            max_quick_runs (int): So lan kiem tra nhanh lien tiep toi da (None = khong gioi han)
+            max_age (float): Tuoi toi da (giay) cua lan duyet toan bo gan nhat (None = khong gioi han)
+        
+        Returns:
+            dict: success, sync_id, status, total, added, removed, elapsed (hoac error)
+        """
+        start_time = time.time()
+        sync_id = self._start_run(start_time)
+        
+        try:
+            first_page = client.get_followers(offset=0, count=page_size, deadline=deadline)
+            if not first_page['success']:
+                raise ZaloAPIError(first_page)
+            
+            total = first_page['data'].get('total', 0)
+            head = [f.get('user_id') for f in first_page['data'].get('followers', [])]
+            
+            last = self.last_run()
+            if (quick_check and last and last['total'] == total and last['head'] == head
+                    and not self._full_sync_due(max_quick_runs, max_age)):
+                self._finish_run(sync_id, 'unchanged', total, head, 0, 0)
+                return self._report(sync_id, 'unchanged', total, 0, 0, start_time)
+            
+            added, removed = self._full_sync(client, sync_id, page_size, batch_size, deadline)
+            self._finish_run(sync_id, 'completed', total, head, added, removed)
+            return self._report(sync_id, 'completed', total, added, removed, start_time)
+        
+        except Exception as e:
+            error = e.result.get('error') if isinstance(e, ZaloAPIError) else str(e)
+            with self._lock:
+                self.conn.rollback()
+                self.conn.execute(
+                    "UPDATE sync_runs SET status = 'failed', finished_at = ?, error = ? WHERE sync_id = ?",
+                    (time.time(), error, sync_id)
+                )
+                self.conn.commit()
+            return {'success': False, 'sync_id': sync_id, 'error': error}
+    
+    def _full_sync_due(self, max_quick_runs, max_age):
+        """Kiem tra nhanh da dung qua lau ke tu lan duyet toan bo gan nhat chua"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT sync_id, finished_at FROM sync_runs WHERE status = 'completed' "
+                "ORDER BY sync_id DESC LIMIT 1"
+            ).fetchone()
+            if not row:
+                return True
+            quick_runs = self.conn.execute(
+                "SELECT COUNT(*) FROM sync_runs WHERE status = 'unchanged' AND sync_id > ?", (row[0],)
+            ).fetchone()[0]
+        
+        if max_quick_runs is not None and quick_runs >= max_quick_runs:
+            return True
+        return max_age is not None and time.time() - row[1] >= max_age
+    
+    def _full_sync(self, client, sync_id, page_size, batch_size, deadline=None):
+        """
+        Duyet toan bo followers vao bang tam roi so sanh voi snapshot.
+        Chi cac dong thay doi moi duoc ghi vao bang followers.
+        """
+        with self._lock:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS sync_seen (user_id TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM sync_seen")
+        
+        batch = []
+        for follower in client.iter_followers(page_size=page_size, deadline=deadline):
+            batch.append((follower.get('user_id'),))
+            if len(batch) >= batch_size:
+                self._insert_seen(batch)
+                batch = []
+        if batch:
+            self._insert_seen(batch)
+        
+        now = time.time()
+        with self._lock:
+            # Ghi log truoc khi cap nhat snapshot
+            added = self.conn.execute(
+                "INSERT INTO follower_changes (sync_id, user_id, change, changed_at) "
+                "SELECT ?, s.user_id, 'follow', ? FROM sync_seen s "
+                "LEFT JOIN followers f ON f.user_id = s.user_id AND f.active = 1 "
+                "WHERE f.user_id IS NULL",
+                (sync_id, now)
+            ).rowcount
+            removed = self.conn.execute(
+                "INSERT INTO follower_changes (sync_id, user_id, change, changed_at) "
+                "SELECT ?, f.user_id, 'unfollow', ? FROM followers f "
+                "WHERE f.active = 1 AND f.user_id NOT IN (SELECT user_id FROM sync_seen)",
+                (sync_id, now)
+            ).rowcount
+            
+            self.conn.execute(
+                "UPDATE followers SET active = 0, unfollowed_at = ? "
+                "WHERE active = 1 AND user_id NOT IN (SELECT user_id FROM sync_seen)",
+                (now,)
+            )
+            self.conn.execute(
+                "INSERT INTO followers (user_id, first_seen, active) "
+                "SELECT user_id, ?, 1 FROM follower_changes WHERE sync_id = ? AND change = 'follow' "
+                "ON CONFLICT(user_id) DO UPDATE SET active = 1, unfollowed_at = NULL",
+                (now, sync_id)
+            )
+            self.conn.execute("DELETE FROM sync_seen")
+            self.conn.commit()
+        
+        return added, removed
+    
+    def _insert_seen(self, batch):
+        with self._lock:
+            self.conn.executemany("INSERT OR IGNORE INTO sync_seen (user_id) VALUES (?)", batch)
+    
+    def _start_run(self, started_at):
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO sync_runs (started_at, status) VALUES (?, 'running')", (started_at,)
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+    
+    def _finish_run(self, sync_id, status, total, head, added, removed):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE sync_runs SET status = ?, finished_at = ?, total = ?, head = ?, added = ?, removed = ? "
+                "WHERE sync_id = ?",
+                (status, time.time(), total, json.dumps(head), added, removed, sync_id)
+            )
+            self.conn.commit()
+    
+    def _report(self, sync_id, status, total, added, removed, start_time):
+        return {
+            'success': True,
+            'sync_id': sync_id,
+            'status': status,
+            'total': total,
+            'added': added,
+            'removed': removed,
+            'elapsed': time.time() - start_time
+        }
+    
+    def count(self):
+        """So followers hien tai trong snapshot"""
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM followers WHERE active = 1").fetchone()[0]
+    
+    def iter_active(self, batch_size=FOLLOWER_SYNC_BATCH_SIZE):
+        """
+        Duyet user_id cua cac followers hien tai (vd de dua vao ZaloBroadcaster)
+        
+        Yields:
+            str: user_id
+        """
+        last_id = ''
+        while True:
+            with self._lock:
+                rows = self.conn.execute(
+                    "SELECT user_id FROM followers WHERE active = 1 AND user_id > ? "
+                    "ORDER BY user_id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            for (user_id,) in rows:
+                yield user_id
+            last_id = rows[-1][0]
+    
+    def changes(self, since_sync_id=0):
+        """
+        Lay log follow/unfollow sau mot lan sync
+        
+        Args:
+            since_sync_id (int): Chi lay thay doi co sync_id lon hon gia tri nay
+        
+        Returns:
+            list: [{'sync_id', 'user_id', 'change', 'changed_at'}, ...]
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT sync_id, user_id, change, changed_at FROM follower_changes "
+                "WHERE sync_id > ? ORDER BY id",
+                (since_sync_id,)
+            ).fetchall()
+        return [
+            {'sync_id': row[0], 'user_id': row[1], 'change': row[2], 'changed_at': row[3]}
+            for row in rows
+        ]
+
+
+def main():
+    """Dong bo followers vao database local"""
+    print("=" * 60)
+    print("ZALO OA FOLLOWER SYNC")
+    print("=" * 60)
+    
+    access_token = load_token_from_file()
+    if not access_token:
+        print("Error: No access token found")
+        print(f"Please run 'python zalo_oauth.py' first to get access token")
+        return
+    
+    store = FollowerStore()
+    with ZaloOAClient(access_token) as client:
+        report = store.sync(client)
+    
+    if report['success']:
+        print(f"Status: {report['status']}")
+        print(f"Total followers: {report['total']}")
+        print(f"New followers: {report['added']}")
+        print(f"Unfollows: {report['removed']}")
+        print(f"Elapsed: {report['elapsed']:.1f}s")
+    else:
+        print(f"Error: {report['error']}")
+    
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
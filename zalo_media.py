@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Media Upload
+Body multipart doc dan tu file (khong nap ca file vao bo nho) va cache attachment_id
+theo noi dung file (sha256) trong SQLite de moi file chi upload mot lan.
+"""
+
+import os
+import time
+import uuid
+import sqlite3
+import hashlib
+import threading
+import mimetypes
+from collections import OrderedDict
+
+from config import *
+
+
+class MultipartFileStream:
+    """
+    Body multipart/form-data mot file, doc tung doan khi gui.
+    Co __len__ nen requests gui kem Content-Length (khong dung chunked encoding).
+    """
+    
+    def __init__(self, file_path, field_name='file', content_type=None):
+        """
+        Args:
+            file_path (str): File can upload
+            field_name (str): Ten field cua form
+            content_type (str): MIME type cua file (mac dinh doan theo duoi file)
+        """
+        self.boundary = uuid.uuid4().hex
+        file_name = os.path.basename(file_path).replace('"', '%22')
+        content_type = content_type or mimetypes.guess_type(file_path)[0] or 'application/octet-stream'
+        
+        self._head = (
+            f"--{self.boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"{field_name}\"; filename=\"{file_name}\"\r\n"
+            f"Content-Type: {content_type}\r\n\r\n"
+        ).encode('utf-8')
+        self._tail = f"\r\n--{self.boundary}--\r\n".encode('ascii')
+        self._file = open(file_path, 'rb')
+        self._file_size = os.fstat(self._file.fileno()).st_size
+        self._length = len(self._head) + self._file_size + len(self._tail)
+        self._position = 0
+    
+    @property
+    def content_type(self):
+        """Gia tri header Content-Type (kem boundary)"""
+        return f"multipart/form-data; boundary={self.boundary}"
+    
+    def __len__(self):
+        return self._length
+    
+    def tell(self):
+        return self._position
+    
+    def seek(self, offset, whence=0):
+        """Doi vi tri doc (dung de gui lai body khi thu lai request)"""
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self._length
+        self._position = max(0, min(offset, self._length))
+        self._file.seek(max(0, min(self._position - len(self._head), self._file_size)))
+        return self._position
+    
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self._length - self._position
+        chunks = []
+        while size > 0 and self._position < self._length:
+            chunk = self._read_part(size)
+            chunks.append(chunk)
+            size -= len(chunk)
+            self._position += len(chunk)
+        return b''.join(chunks)
+    
+    def _read_part(self, size):
+        position = self._position
+        if position < len(self._head):
+            return self._head[position:position + size]
+        
+        position -= len(self._head)
+        if position < self._file_size:
+            chunk = self._file.read(min(size, self._file_size - position))
+            if not chunk:
+                raise IOError("File was truncated during upload")
+            return chunk
+        
+        position -= self._file_size
+        return self._tail[position:position + size]
+    
+    def close(self):
+        """Dong file"""
+        self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def file_digest(file_path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """
+    SHA-256 cua noi dung file (doc tung doan)
+    
+    Args:
+        file_path (str): Duong dan file
+        chunk_size (int): So byte moi lan doc
+    
+    Returns:
+        str: Hash dang hex
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class AttachmentCache:
+    """Cache attachment_id theo (scope, loai, hash noi dung file), luu trong SQLite co han dung"""
+    
+    def __init__(self, db_file=UPLOAD_CACHE_FILE, ttl=UPLOAD_CACHE_TTL, digest_cache_size=UPLOAD_DIGEST_CACHE_SIZE):
+        """
+        Args:
+            db_file (str): File SQLite (None = chi trong bo nho)
+            ttl (float): So giay mot attachment_id duoc dung lai ke tu luc upload
+            digest_cache_size (int): So file toi da duoc nho hash (LRU)
+        """
+        self.ttl = ttl
+        self.digest_cache_size = digest_cache_size
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._digests = OrderedDict()
+        self.conn = None
+        if db_file:
+            self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS attachments (
+                    scope TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    attachment_id TEXT NOT NULL,
+                    file_name TEXT,
+                    size INTEGER,
+                    uploaded_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    PRIMARY KEY (scope, kind, content_hash)
+                )
+            """)
+            self.conn.commit()
+    
+    def digest(self, file_path):
+        """
+        Hash noi dung file; nho theo (duong dan, kich thuoc, mtime) de gui lai cung file khong phai doc lai
+        
+        Returns:
+            str: SHA-256 dang hex
+        """
+        stat = os.stat(file_path)
+        key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            content_hash = self._digests.get(key)
+            if content_hash is not None:
+                self._digests.move_to_end(key)
+        if content_hash is None:
+            content_hash = file_digest(file_path)
+            with self._lock:
+                # Moi lan file doi (mtime) la mot khoa moi: bo khoa dung lau nhat de bo nho khong tang mai
+                self._digests[key] = content_hash
+                self._digests.move_to_end(key)
+                while len(self._digests) > self.digest_cache_size:
+                    self._digests.popitem(last=False)
+        return content_hash
+    
+    def get(self, scope, kind, content_hash):
+        """
+        attachment_id con han cua noi dung file
+        
+        Returns:
+            str or None: attachment_id, None neu chua upload hoac da het han
+        """
+        key = (scope, kind, content_hash)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    return entry[0]
+                del self._entries[key]
+            
+            if self.conn is None:
+                return None
+            row = self.conn.execute(
+                "SELECT attachment_id, expires_at FROM attachments "
+                "WHERE scope = ? AND kind = ? AND content_hash = ? AND expires_at > ?",
+                (scope, kind, content_hash, now)
+            ).fetchone()
+            if row:
+                self._entries[key] = (row[0], row[1])
+                return row[0]
+            return None
+    
+    def set(self, scope, kind, content_hash, attachment_id, file_name=None, size=None):
+        """Luu attachment_id vua upload"""
+        now = time.time()
+        expires_at = now + self.ttl
+        with self._lock:
+            self._entries[(scope, kind, content_hash)] = (attachment_id, expires_at)
+            if self.conn is not None:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO attachments "
+                    "(scope, kind, content_hash, attachment_id, file_name, size, uploaded_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (scope, kind, content_hash, attachment_id, file_name, size, now, expires_at)
+                )
+                self.conn.commit()
+    
+    def invalidate(self, scope=None, attachment_id=None):
+        """
+        Xoa attachment_id khoi cache (vd Zalo bao attachment khong con hop le)
+        
+        Args:
+            scope (str): Chi xoa cua scope nay (None = moi scope)
+            attachment_id (str): Chi xoa attachment nay (None = tat ca)
+        """
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if (scope is None or key[0] == scope) and (attachment_id is None or entry[0] == attachment_id):
+                    del self._entries[key]
+            if self.conn is not None:
+                conditions = []
+                params = []
+                if scope is not None:
+                    conditions.append("scope = ?")
+                    params.append(scope)
+                if attachment_id is not None:
+                    conditions.append("attachment_id = ?")
+                    params.append(attachment_id)
+                where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                self.conn.execute(f"DELETE FROM attachments{where}", params)
+                self.conn.commit()
+    
+    def purge_expired(self):
+        """
+        Xoa cac ban ghi het han khoi database
+        
+        Returns:
+            int: So ban ghi da xoa
+        """
+        if self.conn is None:
+            return 0
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM attachments WHERE expires_at <= ?", (time.time(),))
+            self.conn.commit()
+            return cursor.rowcount
+    
+    def close(self):
+        """Dong database"""
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+_default_attachment_cache = None
+_default_attachment_cache_lock = threading.Lock()
+
+
+def get_default_attachment_cache():
+    """
+    Cache attachment dung chung cho moi client trong process (tao tu config)
+    
+    Returns:
+        AttachmentCache or None: None neu UPLOAD_CACHE_ENABLED = False
+    """
+    global _default_attachment_cache
+    if not UPLOAD_CACHE_ENABLED:
+        return None
+    
+    with _default_attachment_cache_lock:
+        if _default_attachment_cache is None:
+            _default_attachment_cache = AttachmentCache(UPLOAD_CACHE_FILE, UPLOAD_CACHE_TTL)
+        return _default_attachment_cache
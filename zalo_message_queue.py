@@ -0,0 +1,484 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Message Queue
+Hang doi tin nhan ben vung (SQLite WAL) va worker pool gui qua ZaloOAClient.
+Dam bao at-least-once: tin chi duoc danh dau da gui sau khi Zalo xac nhan,
+tin dang gui khi process chet se duoc gui lai khi het lease.
+"""
+
+import time
+import sqlite3
+import threading
+
+from config import *
+from zalo_api_client import ZaloOAClient, load_token_from_file
+from zalo_retry import is_transient_error
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    dedup_key TEXT UNIQUE,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    enqueued_at REAL NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    sent_at REAL,
+    message_id TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_messages_pending ON messages(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_messages_lease ON messages(status, lease_until);
+"""
+
+STATUS_PENDING = 'pending'
+STATUS_INFLIGHT = 'inflight'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+
+class MessageQueue:
+    """Hang doi tin nhan trong SQLite, dung chung duoc giua nhieu process"""
+    
+    def __init__(self, db_file=MESSAGE_QUEUE_DB_FILE, max_attempts=MESSAGE_QUEUE_MAX_ATTEMPTS,
+                 retry_delay=MESSAGE_QUEUE_RETRY_DELAY):
+        """
+        Mo (hoac tao) database queue
+        
+        Args:
+            db_file (str): Duong dan file SQLite
+            max_attempts (int): So lan gui toi da truoc khi danh dau failed
+            retry_delay (float): Thoi gian cho co ban truoc khi gui lai (giay)
+        """
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self._lock = threading.Lock()
+        self._new_message = threading.Event()
+        self.conn = sqlite3.connect(db_file, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+    
+    def close(self):
+        """Dong database"""
+        self.conn.close()
+    
+    def enqueue(self, user_id, message, dedup_key=None):
+        """
+        Them mot tin nhan vao queue
+        
+        Args:
+            user_id (str): ID cua user nhan
+            message (str): Noi dung tin nhan
+            dedup_key (str): Khoa chong trung (tin cung khoa chi duoc them mot lan)
+        
+        Returns:
+            int or None: ID cua tin trong queue (None neu trung dedup_key)
+        """
+        ids = self.enqueue_many([(user_id, message, dedup_key)])
+        return ids[0]
+    
+    def enqueue_many(self, messages):
+        """
+        Them nhieu tin nhan trong mot transaction
+        
+        Args:
+            messages (iterable): Cac tuple (user_id, message) hoac (user_id, message, dedup_key)
+        
+        Returns:
+            list: ID cua tung tin (None neu trung dedup_key)
+        """
+        now = time.time()
+        ids = []
+        with self._lock:
+            for item in messages:
+                user_id, message = item[0], item[1]
+                dedup_key = item[2] if len(item) > 2 else None
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO messages (user_id, message, dedup_key, enqueued_at, available_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (user_id, message, dedup_key, now, now)
+                )
+                ids.append(cursor.lastrowid if cursor.rowcount else None)
+            self.conn.commit()
+        
+        self.wake()
+        return ids
+    
+    def claim(self, limit, lease=MESSAGE_QUEUE_LEASE):
+        """
+        Lay toi da `limit` tin san sang gui va giu chung trong `lease` giay
+        
+        Tin het lease (worker chet giua chung) duoc tinh la mot lan gui; tin da het
+        so lan gui thi danh dau failed thay vi gui lai mai.
+        
+        Args:
+            limit (int): So tin toi da
+            lease (float): So giay giu tin (het han thi tin duoc lay lai de gui)
+        
+        Returns:
+            list: [{'id', 'user_id', 'message', 'attempts', 'lease_until'}, ...]
+        """
+        now = time.time()
+        lease_until = now + lease
+        items, expired = [], []
+        with self._lock:
+            # BEGIN IMMEDIATE: process khac khong the lay cung cac tin nay
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.conn.execute(
+                    "SELECT id, user_id, message, attempts, status FROM messages "
+                    "WHERE (status = 'pending' AND available_at <= ?) "
+                    "OR (status = 'inflight' AND lease_until < ?) "
+                    "ORDER BY id LIMIT ?",
+                    (now, now, limit)
+                ).fetchall()
+                for message_id, user_id, message, attempts, status in rows:
+                    if status == 'inflight':
+                        attempts += 1
+                        if attempts >= self.max_attempts:
+                            expired.append((attempts, message_id))
+                            continue
+                    items.append({'id': message_id, 'user_id': user_id, 'message': message,
+                                  'attempts': attempts, 'lease_until': lease_until})
+                
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'inflight', attempts = ?, lease_until = ? WHERE id = ?",
+                    [(item['attempts'], lease_until, item['id']) for item in items]
+                )
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'failed', attempts = ?, error = 'Lease expired', "
+                    "lease_until = NULL WHERE id = ?",
+                    expired
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        
+        return items
+    
+    def ack(self, results):
+        """
+        Ghi ket qua gui cua nhieu tin trong mot transaction
+        
+        Chi ghi tin con dang giu dung lease da lay: ack tre (lease da het va tin da
+        duoc worker khac lay lai) khong ghi de ket qua cua worker do.
+        
+        Args:
+            results (list): Cac tuple (item, result) voi item tu claim() va result tu send_text_message
+        """
+        now = time.time()
+        sent, retry, failed = [], [], []
+        for item, result in results:
+            attempts = item['attempts'] + 1
+            if result.get('success'):
+                message_id = (result.get('data') or {}).get('message_id')
+                sent.append((now, attempts, message_id, item['id'], item['lease_until']))
+            elif self.should_retry(result) and attempts < self.max_attempts:
+                delay = min(self.retry_delay * (2 ** (attempts - 1)), 3600)
+                retry.append((now + delay, attempts, result.get('error'), item['id'], item['lease_until']))
+            else:
+                failed.append((attempts, result.get('error'), item['id'], item['lease_until']))
+        
+        with self._lock:
+            try:
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'sent', sent_at = ?, attempts = ?, message_id = ?, "
+                    "lease_until = NULL, error = NULL WHERE id = ? AND status = 'inflight' AND lease_until = ?",
+                    sent
+                )
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'pending', available_at = ?, attempts = ?, error = ?, "
+                    "lease_until = NULL WHERE id = ? AND status = 'inflight' AND lease_until = ?",
+                    retry
+                )
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'failed', attempts = ?, error = ?, lease_until = NULL "
+                    "WHERE id = ? AND status = 'inflight' AND lease_until = ?",
+                    failed
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+    
+    def release(self, items):
+        """Tra cac tin da lay nhung chua gui ve queue (khong tinh la mot lan gui)"""
+        with self._lock:
+            try:
+                self.conn.executemany(
+                    "UPDATE messages SET status = 'pending', lease_until = NULL "
+                    "WHERE id = ? AND status = 'inflight' AND lease_until = ?",
+                    [(item['id'], item['lease_until']) for item in items]
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        self.wake()
+    
+    @staticmethod
+    def should_retry(result):
+        """
+        Loi tam thoi, loi ket noi (co the da toi Zalo hoac chua: gui lai, chap nhan trung),
+        hoac request chua toi Zalo (circuit breaker mo, het deadline cho rate limit)
+        """
+        return is_transient_error(result) or 'exception' in result or result.get('attempts') == 0
+    
+    def wake(self):
+        """Danh thuc cac worker dang cho tin moi"""
+        self._new_message.set()
+    
+    def wait_for_messages(self, timeout):
+        """Cho den khi co tin moi duoc them (trong process nay) hoac het timeout"""
+        woken = self._new_message.wait(timeout)
+        self._new_message.clear()
+        return woken
+    
+    def stats(self):
+        """
+        So tin theo trang thai
+        
+        Returns:
+            dict: pending, inflight, sent, failed
+        """
+        with self._lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) FROM messages GROUP BY status").fetchall()
+        counts = {STATUS_PENDING: 0, STATUS_INFLIGHT: 0, STATUS_SENT: 0, STATUS_FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+    
+    def purge_sent(self, older_than=86400):
+        """
+        Xoa cac tin da gui xong tu lau
+        
+        Args:
+            older_than (float): So giay ke tu luc gui
+        
+        Returns:
+            int: So tin da xoa
+        """
+        with self._lock:
+            deleted = self.conn.execute(
+                "DELETE FROM messages WHERE status = 'sent' AND sent_at < ?", (time.time() - older_than,)
+            ).rowcount
+            self.conn.commit()
+        return deleted
+
+
+class MessageQueueWorker:
+    """Worker pool lay tin tu MessageQueue, gui qua ZaloOAClient va ghi ket qua theo lo"""
+    
+    def __init__(self, queue, client, workers=MESSAGE_QUEUE_WORKERS, claim_size=MESSAGE_QUEUE_CLAIM_SIZE,
+                 commit_batch=MESSAGE_QUEUE_COMMIT_BATCH, commit_interval=MESSAGE_QUEUE_COMMIT_INTERVAL,
+                 lease=MESSAGE_QUEUE_LEASE, idle_interval=1.0, error_backoff=MESSAGE_QUEUE_ERROR_BACKOFF,
+                 error_backoff_max=MESSAGE_QUEUE_ERROR_BACKOFF_MAX):
+        """
+        Args:
+            queue (MessageQueue): Queue can gui
+            client (ZaloOAClient): Client dung de gui (nen co pool_maxsize >= workers)
+            workers (int): So worker gui song song
+            claim_size (int): So tin moi worker lay mot lan
+            commit_batch (int): So ket qua toi da moi lan commit
+            commit_interval (float): Thoi gian toi da giua hai lan commit (giay)
+            lease (float): Thoi gian giu tin da lay (giay)
+            idle_interval (float): Thoi gian cho khi queue rong truoc khi kiem tra lai (giay)
+            error_backoff (float): Thoi gian cho sau loi database truoc khi thu lai (giay, tang gap doi)
+            error_backoff_max (float): Thoi gian cho toi da sau loi database (giay)
+        """
+        self.queue = queue
+        self.client = client
+        self.workers = workers
+        self.claim_size = claim_size
+        self.commit_batch = commit_batch
+        self.commit_interval = commit_interval
+        self.lease = lease
+        self.idle_interval = idle_interval
+        self.error_backoff = error_backoff
+        self.error_backoff_max = error_backoff_max
+        
+        self.sent = 0
+        self.failed = 0
+        self.errors = 0
+        self._stopping = threading.Event()
+        self._exit_when_idle = False
+        self._acks = []
+        self._acks_cond = threading.Condition()
+        self._committer_done = False
+        self._threads = []
+        self._committer = None
+    
+    def start(self, exit_when_idle=False):
+        """
+        Chay worker pool trong cac thread nen
+        
+        Args:
+            exit_when_idle (bool): Worker tu dung khi queue khong con tin san sang gui
+        """
+        self._stopping.clear()
+        self._exit_when_idle = exit_when_idle
+        self._committer_done = False
+        self._committer = threading.Thread(target=self._run_committer, name='zalo-queue-committer', daemon=True)
+        self._committer.start()
+        self._threads = [
+            threading.Thread(target=self._run_worker, name=f'zalo-queue-worker-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+    
+    def stop(self):
+        """
+        Dung nhan tin moi, cho cac tin dang gui xong va ghi het ket qua.
+        Tin da lay nhung chua gui duoc tra lai queue.
+        """
+        self._stopping.set()
+        self.queue.wake()
+        self.join()
+    
+    def join(self):
+        """Cho cac worker dung va ghi het ket qua con lai"""
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        
+        if self._committer:
+            with self._acks_cond:
+                self._committer_done = True
+                self._acks_cond.notify()
+            self._committer.join()
+            self._committer = None
+    
+    def drain(self):
+        """
+        Gui het tin dang san sang trong queue roi dung (vd chay tu cron)
+        
+        Returns:
+            dict: sent, failed, errors (loi database) trong lan chay nay va so tin theo trang thai trong queue
+        """
+        self.start(exit_when_idle=True)
+        self.join()
+        return {'sent': self.sent, 'failed': self.failed, 'errors': self.errors, 'queue': self.queue.stats()}
+    
+    def _run_worker(self):
+        failures = 0
+        while not self._stopping.is_set():
+            try:
+                items = self.queue.claim(self.claim_size, self.lease)
+            except Exception as e:
+                # Vd "database is locked" qua busy timeout: cho roi thu lai, khong de thread chet
+                failures += 1
+                self._log_error('claim', e)
+                self._stopping.wait(self._error_delay(failures))
+                continue
+            failures = 0
+            
+            if not items:
+                if self._exit_when_idle:
+                    return
+                self.queue.wait_for_messages(self.idle_interval)
+                continue
+            
+            for index, item in enumerate(items):
+                if self._stopping.is_set():
+                    try:
+                        self.queue.release(items[index:])
+                    except Exception as e:
+                        # Khong tra lai duoc: tin se duoc gui khi het lease
+                        self._log_error('release', e)
+                    return
+                try:
+                    result = self.client.send_text_message(item['user_id'], item['message'])
+                except Exception as e:
+                    result = {'success': False, 'error': str(e)}
+                self._add_ack(item, result)
+    
+    def _add_ack(self, item, result):
+        with self._acks_cond:
+            self._acks.append((item, result))
+            if result.get('success'):
+                self.sent += 1
+            elif not (MessageQueue.should_retry(result) and item['attempts'] + 1 < self.queue.max_attempts):
+                self.failed += 1
+            if len(self._acks) >= self.commit_batch:
+                self._acks_cond.notify()
+    
+    def _run_committer(self):
+        failures = 0
+        while True:
+            with self._acks_cond:
+                # Gom ket qua: commit khi du lo hoac sau commit_interval
+                if len(self._acks) < self.commit_batch and not self._committer_done:
+                    self._acks_cond.wait(self.commit_interval)
+                acks, self._acks = self._acks, []
+                done = self._committer_done
+            
+            if acks:
+                try:
+                    self.queue.ack(acks)
+                    failures = 0
+                except Exception as e:
+                    failures += 1
+                    if done and failures >= 3:
+                        # Dang dung ma van loi: cac tin nay se duoc gui lai khi het lease (at-least-once)
+                        self._log_error('ack', e)
+                        return
+                    self._log_error('ack', e)
+                    with self._acks_cond:
+                        self._acks[:0] = acks
+                    time.sleep(self._error_delay(failures))
+                    continue
+            if done and not acks:
+                return
+    
+    def _log_error(self, operation, error):
+        with self._acks_cond:
+            self.errors += 1
+        print(f"Message queue {operation} failed: {type(error).__name__}: {str(error)}")
+    
+    def _error_delay(self, failures):
+        """Thoi gian cho truoc khi thu lai, tang gap doi theo so lan loi lien tiep"""
+        return min(self.error_backoff * (2 ** (failures - 1)), self.error_backoff_max)
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+def main():
+    """Gui het tin dang cho trong queue"""
+    print("=" * 60)
+    print("ZALO OA MESSAGE QUEUE")
+    print("=" * 60)
+    
+    access_token = load_token_from_file()
+    if not access_token:
+        print("Error: No access token found")
+        print(f"Please run 'python zalo_oauth.py' first to get access token")
+        return
+    
+    queue = MessageQueue()
+    print(f"Queue: {queue.stats()}")
+    
+    with ZaloOAClient(access_token, pool_maxsize=MESSAGE_QUEUE_WORKERS) as client:
+        start_time = time.time()
+        report = MessageQueueWorker(queue, client).drain()
+    
+    print(f"Sent: {report['sent']}, Failed: {report['failed']}")
+    print(f"Elapsed: {time.time() - start_time:.1f}s")
+    print(f"Queue: {report['queue']}")
+    queue.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Message Templates
+Body tin nhan (text, anh, list, button) duoc dung va serialize JSON mot lan,
+moi lan gui chi chen user_id va bien rieng cua user vao bytes da encode san.
+"""
+
+import re
+import json
+from string import Formatter
+
+
+# Bien trong template duoc thay bang marker nay truoc khi serialize (json.dumps luon escape
+# ky tu dieu khien thanh \u001e / \u001f nen marker giu nguyen va tim lai duoc trong bytes).
+# Chuoi chi gom mot bien ("{user_id}") dung marker ket thuc rieng: gia tri khong phai str
+# (vd user_id kieu int) duoc giu nguyen kieu JSON thay vi thanh chuoi.
+MARKER_START = '\x1e'
+MARKER_END = '\x1f'
+MARKER_VALUE_END = '\x1d'
+MARKER_PATTERN = re.compile(rb'"\\u001e(\d+)\\u001d"|\\u001e(\d+)\\u001f')
+
+# Gia tri khong can escape JSON (vd user_id) duoc chen thang
+SAFE_VALUE_PATTERN = re.compile(r'[^"\\\x00-\x1f]*')
+
+RECIPIENT_VARIABLE = 'user_id'
+
+
+def encode_value(value):
+    """
+    Encode gia tri de chen vao giua chuoi JSON (khong co dau ngoac kep hai dau)
+    
+    Args:
+        value: Gia tri (chuyen thanh str)
+    
+    Returns:
+        bytes: Gia tri da escape, UTF-8
+    """
+    text = str(value)
+    try:
+        if SAFE_VALUE_PATTERN.fullmatch(text):
+            return text.encode('utf-8')
+        return json.dumps(text, ensure_ascii=False)[1:-1].encode('utf-8')
+    except UnicodeEncodeError:
+        # Surrogate le (khong encode duoc UTF-8): escape \uXXXX nhu json.dumps mac dinh
+        return json.dumps(text)[1:-1].encode('ascii')
+
+
+def encode_json_value(value):
+    """
+    Encode gia tri thanh mot gia tri JSON hoan chinh (str co dau ngoac kep, so/bool giu nguyen kieu)
+    
+    Returns:
+        bytes: Gia tri JSON, UTF-8
+    """
+    if isinstance(value, str):
+        return b'"' + encode_value(value) + b'"'
+    return json.dumps(value).encode('ascii')
+
+
+class MessageTemplate:
+    """
+    Body tin nhan /oa/message da compile. Chuoi trong message co the chua bien
+    dang {ten_bien} ({{ va }} la dau ngoac nhon that); {user_id} la ID nguoi nhan.
+    """
+    
+    def __init__(self, message):
+        """
+        Compile message
+        
+        Args:
+            message (dict): Phan "message" cua body, vd {"text": "Xin chao {name}"}
+        """
+        self.message = message
+        self.variables = []
+        self._slots = {}
+        
+        body = {
+            'recipient': {'user_id': self._marker(RECIPIENT_VARIABLE, MARKER_VALUE_END)},
+            'message': self._compile(message)
+        }
+        try:
+            encoded = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        except UnicodeEncodeError:
+            encoded = json.dumps(body, separators=(',', ':')).encode('ascii')
+        
+        # Tach bytes thanh cac doan co dinh xen ke vi tri bien: [doan, bien, doan, bien, ..., doan];
+        # moi vi tri la (ten bien, True neu la ca gia tri JSON)
+        parts = MARKER_PATTERN.split(encoded)
+        self._segments = parts[0::3]
+        self._slots_order = [
+            (self.variables[int(value_index)], True) if value_index is not None
+            else (self.variables[int(text_index)], False)
+            for value_index, text_index in zip(parts[1::3], parts[2::3])
+        ]
+    
+    def _marker(self, name, end=MARKER_END):
+        if name not in self._slots:
+            self._slots[name] = len(self.variables)
+            self.variables.append(name)
+        return f"{MARKER_START}{self._slots[name]}{end}"
+    
+    def _compile(self, value):
+        if isinstance(value, dict):
+            return {key: self._compile(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [self._compile(item) for item in value]
+        if not isinstance(value, str):
+            return value
+        
+        if MARKER_START in value or MARKER_END in value or MARKER_VALUE_END in value:
+            raise ValueError("Message text must not contain \\x1d, \\x1e or \\x1f")
+        parsed = list(Formatter().parse(value))
+        for literal, field_name, format_spec, conversion in parsed:
+            if field_name is not None and (not field_name.isidentifier() or format_spec or conversion):
+                raise ValueError(f"Unsupported template field: {{{field_name}}}")
+        
+        # Chuoi chi la mot bien: thay ca gia tri (giu kieu JSON cua gia tri)
+        if len(parsed) == 1 and not parsed[0][0] and parsed[0][1] is not None:
+            return self._marker(parsed[0][1], MARKER_VALUE_END)
+        
+        compiled = []
+        for literal, field_name, format_spec, conversion in parsed:
+            compiled.append(literal)
+            if field_name is not None:
+                compiled.append(self._marker(field_name))
+        return ''.join(compiled)
+    
+    def render(self, user_id, **variables):
+        """
+        Tao body cho mot nguoi nhan
+        
+        Args:
+            user_id (str): ID cua user nhan
+            **variables: Gia tri cac bien trong template
+        
+        Returns:
+            bytes: Body JSON (UTF-8) de gui len /oa/message
+        
+        Raises:
+            KeyError: Thieu gia tri cua mot bien
+            TypeError: Gia tri khong chuyen duoc thanh JSON
+        """
+        variables[RECIPIENT_VARIABLE] = user_id
+        values = {}
+        segments = self._segments
+        output = [segments[0]]
+        for index, slot in enumerate(self._slots_order, 1):
+            value = values.get(slot)
+            if value is None:
+                name, whole = slot
+                value = encode_json_value(variables[name]) if whole else encode_value(variables[name])
+                values[slot] = value
+            output.append(value)
+            output.append(segments[index])
+        return b''.join(output)
+
+
+def text_message(text):
+    """
+    Tin nhan text
+    
+    Args:
+        text (str): Noi dung (co the co bien {ten_bien})
+    """
+    return MessageTemplate({'text': text})
+
+
+def image_message(url=None, attachment_id=None, text=None):
+    """
+    Tin nhan anh (tu URL hoac attachment_id da upload)
+    
+    Args:
+        url (str): URL anh
+        attachment_id (str): ID anh da upload len Zalo
+        text (str): Chu thich kem anh
+    """
+    if bool(url) == bool(attachment_id):
+        raise ValueError("Provide exactly one of url or attachment_id")
+    element = {'media_type': 'image'}
+    if url:
+        element['url'] = url
+    else:
+        element['attachment_id'] = attachment_id
+    
+    message = {}
+    if text:
+        message['text'] = text
+    message['attachment'] = {
+        'type': 'template',
+        'payload': {'template_type': 'media', 'elements': [element]}
+    }
+    return MessageTemplate(message)
+
+
+def list_message(elements, buttons=None):
+    """
+    Tin nhan dang list (toi da 5 phan tu)
+    
+    Args:
+        elements (list): Cac dict co title, subtitle, image_url, url (url mo khi bam vao phan tu)
+        buttons (list): Button them duoi list (xem url_button, query_button, phone_button)
+    """
+    compiled = []
+    for element in elements:
+        item = {'title': element['title']}
+        for key in ('subtitle', 'image_url'):
+            if element.get(key):
+                item[key] = element[key]
+        if element.get('url'):
+            item['default_action'] = {'type': 'oa.open.url', 'url': element['url']}
+        compiled.append(item)
+    
+    payload = {'template_type': 'list', 'elements': compiled}
+    if buttons:
+        payload['buttons'] = list(buttons)
+    return MessageTemplate({'attachment': {'type': 'template', 'payload': payload}})
+
+
+def button_message(text, buttons):
+    """
+    Tin nhan text kem button
+    
+    Args:
+        text (str): Noi dung
+        buttons (list): Cac button (xem url_button, query_button, phone_button)
+    """
+    return MessageTemplate({
+        'text': text,
+        'attachment': {'type': 'template', 'payload': {'buttons': list(buttons)}}
+    })
+
+
+def url_button(title, url):
+    """Button mo URL"""
+    return {'title': title, 'type': 'oa.open.url', 'payload': {'url': url}}
+
+
+def query_button(title, payload):
+    """Button gui lai payload cho OA duoi dang tin nhan cua user (nhan qua webhook)"""
+    return {'title': title, 'type': 'oa.query.show', 'payload': payload}
+
+
+def phone_button(title, phone_code):
+    """Button goi dien"""
+    return {'title': title, 'type': 'oa.open.phone', 'payload': {'phone_code': phone_code}}
+
+
+# Template dung cho send_text_message: noi dung la gia tri bien nen {} trong tin nhan giu nguyen
+TEXT_MESSAGE = text_message('{text}')
@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Metrics
+Counter va histogram do tre theo endpoint, xuat ra dang Prometheus text
+"""
+
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config import *
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = []
+    for name, value in pairs:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{name}="{value}"')
+    return '{' + ','.join(escaped) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Bien dem tang dan, tach theo label"""
+    
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def inc(self, *labels, amount=1):
+        """
+        Tang bien dem
+        
+        Args:
+            *labels: Gia tri label theo thu tu labelnames
+            amount (float): Gia tri cong them
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+    
+    def value(self, *labels):
+        """Gia tri hien tai cua mot bo label"""
+        with self._lock:
+            return self._values.get(labels, 0)
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items(), key=lambda item: tuple(map(str, item[0])))
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Histogram (vd do tre) voi cac bucket co dinh, tach theo label"""
+    
+    def __init__(self, name, help_text, labelnames=(), buckets=METRICS_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = sorted(buckets)
+        self._values = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value, *labels):
+        """
+        Ghi nhan mot gia tri
+        
+        Args:
+            value (float): Gia tri (vd so giay)
+            *labels: Gia tri label theo thu tu labelnames
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[labels] = entry
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+    
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted(((labels, (list(e[0]), e[1], e[2])) for labels, e in self._values.items()),
+                           key=lambda item: tuple(map(str, item[0])))
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + [float('inf')], counts):
+                cumulative += bucket_count
+                label_text = _format_labels(self.labelnames, labels, ('le', _format_value(float(bound))))
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_text} {count}")
+        return lines
+
+
+class ClientMetrics:
+    """Cac metric cua ZaloOAClient"""
+    
+    def __init__(self):
+        self.requests = Counter(
+            'zalo_api_requests_total',
+            'Zalo OA API requests by endpoint, HTTP status and Zalo error code',
+            ('endpoint', 'status', 'error_code')
+        )
+        self.latency = Histogram(
+            'zalo_api_request_duration_seconds',
+            'Zalo OA API request latency in seconds',
+            ('endpoint',)
+        )
+        self.retries = Counter(
+            'zalo_api_retries_total',
+            'Zalo OA API retries after a transient error',
+            ('endpoint',)
+        )
+        self.rejected = Counter(
+            'zalo_api_circuit_rejected_total',
+            'Zalo OA API calls rejected because the circuit breaker was open',
+            ('endpoint',)
+        )
+        self.cache_hits = Counter(
+            'zalo_api_cache_hits_total',
+            'Zalo OA API calls served from the response cache',
+            ('endpoint',)
+        )
+    
+    def observe_request(self, endpoint, duration, status, error_code):
+        """
+        Ghi nhan mot lan goi API
+        
+        Args:
+            endpoint (str): Duong dan endpoint
+            duration (float): Thoi gian goi (giay)
+            status: HTTP status code hoac 'exception'
+            error_code: Ma loi Zalo (None neu khong co)
+        """
+        self.requests.inc(endpoint, status, '' if error_code is None else error_code)
+        self.latency.observe(duration, endpoint)
+    
+    def metrics(self):
+        return [self.requests, self.latency, self.retries, self.rejected, self.cache_hits]
+    
+    def render(self):
+        """
+        Xuat tat ca metric dang Prometheus text
+        
+        Returns:
+            str: Noi dung cho endpoint /metrics
+        """
+        lines = []
+        for metric in self.metrics():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def get_default_metrics():
+    """
+    Metrics dung chung cho moi client trong process
+    
+    Returns:
+        ClientMetrics or None: None neu METRICS_ENABLED = False
+    """
+    global _default_metrics
+    if not METRICS_ENABLED:
+        return None
+    
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = ClientMetrics()
+        return _default_metrics
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """Handler tra ve metrics tai /metrics"""
+    
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_response(404)
+            self.end_headers()
+            return
+        
+        body = self.server.metrics.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Override log message to reduce noise"""
+        pass
+
+
+def start_metrics_server(port=METRICS_PORT, host=METRICS_HOST, metrics=None):
+    """
+    Chay HTTP server xuat metrics (Prometheus) trong thread nen
+    
+    Args:
+        port (int): Cong lang nghe
+        host (str): Dia chi lang nghe
+        metrics (ClientMetrics): Metrics can xuat (mac dinh dung chung trong process)
+    
+    Returns:
+        ThreadingHTTPServer: Server (goi shutdown() de dung)
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.metrics = metrics or get_default_metrics() or ClientMetrics()
+    
+    thread = threading.Thread(target=server.serve_forever, name='zalo-metrics-server', daemon=True)
+    thread.start()
+    return server
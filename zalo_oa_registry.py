@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Registry
+Quan ly token va client cua nhieu OA trong mot process, dung chung mot connection pool
+"""
+
+import time
+import threading
+
+from config import *
+from zalo_api_client import ZaloOAClient
+from zalo_rate_limit import RateLimiter
+from zalo_retry import CircuitBreakerRegistry
+from zalo_token_store import TokenStore, get_default_token_store
+from zalo_token_refresher import TokenRefresher
+from zalo_transport import create_transport
+
+
+class OARegistry:
+    """Registry cac OA theo oa_id: token, thoi han, client va refresh token nen"""
+    
+    def __init__(self, store=None, session=None, pool_maxsize=OA_REGISTRY_POOL_MAXSIZE):
+        """
+        Args:
+            store (TokenStore): Token store chua token cac OA (mac dinh dung chung trong process)
+            session (requests.Session): Session/transport dung chung (neu None se tao theo HTTP_TRANSPORT)
+            pool_maxsize (int): So ket noi toi da cua pool dung chung
+        """
+        self.store = store or get_default_token_store()
+        self._owns_session = session is None
+        self.session = session or create_transport(HTTP_TRANSPORT, pool_maxsize=pool_maxsize)
+        
+        self._lock = threading.Lock()
+        self._clients = {}
+        self._refreshers = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def register(self, oa_id, access_token=None, refresh_token=None, expires_at=None):
+        """
+        Them OA vao registry. Neu co access_token thi luu vao token store,
+        neu khong thi dung token da co trong store.
+        
+        Args:
+            oa_id (str): ID cua OA
+            access_token (str): Access token
+            refresh_token (str): Refresh token
+            expires_at (float): Thoi diem het han (epoch seconds)
+        
+        Returns:
+            ZaloOAClient: Client cua OA
+        """
+        if access_token:
+            record = dict(self.store.get(oa_id) or {})
+            record.update({
+                'oa_id': oa_id,
+                'app_id': APP_ID,
+                'access_token': access_token,
+                'refresh_token': refresh_token or record.get('refresh_token'),
+                'generated_at': time.time(),
+                'expires_at': expires_at
+            })
+            self.store.save(record, make_current=False)
+        
+        with self._lock:
+            self._clients.pop(oa_id, None)
+        return self.client(oa_id)
+    
+    def load_from_store(self):
+        """
+        Tao client cho tat ca OA co trong token store
+        
+        Returns:
+            list: Danh sach oa_id
+        """
+        oa_ids = list(self.store.all().keys())
+        for oa_id in oa_ids:
+            self.client(oa_id)
+        return oa_ids
+    
+    def oa_ids(self):
+        """Danh sach oa_id dang co client"""
+        with self._lock:
+            return list(self._clients.keys())
+    
+    def client(self, oa_id):
+        """
+        Lay (hoac tao) client cua OA
+        
+        Args:
+            oa_id (str): ID cua OA
+        
+        Returns:
+            ZaloOAClient: Client dung session chung
+        
+        Raises:
+            KeyError: Neu OA chua co token
+        """
+        with self._lock:
+            client = self._clients.get(oa_id)
+            if client is not None:
+                return client
+            
+            record = self.store.get(oa_id)
+            if not record or not record.get('access_token'):
+                raise KeyError(f"No token for OA {oa_id}")
+            
+            # Quota tinh theo tung OA nen moi OA co rate limiter rieng
+            state_file = f"{RATE_LIMIT_STATE_FILE}.{oa_id}" if RATE_LIMIT_STATE_FILE else None
+            rate_limiter = RateLimiter(state_file=state_file) if RATE_LIMIT_ENABLED else False
+            # Breaker cung theo tung OA: loi cua mot OA (token bi thu hoi...) khong chan OA khac
+            circuit_breakers = CircuitBreakerRegistry() if CIRCUIT_BREAKER_ENABLED else False
+            
+            client = ZaloOAClient(record['access_token'], session=self.session, rate_limiter=rate_limiter,
+                                  circuit_breakers=circuit_breakers)
+            self._clients[oa_id] = client
+            
+            refresher = TokenRefresher(self.store, oa_id)
+            refresher.register(client)
+            self._refreshers[oa_id] = refresher
+            return client
+    
+    def token_info(self, oa_id):
+        """
+        Thong tin token cua OA (khong gom token)
+        
+        Returns:
+            dict or None: oa_id, oa_name, expires_at, valid
+        """
+        record = self.store.get(oa_id)
+        if not record:
+            return None
+        return {
+            'oa_id': oa_id,
+            'oa_name': record.get('oa_name'),
+            'expires_at': record.get('expires_at'),
+            'valid': TokenStore.is_valid(record)
+        }
+    
+    def call(self, oa_id, method, *args, **kwargs):
+        """
+        Goi mot method cua ZaloOAClient cho OA chi dinh
+        
+        Args:
+            oa_id (str): ID cua OA
+            method (str): Ten method, vd 'send_text_message'
+            *args, **kwargs: Tham so cua method
+        
+        Returns:
+            dict: Ket qua cua method hoac error
+        """
+        try:
+            client = self.client(oa_id)
+        except KeyError as e:
+            return {'success': False, 'error': str(e.args[0])}
+        return getattr(client, method)(*args, **kwargs)
+    
+    def start_refresh(self):
+        """Chay mot thread nen refresh token cho tat ca OA trong registry"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run_refresh, name='zalo-oa-registry-refresh', daemon=True)
+        self._thread.start()
+    
+    def _run_refresh(self):
+        retry_at = {}
+        while not self._stop_event.is_set():
+            with self._lock:
+                refreshers = list(self._refreshers.values())
+            
+            now = time.time()
+            next_wait = TOKEN_REFRESH_RETRY_INTERVAL
+            for refresher in refreshers:
+                wait_time = max(refresher.seconds_until_refresh(), retry_at.get(refresher.oa_id, 0) - now)
+                if wait_time > 0:
+                    refresher.sync_clients()
+                    next_wait = min(next_wait, wait_time)
+                    continue
+                
+                result = refresher.refresh_now(force=False)
+                if not result['success']:
+                    print(f"Token refresh failed for OA {refresher.oa_id}: {result['error']}")
+                    retry_at[refresher.oa_id] = now + TOKEN_REFRESH_RETRY_INTERVAL
+            
+            self._stop_event.wait(max(1.0, next_wait))
+    
+    def close(self):
+        """Dung refresh va dong connection pool dung chung"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        if self._owns_session:
+            self.session.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
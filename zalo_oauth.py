@@ -4,27 +4,33 @@ Zalo OA OAuth Client
 Lay access token cho Zalo Official Account
 """
 
-import requests
 import urllib.parse
-import webbrowser
 import time
 import json
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 import threading
 
 # Import configuration
 from config import *
+from zalo_token_store import get_default_token_store, build_token_record, atomic_write_text
+from zalo_transport import get_default_transport
 
 
 class ZaloOAuthHandler(BaseHTTPRequestHandler):
     """Handler cho OAuth callback"""
     
+    # Khong de mot ket noi treo giu thread cua server mai
+    timeout = 30
+    
     def do_GET(self):
         """Xu ly GET request cho OAuth callback"""
-        if self.path.startswith('/?'):
+        from urllib.parse import parse_qs, urlparse
+        parsed_url = urlparse(self.path)
+        
+        if parsed_url.path == '/result':
+            self.send_result_response()
+        elif self.path.startswith('/?'):
             # Parse URL parameters
-            from urllib.parse import parse_qs, urlparse
-            parsed_url = urlparse(self.path)
             params = parse_qs(parsed_url.query)
             
             if 'code' in params:
@@ -36,130 +42,142 @@ class ZaloOAuthHandler(BaseHTTPRequestHandler):
                 print(f"OA ID: {oa_id}")
                 print(f"State: {state}")
                 
-                # Xu ly ngay lap tuc
-                result = self.exchange_code_for_token(code, oa_id)
-                html_response = self.generate_html_response(code, oa_id, result)
-                
-                self.send_response(200)
-                self.send_header('Content-type', 'text/html; charset=utf-8')
-                self.end_headers()
-                self.wfile.write(html_response.encode('utf-8'))
+                # State khac voi state da gui di: callback khong phai tu OAuth URL cua minh
+                expected_state = getattr(self.server, 'oauth_state', None)
+                if expected_state and state != expected_state:
+                    self.send_error_response("Invalid state")
+                    return
                 
-                # Luu ket qua vao server
-                self.server.oauth_result = result
+                # Tra loi browser ngay, doi token va test token trong background
+                self.start_authorization(code, oa_id)
+                self.send_html_response(200, self.generate_pending_response())
                 
             else:
                 self.send_error_response("No authorization code found")
         else:
             self.send_error_response("Invalid callback URL")
     
+    def start_authorization(self, code, oa_id):
+        """Chay doi token trong thread rieng (bo qua neu callback bi goi lai, vd reload trang)"""
+        with self.server.oauth_lock:
+            if self.server.oauth_code is not None:
+                return
+            self.server.oauth_code = code
+            self.server.oauth_oa_id = oa_id
+        
+        threading.Thread(target=self.complete_authorization, args=(code, oa_id),
+                         name='zalo-oauth-exchange').start()
+    
+    def complete_authorization(self, code, oa_id):
+        """Doi token, luu ket qua vao server va bao hieu cho start_oauth_flow"""
+        try:
+            result = self.exchange_code_for_token(code, oa_id)
+        except Exception as e:
+            result = {'success': False, 'error': f"Exception: {str(e)}"}
+        
+        self.server.oauth_result = result
+        self.server.oauth_done.set()
+    
+    def send_result_response(self):
+        """Trang ket qua: cho (long-poll) den khi doi token xong"""
+        if self.server.oauth_code is None:
+            self.send_error_response("No authorization in progress")
+            return
+        
+        if not self.server.oauth_done.wait(OAUTH_TIMEOUT):
+            self.send_error_response("Timed out waiting for the token exchange")
+            return
+        
+        html_response = self.generate_html_response(self.server.oauth_code, self.server.oauth_oa_id,
+                                                    self.server.oauth_result)
+        self.send_html_response(200, html_response)
+        # start_oauth_flow chi dung server sau khi browser da nhan trang ket qua
+        result_sent = getattr(self.server, 'oauth_result_sent', None)
+        if result_sent:
+            result_sent.set()
+    
     def exchange_code_for_token(self, auth_code, oa_id):
         """Doi authorization code thanh access token"""
         print("Exchanging authorization code for access token...")
         
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'secret_key': APP_SECRET
-        }
+        # Server co the dat session/token_url rieng (vd ghi lai hoac replay response)
+        result = exchange_authorization_code(auth_code,
+                                             session=getattr(self.server, 'http_session', None),
+                                             token_url=getattr(self.server, 'token_url', OAUTH_TOKEN_URL))
         
-        data = {
-            'code': auth_code,
-            'app_id': APP_ID,
-            'grant_type': 'authorization_code'
-        }
+        if not result['success']:
+            print(f"Error: {result['error']}")
+            return result
         
-        try:
-            response = requests.post(OAUTH_TOKEN_URL, headers=headers, data=data)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if 'access_token' in result:
-                    print("SUCCESS! Got access token")
-                    
-                    # Test access token
-                    test_result = self.test_access_token(result['access_token'])
-                    
-                    # Luu vao file
-                    self.save_token_to_file(result, oa_id, test_result)
-                    
-                    return {
-                        'success': True,
-                        'access_token': result['access_token'],
-                        'refresh_token': result.get('refresh_token', 'N/A'),
-                        'expires_in': result.get('expires_in', 'N/A'),
-                        'test_result': test_result
-                    }
-                else:
-                    error_msg = result.get('error_description', result.get('message', 'Unknown error'))
-                    print(f"API Error: {error_msg}")
-                    return {'success': False, 'error': error_msg}
-            else:
-                error_msg = f"HTTP {response.status_code}: {response.text}"
-                print(f"HTTP Error: {error_msg}")
-                return {'success': False, 'error': error_msg}
-                
-        except Exception as e:
-            error_msg = f"Exception: {str(e)}"
-            print(f"Exception: {error_msg}")
-            return {'success': False, 'error': error_msg}
+        print("SUCCESS! Got access token")
+        
+        # Test access token
+        test_result = self.test_access_token(result['access_token'])
+        
+        # Luu vao file
+        self.save_token_to_file(result, oa_id, test_result)
+        
+        return {
+            'success': True,
+            'access_token': result['access_token'],
+            'refresh_token': result.get('refresh_token') or 'N/A',
+            'expires_in': result.get('expires_in') or 'N/A',
+            'test_result': test_result
+        }
     
     def test_access_token(self, access_token):
         """Test access token voi OA API"""
         print("Testing access token...")
         
-        test_url = f"{OA_API_BASE_URL}/oa/getoa"
-        headers = {'access_token': access_token}
+        # Dung ZaloOAClient de ket qua duoc cache cho cac lan kiem tra token sau
+        from zalo_api_client import ZaloOAClient
         
-        try:
-            response = requests.get(test_url, headers=headers)
-            
-            if response.status_code == 200:
-                result = response.json()
-                
-                if result.get('error') == 0 and 'data' in result:
-                    oa_data = result['data']
-                    return {
-                        'success': True,
-                        'oa_name': oa_data.get('name', 'N/A'),
-                        'oa_id': oa_data.get('oa_id', 'N/A'),
-                        'description': oa_data.get('description', 'N/A')
-                    }
-                else:
-                    return {'success': False, 'error': result.get('message', 'API Error')}
-            else:
-                return {'success': False, 'error': f"HTTP {response.status_code}"}
-                
-        except Exception as e:
-            return {'success': False, 'error': f"Exception: {str(e)}"}
+        with ZaloOAClient(access_token, session=getattr(self.server, 'http_session', None)) as client:
+            result = client.get_oa_info()
+        
+        if result['success']:
+            oa_data = result['data']
+            return {
+                'success': True,
+                'oa_name': oa_data.get('name', 'N/A'),
+                'oa_id': oa_data.get('oa_id', 'N/A'),
+                'description': oa_data.get('description', 'N/A')
+            }
+        else:
+            return {'success': False, 'error': result['error']}
     
     def save_token_to_file(self, token_data, oa_id, test_result):
-        """Luu access token vao file"""
+        """Luu access token vao token store (JSON) va file text de doc"""
         try:
-            with open(TOKEN_FILE, 'w', encoding='utf-8') as f:
-                f.write("=" * 60 + "\n")
-                f.write("ZALO OA ACCESS TOKEN\n")
-                f.write("=" * 60 + "\n")
-                f.write(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"App ID: {APP_ID}\n")
-                f.write(f"OA ID: {oa_id}\n")
-                
-                if test_result['success']:
-                    f.write(f"OA Name: {test_result['oa_name']}\n")
-                    f.write(f"Verified OA ID: {test_result['oa_id']}\n")
-                
-                f.write("-" * 60 + "\n")
-                f.write(f"ACCESS TOKEN: {token_data['access_token']}\n")
-                f.write(f"REFRESH TOKEN: {token_data.get('refresh_token', 'N/A')}\n")
-                f.write(f"EXPIRES IN: {token_data.get('expires_in', 'N/A')} seconds\n")
-                f.write(f"TEST STATUS: {'SUCCESS' if test_result['success'] else 'FAILED'}\n")
-                
-                if not test_result['success']:
-                    f.write(f"TEST ERROR: {test_result['error']}\n")
-                
-                f.write("=" * 60 + "\n")
+            get_default_token_store().save(build_token_record(token_data, oa_id, test_result))
             
-            print(f"Token saved to: {TOKEN_FILE}")
+            lines = []
+            lines.append("=" * 60)
+            lines.append("ZALO OA ACCESS TOKEN")
+            lines.append("=" * 60)
+            lines.append(f"Generated: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+            lines.append(f"App ID: {APP_ID}")
+            lines.append(f"OA ID: {oa_id}")
+            
+            if test_result['success']:
+                lines.append(f"OA Name: {test_result['oa_name']}")
+                lines.append(f"Verified OA ID: {test_result['oa_id']}")
+            
+            lines.append("-" * 60)
+            lines.append(f"ACCESS TOKEN: {token_data['access_token']}")
+            lines.append(f"REFRESH TOKEN: {token_data.get('refresh_token') or 'N/A'}")
+            lines.append(f"EXPIRES IN: {token_data.get('expires_in') or 'N/A'} seconds")
+            lines.append(f"TEST STATUS: {'SUCCESS' if test_result['success'] else 'FAILED'}")
+            
+            if not test_result['success']:
+                lines.append(f"TEST ERROR: {test_result['error']}")
+            
+            lines.append("=" * 60)
+            
+            # Ghi atomic de nguoi doc khong thay file ghi do
+            atomic_write_text(TOKEN_FILE, "\n".join(lines) + "\n")
+            
+            print(f"Token saved to: {TOKEN_STORE_FILE}, {TOKEN_FILE}")
             
         except Exception as e:
             print(f"Error saving token file: {str(e)}")
@@ -257,6 +275,33 @@ class ZaloOAuthHandler(BaseHTTPRequestHandler):
         
         return html
     
+    def generate_pending_response(self, result_url='/result'):
+        """Trang tra ve ngay sau callback, tu chuyen sang trang ket qua"""
+        return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="utf-8">
+            <meta http-equiv="refresh" content="0;url={result_url}">
+            <title>Zalo OA OAuth</title>
+        </head>
+        <body style="font-family: Arial, sans-serif; text-align: center; margin-top: 50px;">
+            <h2>Authorization received</h2>
+            <p>Exchanging the authorization code for an access token...</p>
+            <p><a href="{result_url}">Show result</a></p>
+        </body>
+        </html>
+        """
+    
+    def send_html_response(self, status, html):
+        """Gui HTML response"""
+        body = html.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
     def send_error_response(self, error_msg):
         """Gui error response"""
         html = f"""
@@ -268,29 +313,107 @@ class ZaloOAuthHandler(BaseHTTPRequestHandler):
             </body>
         </html>
         """
-        self.send_response(400)
-        self.send_header('Content-type', 'text/html; charset=utf-8')
-        self.end_headers()
-        self.wfile.write(html.encode('utf-8'))
+        self.send_html_response(400, html)
     
     def log_message(self, format, *args):
         """Override log message to reduce noise"""
         pass
 
 
-def create_oauth_url():
-    """Tao OAuth authorization URL"""
+def exchange_authorization_code(auth_code, session=None, token_url=OAUTH_TOKEN_URL):
+    """
+    Goi OAuth API doi authorization code thanh access token
+    
+    Args:
+        auth_code (str): Authorization code tu callback
+        session (requests.Session): Session/transport dung de goi (None = transport dung chung)
+        token_url (str): URL doi token
+    
+    Returns:
+        dict: {'success': True, 'access_token', 'refresh_token', 'expires_in'} hoac error
+    """
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'secret_key': APP_SECRET
+    }
+    
+    data = {
+        'code': auth_code,
+        'app_id': APP_ID,
+        'grant_type': 'authorization_code'
+    }
+    
+    try:
+        response = (session or get_default_transport()).request('POST', token_url, headers=headers, data=data,
+                                                                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        
+        if response.status_code == 200:
+            result = response.json()
+            
+            if 'access_token' in result:
+                return {
+                    'success': True,
+                    'access_token': result['access_token'],
+                    'refresh_token': result.get('refresh_token'),
+                    'expires_in': result.get('expires_in')
+                }
+            else:
+                error_msg = result.get('error_description', result.get('message', 'Unknown error'))
+                return {'success': False, 'error': error_msg}
+        else:
+            return {'success': False, 'error': f"HTTP {response.status_code}: {response.text}"}
+    
+    except Exception as e:
+        return {'success': False, 'error': f"Exception: {str(e)}"}
+
+
+def create_oauth_url(state=OAUTH_STATE):
+    """
+    Tao OAuth authorization URL
+    
+    Args:
+        state (str): Gia tri state, Zalo tra lai nguyen ven trong callback
+    """
     params = {
         'app_id': APP_ID,
         'redirect_uri': REDIRECT_URI,
-        'state': OAUTH_STATE
+        'state': state
     }
     
     return f"{OAUTH_AUTHORIZE_URL}?{urllib.parse.urlencode(params)}"
 
 
-def start_oauth_flow():
-    """Bat dau OAuth flow"""
+def create_oauth_server(host=LOCAL_SERVER_HOST, port=LOCAL_SERVER_PORT, session=None):
+    """
+    Tao server nhan OAuth callback cho mot lan uy quyen
+    
+    Args:
+        host (str): Dia chi lang nghe
+        port (int): Cong lang nghe
+        session (requests.Session): Session/transport dung de doi token va kiem tra token
+    
+    Returns:
+        ThreadingHTTPServer: Server co oauth_done (Event) va oauth_result
+    """
+    server = ThreadingHTTPServer((host, port), ZaloOAuthHandler)
+    server.http_session = session
+    server.oauth_state = OAUTH_STATE
+    server.oauth_lock = threading.Lock()
+    server.oauth_done = threading.Event()
+    server.oauth_result_sent = threading.Event()
+    server.oauth_result = None
+    server.oauth_code = None
+    server.oauth_oa_id = None
+    return server
+
+
+def start_oauth_flow(session=None):
+    """
+    Bat dau OAuth flow
+    
+    Args:
+        session (requests.Session): Session/transport dung de doi token (vd de ghi lai response)
+    """
     print("=" * 60)
     print("ZALO OA OAUTH CLIENT")
     print("=" * 60)
@@ -303,9 +426,8 @@ def start_oauth_flow():
     print(f"OAuth URL: {oauth_url}")
     
     try:
-        # Khoi dong local server
-        server = HTTPServer((LOCAL_SERVER_HOST, LOCAL_SERVER_PORT), ZaloOAuthHandler)
-        server.oauth_result = None
+        # Khoi dong local server (moi request mot thread: browser khong phai cho doi token)
+        server = create_oauth_server(session=session)
         
         print(f"\nStarting server at {REDIRECT_URI}")
         print("Please authorize the application in your browser...")
@@ -317,6 +439,7 @@ def start_oauth_flow():
         
         # Mo browser
         try:
+            import webbrowser
             webbrowser.open(oauth_url)
             print("Browser opened automatically")
         except:
@@ -326,13 +449,9 @@ def start_oauth_flow():
         print("\nWaiting for OAuth callback...")
         print("Press Ctrl+C to stop")
         
-        # Cho cho den khi co ket qua
-        start_time = time.time()
-        while server.oauth_result is None:
-            if time.time() - start_time > OAUTH_TIMEOUT:
-                print(f"\nTimeout after {OAUTH_TIMEOUT} seconds")
-                break
-            time.sleep(1)
+        # Cho den khi doi token xong (khong polling)
+        if not server.oauth_done.wait(OAUTH_TIMEOUT):
+            print(f"\nTimeout after {OAUTH_TIMEOUT} seconds")
         
         if server.oauth_result and server.oauth_result.get('success'):
             print("\n" + "=" * 60)
@@ -340,7 +459,12 @@ def start_oauth_flow():
             print(f"Token saved to: {TOKEN_FILE}")
             print("=" * 60)
         
+        # Handler thread la daemon (server_close khong cho): doi browser lay xong
+        # trang /result (toi da OAUTH_RESULT_GRACE giay) roi moi dung server
+        if server.oauth_done.is_set():
+            server.oauth_result_sent.wait(OAUTH_RESULT_GRACE)
         server.shutdown()
+        server.server_close()
         
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
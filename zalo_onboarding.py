@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Onboarding Service
+Server OAuth callback chay lien tuc de uy quyen nhieu OA song song,
+moi lan onboarding co state rieng, token luu theo oa_id
+"""
+
+import json
+import time
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlparse
+from http.server import ThreadingHTTPServer
+
+from config import *
+from zalo_oauth import ZaloOAuthHandler, create_oauth_url, exchange_authorization_code
+from zalo_token_store import get_default_token_store, build_token_record
+
+
+SESSION_PENDING = 'pending'
+SESSION_EXCHANGING = 'exchanging'
+SESSION_DONE = 'done'
+SESSION_FAILED = 'failed'
+SESSION_EXPIRED = 'expired'
+
+
+class OnboardingHandler(ZaloOAuthHandler):
+    """
+    Handler cua OnboardingService:
+        /start?label=...   tao session moi va chuyen sang trang uy quyen cua Zalo
+        /?code=...&state=  callback tu Zalo
+        /result?state=...  trang ket qua (cho den khi doi token xong)
+        /status?state=...  trang thai session (JSON)
+    """
+    
+    def do_GET(self):
+        parsed_url = urlparse(self.path)
+        params = parse_qs(parsed_url.query)
+        state = params.get('state', [None])[0]
+        service = self.server.service
+        
+        if parsed_url.path == '/start':
+            session = service.new_session(params.get('label', [None])[0])
+            self.send_response(302)
+            self.send_header('Location', session['url'])
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+        elif parsed_url.path == '/status':
+            session = service.get_session(state)
+            self.send_json_response(200 if session else 404, session or {'error': 'Unknown state'})
+        elif parsed_url.path == '/result':
+            session = service.wait(state, OAUTH_TIMEOUT)
+            if session is None:
+                self.send_error_response("Unknown or expired onboarding link")
+            else:
+                self.send_html_response(200, self.generate_onboarding_response(session))
+        elif parsed_url.path == '/' and 'code' in params:
+            code = params['code'][0]
+            # oa_id tren URL chua duoc xac minh: chi dung de nhan ra callback lap lai
+            oa_id = params.get('oa_id', [None])[0]
+            
+            session, error = service.claim(state, oa_id)
+            if error:
+                self.send_error_response(error)
+                return
+            
+            # Callback lap lai (vd reload) voi cung state: submit bo qua, khong doi code lan nua
+            service.submit(state, self.complete_session, code, oa_id, state)
+            self.send_html_response(200, self.generate_pending_response(f"/result?state={state}"))
+        else:
+            self.send_error_response("Invalid callback URL")
+    
+    def complete_session(self, code, oa_id, state):
+        """Chay tren worker pool: doi token va cap nhat session"""
+        print(f"Onboarding callback for OA {oa_id} (state {state[:8]}...)")
+        try:
+            result = self.exchange_code_for_token(code, oa_id)
+        except Exception as e:
+            result = {'success': False, 'error': f"Exception: {str(e)}"}
+        self.server.service.complete(state, result)
+    
+    def exchange_code_for_token(self, auth_code, oa_id):
+        """
+        Doi code lay token, xac minh OA bang /oa/getoa va luu token theo oa_id Zalo tra ve
+        
+        Args:
+            auth_code (str): Authorization code tu callback
+            oa_id (str): oa_id tren URL callback (chua xac minh, chi de log)
+        
+        Returns:
+            dict: success, oa_id (da xac minh), test_result hoac error
+        """
+        result = exchange_authorization_code(auth_code, session=self.server.http_session,
+                                             token_url=getattr(self.server, 'token_url', OAUTH_TOKEN_URL))
+        if not result['success']:
+            return result
+        
+        # Khong xac minh duoc OA thi khong luu: tranh luu token vao nham oa_id
+        test_result = self.test_access_token(result['access_token'])
+        if not test_result['success']:
+            return {'success': False, 'error': f"Cannot verify OA: {test_result['error']}"}
+        verified_oa_id = test_result.get('oa_id')
+        if verified_oa_id in (None, 'N/A'):
+            return {'success': False, 'error': "Cannot verify OA: no oa_id in OA info"}
+        if oa_id and oa_id != verified_oa_id:
+            print(f"Callback oa_id {oa_id} does not match verified OA {verified_oa_id}")
+        
+        self.save_token_to_file(result, verified_oa_id, test_result)
+        return {'success': True, 'oa_id': verified_oa_id, 'test_result': test_result}
+    
+    def save_token_to_file(self, token_data, oa_id, test_result):
+        """Luu token vao token store theo oa_id (khong doi OA hien tai, khong ghi file text)"""
+        record = build_token_record(token_data, oa_id, test_result)
+        self.server.service.store.save(record, make_current=False)
+        print(f"Token saved for OA {record['oa_id']}")
+    
+    def generate_onboarding_response(self, session):
+        """Trang ket qua cho nguoi uy quyen (khong hien token)"""
+        if session['status'] == SESSION_DONE:
+            title = "Zalo OA connected"
+            detail = f"{session.get('oa_name') or session.get('oa_id')} has been connected successfully."
+        elif session['status'] == SESSION_FAILED:
+            title = "Connection failed"
+            detail = f"Error: {session.get('error')}"
+        else:
+            title = "Still processing"
+            detail = "Please refresh this page in a moment."
+        
+        return f"""
+        <!DOCTYPE html>
+        <html>
+        <head><meta charset="utf-8"><title>{title}</title></head>
+        <body style="font-family: Arial, sans-serif; text-align: center; margin-top: 50px;">
+            <h2>{title}</h2>
+            <p>{detail}</p>
+            <p>You can close this window now.</p>
+        </body>
+        </html>
+        """
+    
+    def send_json_response(self, status, data):
+        """Gui JSON response"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class OnboardingService:
+    """Server onboarding chay lien tuc, nhan callback song song cua nhieu OA"""
+    
+    def __init__(self, host=LOCAL_SERVER_HOST, port=LOCAL_SERVER_PORT, store=None,
+                 workers=ONBOARDING_WORKERS, session_ttl=ONBOARDING_SESSION_TTL, http_session=None):
+        """
+        Args:
+            host (str): Dia chi lang nghe (REDIRECT_URI phai tro ve day)
+            port (int): Cong lang nghe
+            store (TokenStore): Noi luu token (mac dinh dung chung trong process)
+            workers (int): So worker doi token song song
+            session_ttl (float): So giay mot link onboarding con hieu luc
+            http_session (requests.Session): Session/transport dung de doi token
+        """
+        self.store = store or get_default_token_store()
+        self.session_ttl = session_ttl
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self._events = {}
+        self._submitted = set()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='zalo-onboarding')
+        self._thread = None
+        
+        self.server = ThreadingHTTPServer((host, port), OnboardingHandler)
+        self.server.daemon_threads = True
+        self.server.service = self
+        self.server.http_session = http_session
+    
+    def new_session(self, label=None):
+        """
+        Tao mot lan onboarding voi state ngau nhien
+        
+        Args:
+            label (str): Ghi chu (vd ten khach hang)
+        
+        Returns:
+            dict: state, url (gui cho nguoi uy quyen), status, ...
+        """
+        state = secrets.token_urlsafe(24)
+        session = {
+            'state': state,
+            'label': label,
+            'url': create_oauth_url(state),
+            'status': SESSION_PENDING,
+            'oa_id': None,
+            'callback_oa_id': None,
+            'oa_name': None,
+            'error': None,
+            'created_at': time.time(),
+            'completed_at': None
+        }
+        with self._lock:
+            self._prune()
+            self._sessions[state] = session
+            self._events[state] = threading.Event()
+        return dict(session)
+    
+    def get_session(self, state):
+        """Trang thai session (None neu khong co)"""
+        with self._lock:
+            session = self._sessions.get(state)
+            if session:
+                self._expire(session)
+            return dict(session) if session else None
+    
+    def sessions(self):
+        """Tat ca session dang duoc giu"""
+        with self._lock:
+            return [dict(session) for session in self._sessions.values()]
+    
+    def wait(self, state, timeout=None):
+        """
+        Cho session xong (done/failed)
+        
+        Returns:
+            dict or None: Session, None neu state khong ton tai
+        """
+        with self._lock:
+            event = self._events.get(state)
+        if event is None:
+            return None
+        event.wait(timeout)
+        return self.get_session(state)
+    
+    def claim(self, state, oa_id):
+        """
+        Nhan callback cho state: chi state con hieu luc moi duoc doi token
+        
+        Returns:
+            tuple: (session, None) hoac (None, thong bao loi)
+        """
+        with self._lock:
+            session = self._sessions.get(state) if state else None
+            if session is None:
+                return None, "Unknown onboarding link"
+            
+            self._expire(session)
+            if session['status'] == SESSION_EXPIRED:
+                return None, "Onboarding link has expired"
+            if session['status'] == SESSION_PENDING:
+                session['status'] = SESSION_EXCHANGING
+                session['callback_oa_id'] = oa_id
+            elif session['callback_oa_id'] != oa_id:
+                return None, "Onboarding link has already been used"
+            return dict(session), None
+    
+    def submit(self, state, func, *args):
+        """Dua viec doi token cua session vao worker pool (mot lan cho moi state)"""
+        with self._lock:
+            if state not in self._sessions or state in self._submitted:
+                return
+            self._submitted.add(state)
+        self._executor.submit(func, *args)
+    
+    def complete(self, state, result):
+        """Ghi ket qua doi token cua session"""
+        with self._lock:
+            session = self._sessions.get(state)
+            if session is None:
+                return
+            session['completed_at'] = time.time()
+            if result['success']:
+                session['status'] = SESSION_DONE
+                session['oa_id'] = result.get('oa_id')
+                test_result = result.get('test_result') or {}
+                if test_result.get('success'):
+                    session['oa_name'] = test_result.get('oa_name')
+            else:
+                session['status'] = SESSION_FAILED
+                session['error'] = result.get('error')
+            event = self._events.get(state)
+        
+        if event:
+            event.set()
+    
+    def _expire(self, session):
+        if session['status'] == SESSION_PENDING and time.time() - session['created_at'] > self.session_ttl:
+            session['status'] = SESSION_EXPIRED
+            self._events[session['state']].set()
+    
+    def _prune(self):
+        # Bo session het han / da xong qua lau de bo nho khong tang mai
+        now = time.time()
+        for state, session in list(self._sessions.items()):
+            self._expire(session)
+            finished_at = session['completed_at'] or session['created_at']
+            if session['status'] != SESSION_EXCHANGING and now - finished_at > self.session_ttl * 2:
+                del self._sessions[state]
+                del self._events[state]
+                self._submitted.discard(state)
+    
+    def start(self):
+        """Chay server trong thread nen"""
+        self._thread = threading.Thread(target=self.server.serve_forever, name='zalo-onboarding-server',
+                                        daemon=True)
+        self._thread.start()
+        return self
+    
+    def close(self):
+        """Dung server va cho cac lan doi token dang chay xong"""
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        self._executor.shutdown(wait=True)
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def main():
+    """Chay onboarding service cho den khi Ctrl+C"""
+    print("=" * 60)
+    print("ZALO OA ONBOARDING SERVICE")
+    print("=" * 60)
+    print(f"App ID: {APP_ID}")
+    print(f"Redirect URI: {REDIRECT_URI}")
+    print("=" * 60)
+    
+    with OnboardingService() as service:
+        print(f"Send this link to each OA admin: {REDIRECT_URI}/start?label=<customer>")
+        print(f"Session status: {REDIRECT_URI}/status?state=<state>")
+        print("Press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\nStopping...")
+        
+        for session in service.sessions():
+            print(f"  {session['label'] or '-'}: {session['status']} {session['oa_id'] or ''}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Rate Limiter
+Token bucket theo endpoint, chia se duoc giua cac thread va cac process tren cung may
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+from config import *
+from zalo_filelock import FileLock
+
+
+class _MemoryStateStore:
+    """Luu trang thai bucket trong bo nho (chi chia se giua cac thread)"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._state = {}
+    
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self._state
+
+
+class _FileStateStore:
+    """Luu trang thai bucket trong file, dung file lock de chia se giua cac process"""
+    
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self._file_lock = FileLock(file_path)
+    
+    @contextmanager
+    def transaction(self):
+        with self._file_lock:
+            fd = self._file_lock.fileno()
+            os.lseek(fd, 0, os.SEEK_SET)
+            raw = b''
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                raw += chunk
+            try:
+                state = json.loads(raw.decode('utf-8')) if raw else {}
+            except ValueError:
+                state = {}
+            
+            yield state
+            
+            data = json.dumps(state).encode('utf-8')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, data)
+
+
+class RateLimiter:
+    """
+    Token bucket rieng cho moi endpoint (message, getfollowers, getoa, ...).
+    Khi gap loi quota, bucket bi giam toc (cooldown + giam rate) va hoi phuc dan.
+    """
+    
+    def __init__(self, rates=None, state_file=RATE_LIMIT_STATE_FILE,
+                 cooldown=RATE_LIMIT_COOLDOWN, recovery=RATE_LIMIT_RECOVERY):
+        """
+        Khoi tao rate limiter
+        
+        Args:
+            rates (dict): {bucket: (so request/giay, burst)}, mac dinh RATE_LIMITS
+            state_file (str): File chia se trang thai giua cac process (None = chi trong process)
+            cooldown (float): So giay tam dung bucket khi gap loi quota
+            recovery (float): So giay de rate hoi phuc tu muc thap nhat ve binh thuong
+        """
+        self.rates = dict(rates or RATE_LIMITS)
+        self.cooldown = cooldown
+        self.recovery = recovery
+        self.min_factor = 0.1
+        self._store = _FileStateStore(state_file) if state_file else _MemoryStateStore()
+    
+    def _refill(self, bucket, state, now):
+        """Cap nhat so token cua bucket theo thoi gian da troi qua"""
+        rate, burst = self.rates[bucket]
+        entry = state.get(bucket)
+        if entry is None:
+            entry = {'tokens': float(burst), 'updated': now, 'factor': 1.0, 'blocked_until': 0.0}
+            state[bucket] = entry
+        
+        elapsed = max(0.0, now - entry['updated'])
+        if self.recovery > 0:
+            entry['factor'] = min(1.0, entry['factor'] + elapsed / self.recovery)
+        else:
+            entry['factor'] = 1.0
+        
+        # Trong thoi gian cooldown bucket khong tich them token
+        refill_time = max(0.0, now - max(entry['updated'], entry['blocked_until']))
+        entry['tokens'] = min(float(burst), entry['tokens'] + refill_time * rate * entry['factor'])
+        entry['updated'] = now
+        return entry
+    
+    def reserve(self, bucket):
+        """
+        Lay mot token neu co, khong block
+        
+        Args:
+            bucket (str): Ten bucket
+        
+        Returns:
+            float: 0 neu da lay duoc token, nguoc lai so giay nen cho truoc khi thu lai
+        """
+        if bucket not in self.rates:
+            return 0.0
+        
+        rate, _ = self.rates[bucket]
+        with self._store.transaction() as state:
+            now = time.time()
+            entry = self._refill(bucket, state, now)
+            
+            if now < entry['blocked_until']:
+                return entry['blocked_until'] - now
+            
+            if entry['tokens'] >= 1.0:
+                entry['tokens'] -= 1.0
+                return 0.0
+            
+            return (1.0 - entry['tokens']) / (rate * entry['factor'])
+    
+    def acquire(self, bucket, timeout=None):
+        """
+        Cho den khi lay duoc token cua bucket
+        
+        Args:
+            bucket (str): Ten bucket
+            timeout (float): So giay cho toi da (None = cho mai)
+        
+        Returns:
+            bool: True neu lay duoc token, False neu het timeout
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait_time = self.reserve(bucket)
+            if wait_time <= 0:
+                return True
+            
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                wait_time = min(wait_time, remaining)
+            time.sleep(wait_time)
+    
+    def penalize(self, bucket, cooldown=None):
+        """
+        Giam toc bucket sau khi Zalo bao loi quota
+        
+        Args:
+            bucket (str): Ten bucket
+            cooldown (float): So giay tam dung (mac dinh self.cooldown)
+        """
+        if bucket not in self.rates:
+            return
+        
+        cooldown = self.cooldown if cooldown is None else cooldown
+        with self._store.transaction() as state:
+            now = time.time()
+            entry = self._refill(bucket, state, now)
+            entry['tokens'] = 0.0
+            entry['factor'] = max(self.min_factor, entry['factor'] * 0.5)
+            entry['blocked_until'] = max(entry['blocked_until'], now + cooldown)
+    
+    def status(self):
+        """
+        Lay trang thai hien tai cua cac bucket
+        
+        Returns:
+            dict: {bucket: {'tokens', 'factor', 'blocked_until', ...}}
+        """
+        with self._store.transaction() as state:
+            now = time.time()
+            for bucket in self.rates:
+                self._refill(bucket, state, now)
+            return json.loads(json.dumps(state))
+
+
+def is_quota_error(result):
+    """
+    Kiem tra ket qua API co phai loi vuot quota/rate limit khong
+    
+    Args:
+        result (dict): Ket qua tu _handle_response
+    
+    Returns:
+        bool: True neu la loi quota
+    """
+    return (result.get('error_code') in QUOTA_ERROR_CODES
+            or result.get('status_code') == 429)
+
+
+def endpoint_bucket(path):
+    """Tra ve ten bucket cua endpoint (None neu endpoint khong bi gioi han)"""
+    return RATE_LIMIT_ENDPOINTS.get(path)
+
+
+_default_limiter = None
+_default_limiter_lock = threading.Lock()
+
+
+def get_default_rate_limiter():
+    """
+    Rate limiter dung chung cho moi client trong process (tao tu config)
+    
+    Returns:
+        RateLimiter or None: None neu RATE_LIMIT_ENABLED = False
+    """
+    global _default_limiter
+    if not RATE_LIMIT_ENABLED:
+        return None
+    
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Retry & Circuit Breaker
+Thu lai loi tam thoi voi exponential backoff + jitter, ngat mach theo endpoint
+"""
+
+import time
+import random
+import threading
+
+import requests
+
+from config import *
+
+
+CIRCUIT_CLOSED = 'closed'
+CIRCUIT_OPEN = 'open'
+CIRCUIT_HALF_OPEN = 'half_open'
+
+
+class RetryPolicy:
+    """Chinh sach thu lai: so lan toi da va thoi gian cho giua cac lan"""
+    
+    def __init__(self, max_attempts=RETRY_MAX_ATTEMPTS, base_delay=RETRY_BASE_DELAY,
+                 max_delay=RETRY_MAX_DELAY):
+        """
+        Args:
+            max_attempts (int): Tong so lan goi toi da (1 = khong thu lai)
+            base_delay (float): Thoi gian cho co ban (giay)
+            max_delay (float): Thoi gian cho toi da (giay)
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+    
+    def delay(self, attempt):
+        """
+        Thoi gian cho truoc lan thu lai (full jitter)
+        
+        Args:
+            attempt (int): So lan da goi (1, 2, ...)
+        
+        Returns:
+            float: So giay cho
+        """
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+
+class Deadline:
+    """
+    Moc thoi gian ket thuc cho mot thao tac (mot request, nhieu lan thu lai,
+    ca mot lan duyet followers hay broadcast)
+    """
+    
+    def __init__(self, timeout):
+        """
+        Args:
+            timeout (float): So giay tinh tu bay gio
+        """
+        self.expires_at = time.monotonic() + timeout
+    
+    def remaining(self):
+        """So giay con lai (0 neu da het)"""
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    def expired(self):
+        """True neu da het thoi gian"""
+        return time.monotonic() >= self.expires_at
+    
+    def timeout(self, connect_timeout=HTTP_CONNECT_TIMEOUT, read_timeout=HTTP_READ_TIMEOUT):
+        """
+        Timeout (connect, read) cho request, khong vuot qua thoi gian con lai
+        
+        Returns:
+            tuple: (connect_timeout, read_timeout)
+        """
+        remaining = self.remaining()
+        return (min(connect_timeout, remaining), min(read_timeout, remaining))
+
+
+class CircuitBreaker:
+    """
+    Ngat mach cho mot endpoint: sau `failure_threshold` loi tam thoi lien tiep thi
+    mo mach (tu choi ngay) trong `reset_timeout` giay, sau do cho mot request thu.
+    """
+    
+    def __init__(self, failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+    
+    @property
+    def state(self):
+        """Trang thai hien tai: closed, open hoac half_open"""
+        with self._lock:
+            return self._state()
+    
+    def _state(self):
+        if self._opened_at is None:
+            return CIRCUIT_CLOSED
+        if time.time() - self._opened_at >= self.reset_timeout:
+            return CIRCUIT_HALF_OPEN
+        return CIRCUIT_OPEN
+    
+    def allow(self):
+        """
+        Kiem tra co duoc goi endpoint khong
+        
+        Returns:
+            bool: False neu mach dang mo (hoac da co request thu dang chay)
+        """
+        with self._lock:
+            state = self._state()
+            if state == CIRCUIT_CLOSED:
+                return True
+            if state == CIRCUIT_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def release(self):
+        """Bo luot goi da duoc allow() cho phep nhung khong goi (vd het deadline truoc khi gui)"""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_success(self):
+        """Ghi nhan endpoint tra loi binh thuong: dong mach"""
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Ghi nhan loi tam thoi: mo mach neu vuot nguong"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._opened_at = time.time()
+            self._trial_in_flight = False
+
+
+class CircuitBreakerRegistry:
+    """Mot CircuitBreaker cho moi endpoint"""
+    
+    def __init__(self, failure_threshold=CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout=CIRCUIT_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._breakers = {}
+    
+    def get(self, endpoint):
+        """Lay (hoac tao) breaker cua endpoint"""
+        with self._lock:
+            breaker = self._breakers.get(endpoint)
+            if breaker is None:
+                breaker = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+                self._breakers[endpoint] = breaker
+            return breaker
+    
+    def states(self):
+        """Trang thai breaker cua tung endpoint"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {endpoint: breaker.state for endpoint, breaker in breakers.items()}
+
+
+def is_transient_error(result, exception=None):
+    """
+    Kiem tra loi co phai loi tam thoi (nen thu lai) khong
+    
+    Args:
+        result (dict): Ket qua tu _handle_response
+        exception (Exception): Exception khi goi request (neu co)
+    
+    Returns:
+        bool: True neu la loi tam thoi
+    """
+    if exception is not None:
+        return isinstance(exception, (requests.exceptions.ConnectionError,
+                                      requests.exceptions.Timeout))
+    if result.get('success'):
+        return False
+    return (result.get('status_code') in RETRY_STATUS_CODES
+            or result.get('error_code') in RETRY_ERROR_CODES)
+
+
+def is_retry_safe(method, exception=None):
+    """
+    Kiem tra request co the gui lai ma khong bi trung (vd gui tin nhan 2 lan)
+    
+    Args:
+        method (str): HTTP method
+        exception (Exception): Exception khi goi request (neu co)
+    
+    Returns:
+        bool: True neu thu lai an toan
+    """
+    if method in RETRY_IDEMPOTENT_METHODS:
+        return True
+    # Chua ket noi duoc thi request chua duoc gui
+    return isinstance(exception, requests.exceptions.ConnectTimeout)
+
+
+_default_breakers = None
+_default_breakers_lock = threading.Lock()
+
+
+def get_default_circuit_breakers():
+    """
+    CircuitBreakerRegistry dung chung trong process
+    
+    Returns:
+        CircuitBreakerRegistry or None: None neu CIRCUIT_BREAKER_ENABLED = False
+    """
+    global _default_breakers
+    if not CIRCUIT_BREAKER_ENABLED:
+        return None
+    
+    with _default_breakers_lock:
+        if _default_breakers is None:
+            _default_breakers = CircuitBreakerRegistry()
+        return _default_breakers
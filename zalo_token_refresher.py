@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Token Refresher
+Tu dong lam moi access token bang refresh_token truoc khi het han
+"""
+
+import time
+import weakref
+import threading
+
+from config import *
+from zalo_transport import get_default_transport
+from zalo_token_store import TokenStore, get_default_token_store, build_token_record
+
+
+def refresh_access_token(refresh_token, session=None):
+    """
+    Lay access token moi tu refresh token
+    
+    Args:
+        refresh_token (str): Refresh token (chi dung duoc mot lan)
+        session (requests.Session): Session/transport dung de goi (None = transport dung chung)
+    
+    Returns:
+        dict: {'success': True, 'access_token', 'refresh_token', 'expires_in'} hoac error
+    """
+    headers = {
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'secret_key': APP_SECRET
+    }
+    
+    data = {
+        'refresh_token': refresh_token,
+        'app_id': APP_ID,
+        'grant_type': 'refresh_token'
+    }
+    
+    try:
+        response = (session or get_default_transport()).request('POST', OAUTH_TOKEN_URL, headers=headers, data=data,
+                                                                timeout=(HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        
+        if response.status_code == 200:
+            result = response.json()
+            
+            if 'access_token' in result:
+                return {
+                    'success': True,
+                    'access_token': result['access_token'],
+                    'refresh_token': result.get('refresh_token'),
+                    'expires_in': result.get('expires_in')
+                }
+            else:
+                error_msg = result.get('error_description', result.get('message', 'Unknown error'))
+                return {'success': False, 'error': error_msg}
+        else:
+            return {'success': False, 'error': f"HTTP {response.status_code}: {response.text}"}
+    
+    except Exception as e:
+        return {'success': False, 'error': f"Exception: {str(e)}"}
+
+
+class TokenRefresher:
+    """
+    Thread nen lam moi token cua mot OA truoc khi het han va cap nhat token moi
+    vao cac ZaloOAClient da dang ky (request dang chay van dung token cu, van con han).
+    """
+    
+    def __init__(self, store=None, oa_id=None, margin=TOKEN_REFRESH_MARGIN,
+                 retry_interval=TOKEN_REFRESH_RETRY_INTERVAL):
+        """
+        Args:
+            store (TokenStore): Token store (mac dinh dung chung trong process)
+            oa_id (str): OA can refresh (None = OA hien tai trong store)
+            margin (float): Refresh truoc khi het han bao nhieu giay
+            retry_interval (float): So giay cho truoc khi thu lai neu refresh loi
+        """
+        self.store = store or get_default_token_store()
+        # Co dinh OA ngay tu dau de khong doi sang OA khac neu 'current' thay doi
+        self.oa_id = oa_id or self.store.load().get('current')
+        self.margin = margin
+        self.retry_interval = retry_interval
+        
+        # Refresh token chi dung duoc mot lan: khoa file de chi mot process refresh
+        # (cung lock voi TokenStore.save nen khong ai ghi store giua luc doc va luu token moi)
+        self._file_lock = self.store.file_lock
+        self._clients = weakref.WeakSet()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def register(self, client):
+        """
+        Dang ky client de nhan token moi sau moi lan refresh
+        
+        Args:
+            client (ZaloOAClient): Client can cap nhat token
+        """
+        self._clients.add(client)
+        record = self.store.get(self.oa_id)
+        if record and record.get('access_token') and client.access_token != record['access_token']:
+            client.set_access_token(record['access_token'])
+    
+    def sync_clients(self):
+        """Cap nhat token tu store vao cac client (vd khi process khac da refresh)"""
+        record = self.store.get(self.oa_id)
+        if record and record.get('access_token'):
+            self._propagate(record['access_token'])
+    
+    def _propagate(self, access_token):
+        for client in list(self._clients):
+            if client.access_token != access_token:
+                client.set_access_token(access_token)
+    
+    def refresh_now(self, force=True):
+        """
+        Lam moi token ngay
+        
+        Args:
+            force (bool): False = bo qua neu token con han hon margin
+                          (vd process khac vua refresh xong)
+        
+        Returns:
+            dict: {'success': True, 'record': ...} hoac {'success': False, 'error': ...}
+        """
+        with self._file_lock:
+            # Doc lai store trong lock: process khac co the da refresh truoc
+            record = self.store.get(self.oa_id)
+            if not record:
+                return {'success': False, 'error': 'No token in store'}
+            
+            if not force and TokenStore.is_valid(record, self.margin):
+                self._propagate(record['access_token'])
+                return {'success': True, 'record': record}
+            
+            if not record.get('refresh_token'):
+                return {'success': False, 'error': 'No refresh token in store'}
+            
+            result = refresh_access_token(record['refresh_token'])
+            if not result['success']:
+                return result
+            
+            new_record = build_token_record(result, record['oa_id'])
+            new_record['verified'] = record.get('verified', False)
+            if record.get('oa_name'):
+                new_record['oa_name'] = record['oa_name']
+            if not new_record.get('refresh_token'):
+                new_record['refresh_token'] = record['refresh_token']
+            
+            is_current = self.store.load().get('current') == record['oa_id']
+            self.store.save(new_record, make_current=is_current)
+        
+        self._propagate(new_record['access_token'])
+        return {'success': True, 'record': new_record}
+    
+    def seconds_until_refresh(self):
+        """So giay con lai truoc khi can refresh (0 = can refresh ngay)"""
+        record = self.store.get(self.oa_id)
+        if not record or not record.get('expires_at'):
+            return self.retry_interval
+        return max(0.0, record['expires_at'] - self.margin - time.time())
+    
+    def start(self):
+        """Chay thread refresh nen (daemon)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='zalo-token-refresher', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Dung thread refresh"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        while not self._stop_event.is_set():
+            wait_time = self.seconds_until_refresh()
+            if wait_time > 0:
+                # Token co the duoc process khac refresh: kiem tra lai dinh ky
+                self._stop_event.wait(min(wait_time, self.retry_interval))
+                self.sync_clients()
+                continue
+            
+            result = self.refresh_now(force=False)
+            if result['success']:
+                print(f"Access token refreshed for OA {result['record'].get('oa_id')}")
+            else:
+                print(f"Token refresh failed: {result['error']}")
+                self._stop_event.wait(self.retry_interval)
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Token Store
+Luu token dang JSON (ghi atomic), cache trong bo nho va chi doc lai khi file thay doi
+"""
+
+import os
+import json
+import time
+import tempfile
+import threading
+
+from config import *
+from zalo_filelock import FileLock
+
+
+def atomic_write_text(file_path, content):
+    """
+    Ghi file bang cach ghi ra file tam roi os.replace, nguoi doc khong bao gio
+    thay file ghi do
+    
+    Args:
+        file_path (str): Duong dan file
+        content (str): Noi dung
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, file_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_token_record(token_data, oa_id, test_result=None):
+    """
+    Tao record token tu response cua OAuth token endpoint
+    
+    Args:
+        token_data (dict): Response co access_token, refresh_token, expires_in
+        oa_id (str): ID cua OA
+        test_result (dict): Ket qua test_access_token (neu co)
+    
+    Returns:
+        dict: Record de luu vao TokenStore
+    """
+    now = time.time()
+    try:
+        expires_in = int(token_data.get('expires_in'))
+    except (TypeError, ValueError):
+        expires_in = None
+    
+    record = {
+        'oa_id': oa_id,
+        'app_id': APP_ID,
+        'access_token': token_data['access_token'],
+        'refresh_token': token_data.get('refresh_token'),
+        'generated_at': now,
+        'expires_at': now + expires_in if expires_in else None,
+        'verified': bool(test_result and test_result.get('success'))
+    }
+    
+    if test_result and test_result.get('success'):
+        record['oa_name'] = test_result.get('oa_name')
+        if record['oa_id'] in (None, '', 'N/A'):
+            record['oa_id'] = test_result.get('oa_id')
+    
+    return record
+
+
+class TokenStore:
+    """Token cua cac OA trong mot file JSON, key theo oa_id"""
+    
+    def __init__(self, file_path=TOKEN_STORE_FILE):
+        """
+        Args:
+            file_path (str): Duong dan file JSON
+        """
+        self.file_path = file_path
+        # Khoa giua cac process khi ghi (va khi refresh token, xem TokenRefresher)
+        self.file_lock = FileLock(file_path + '.lock')
+        self._lock = threading.Lock()
+        self._data = None
+        self._stamp = None
+    
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.file_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            return None
+    
+    def _read_file(self):
+        data = {'version': 1, 'current': None, 'tokens': {}}
+        stamp = self._file_stamp()
+        if stamp is not None:
+            try:
+                with open(self.file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading token store: {e}")
+        return data, stamp
+    
+    def load(self):
+        """
+        Doc noi dung store, chi doc lai file khi mtime/size thay doi
+        
+        Returns:
+            dict: {'version', 'current', 'tokens': {oa_id: record}}
+        """
+        with self._lock:
+            stamp = self._file_stamp()
+            if self._data is not None and stamp == self._stamp:
+                return self._data
+            
+            self._data, self._stamp = self._read_file()
+            return self._data
+    
+    def get(self, oa_id=None):
+        """
+        Lay record token cua OA
+        
+        Args:
+            oa_id (str): ID cua OA (None = OA hien tai)
+        
+        Returns:
+            dict or None: Record token
+        """
+        data = self.load()
+        if oa_id is None:
+            oa_id = data.get('current')
+        return data.get('tokens', {}).get(oa_id)
+    
+    def all(self):
+        """Tat ca record token, key theo oa_id"""
+        return dict(self.load().get('tokens', {}))
+    
+    def save(self, record, make_current=True):
+        """
+        Luu (hoac thay the) record token cua mot OA, ghi file atomic.
+        Doc lai file trong file lock roi moi ghi, nen khong ghi de token ma
+        process khac vua luu (vd refresh_token vua duoc xoay vong).
+        
+        Args:
+            record (dict): Record tu build_token_record
+            make_current (bool): Dat OA nay lam OA mac dinh
+        """
+        with self.file_lock, self._lock:
+            current, _ = self._read_file()
+            data = {
+                'version': 1,
+                'current': current.get('current'),
+                'tokens': dict(current.get('tokens', {}))
+            }
+            data['tokens'][record['oa_id']] = record
+            if make_current or not data['current']:
+                data['current'] = record['oa_id']
+            
+            atomic_write_text(self.file_path, json.dumps(data, indent=2, ensure_ascii=False))
+            self._data = data
+            self._stamp = self._file_stamp()
+    
+    @staticmethod
+    def is_valid(record, margin=0):
+        """
+        Kiem tra token con han khong (khong goi network)
+        
+        Args:
+            record (dict): Record token
+            margin (float): So giay du tru truoc khi het han
+        
+        Returns:
+            bool: True neu con han
+        """
+        if not record or not record.get('access_token'):
+            return False
+        expires_at = record.get('expires_at')
+        return expires_at is None or expires_at - margin > time.time()
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_default_token_store():
+    """TokenStore dung chung trong process (file TOKEN_STORE_FILE)"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = TokenStore()
+        return _default_store
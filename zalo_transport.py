@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo HTTP Transport
+Lop gui HTTP ben duoi ZaloOAClient va OAuth. Transport la object co
+request(method, url, headers=, params=, data=, timeout=) tra ve response co
+status_code, text, json() va close() - giong requests.Session, nen session tu
+create_session() chinh la transport HTTP/1.1 mac dinh.
+
+Cac backend:
+    "http1"  requests.Session co connection pool (mac dinh)
+    "http2"  HTTP2Transport: httpx, nhieu request dong thoi chung mot ket noi
+    MemoryTransport: goi thang ham Python, khong socket (do overhead cua client)
+"""
+
+import json
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import *
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+
+def create_session(pool_connections=OA_API_POOL_CONNECTIONS,
+                   pool_maxsize=OA_API_POOL_MAXSIZE,
+                   keep_alive=OA_API_KEEP_ALIVE):
+    """
+    Tao requests.Session voi connection pool de tai su dung ket noi
+    
+    Args:
+        pool_connections (int): So host duoc giu pool
+        pool_maxsize (int): So ket noi toi da giu lai cho moi host
+        keep_alive (bool): Giu ket noi song giua cac request
+    
+    Returns:
+        requests.Session: Session da cau hinh pool
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_connections,
+                          pool_maxsize=pool_maxsize,
+                          pool_block=False)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+    return session
+
+
+class HTTP2Transport:
+    """
+    HTTP/2 qua httpx: cac request dong thoi den cung host di chung mot ket noi TLS
+    (multiplex) thay vi moi request giu mot ket noi rieng. Chi dung HTTP/2 voi https://
+    (server chon qua ALPN), URL http:// van di HTTP/1.1.
+    Loi mang duoc doi sang requests.exceptions de retry/circuit breaker xu ly nhu HTTP/1.1.
+    """
+    
+    def __init__(self, max_connections=OA_API_POOL_MAXSIZE, keep_alive=OA_API_KEEP_ALIVE):
+        """
+        Args:
+            max_connections (int): So ket noi toi da (HTTP/2 thuong chi can 1 ket noi moi host)
+            keep_alive (bool): Giu ket noi song giua cac request
+        """
+        if httpx is None:
+            raise ImportError("HTTP2Transport requires httpx: pip install \"httpx[http2]\"")
+        
+        limits = httpx.Limits(max_connections=max_connections,
+                              max_keepalive_connections=max_connections if keep_alive else 0)
+        self.client = httpx.Client(http2=True, limits=limits)
+    
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        """
+        Gui request (cung tham so voi requests.Session.request)
+        
+        Returns:
+            httpx.Response: Co status_code, text, content, headers, json()
+        """
+        kwargs = {}
+        if isinstance(data, dict):
+            kwargs['data'] = data
+        elif hasattr(data, 'read'):
+            # Body doc dan (vd MultipartFileStream): gui tung doan kem Content-Length
+            headers = dict(headers or {})
+            headers['Content-Length'] = str(len(data))
+            kwargs['content'] = iter(lambda: data.read(UPLOAD_CHUNK_SIZE), b'')
+        elif data is not None:
+            kwargs['content'] = data.encode('utf-8') if isinstance(data, str) else data
+        
+        if isinstance(timeout, tuple):
+            timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+        
+        try:
+            return self.client.request(method, url, headers=headers, params=params, timeout=timeout, **kwargs)
+        except httpx.ConnectTimeout as e:
+            raise requests.exceptions.ConnectTimeout(str(e))
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.ReadTimeout(str(e))
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e))
+    
+    def close(self):
+        """Dong cac ket noi"""
+        self.client.close()
+
+
+class MemoryResponse:
+    """Response cua MemoryTransport (cung giao dien dung boi client voi requests.Response)"""
+    
+    def __init__(self, status_code, content, headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {'Content-Type': 'application/json; charset=utf-8'}
+    
+    @property
+    def text(self):
+        return self.content.decode('utf-8')
+    
+    def json(self):
+        return json.loads(self.content)
+
+
+class MemoryTransport:
+    """
+    Transport khong qua socket: moi request goi thang handler trong cung thread.
+    Dung de benchmark phan viec cua client (serialize, rate limit, retry, metrics, ...)
+    hoac chay client voi API gia lap ma khong can server.
+    """
+    
+    def __init__(self, handler):
+        """
+        Args:
+            handler (callable): handler(method, url, headers, params, body) -> (status_code, payload);
+                                payload la dict/list (encode JSON), str hoac bytes
+        """
+        self.handler = handler
+        self.request_count = 0
+        self._lock = threading.Lock()
+    
+    def request(self, method, url, headers=None, params=None, data=None, timeout=None):
+        """
+        Goi handler (cung tham so voi requests.Session.request, timeout bi bo qua)
+        
+        Returns:
+            MemoryResponse: Response tu ket qua cua handler
+        """
+        body = data.read() if hasattr(data, 'read') else data
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        
+        with self._lock:
+            self.request_count += 1
+        status_code, payload = self.handler(method, url, headers or {}, params or {}, body)
+        
+        if isinstance(payload, (dict, list)):
+            payload = json.dumps(payload)
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        return MemoryResponse(status_code, payload)
+    
+    def close(self):
+        pass
+
+
+def create_transport(kind=HTTP_TRANSPORT,
+                     pool_connections=OA_API_POOL_CONNECTIONS,
+                     pool_maxsize=OA_API_POOL_MAXSIZE,
+                     keep_alive=OA_API_KEEP_ALIVE):
+    """
+    Tao transport theo loai
+    
+    Args:
+        kind (str): "http1" (requests, connection pool) hoac "http2" (httpx)
+        pool_connections (int): So host duoc giu pool (chi http1)
+        pool_maxsize (int): So ket noi toi da moi host
+        keep_alive (bool): Giu ket noi song giua cac request
+    
+    Returns:
+        Transport: requests.Session hoac HTTP2Transport
+    """
+    if kind == 'http1':
+        return create_session(pool_connections, pool_maxsize, keep_alive)
+    if kind == 'http2':
+        return HTTP2Transport(pool_maxsize, keep_alive)
+    raise ValueError(f"Unknown HTTP transport: {kind}")
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_default_transport():
+    """
+    Transport dung chung trong process cho cac lan goi khong co client rieng (vd doi token OAuth)
+    
+    Returns:
+        Transport: Tao tu HTTP_TRANSPORT trong config
+    """
+    global _default_transport
+    with _default_transport_lock:
+        if _default_transport is None:
+            _default_transport = create_transport(HTTP_TRANSPORT)
+        return _default_transport
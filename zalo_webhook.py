@@ -0,0 +1,424 @@
+# -*- coding: utf-8 -*-
+"""
+Zalo OA Webhook Receiver
+Nhan event tu Zalo (tin nhan cua user, follow/unfollow, ...), kiem tra chu ky,
+tra loi ngay va chuyen event cho cac handler theo lo qua queue gioi han trong bo nho.
+Queue day thi tra 503 (Zalo gui lai sau) thay vi bo event.
+"""
+
+import json
+import time
+import zlib
+import queue
+import hashlib
+import hmac
+import threading
+from urllib.parse import urlparse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from config import *
+
+
+SIGNATURE_HEADER = 'X-ZEvent-Signature'
+
+RESPONSE_OK = json.dumps({'error': 0, 'message': 'Success'}).encode('utf-8')
+
+
+def compute_signature(body, timestamp, app_id, secret_key):
+    """
+    Chu ky cua Zalo: sha256(appId + data + timeStamp + OAsecretKey)
+    
+    Args:
+        body (bytes): Body cua request (nguyen ban, chua parse)
+        timestamp (str): Truong timestamp trong event
+        app_id (str): App ID
+        secret_key (str): OA Secret Key
+    
+    Returns:
+        str: Chu ky dang hex
+    """
+    digest = hashlib.sha256()
+    digest.update(str(app_id).encode('utf-8'))
+    digest.update(body)
+    digest.update(str(timestamp).encode('utf-8'))
+    digest.update(secret_key.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def verify_signature(body, event, header, app_id, secret_key):
+    """
+    Kiem tra header X-ZEvent-Signature (dang "mac=<hex>")
+    
+    Args:
+        body (bytes): Body cua request
+        event (dict): Event da parse (lay timestamp, va app_id neu khong cau hinh)
+        header (str): Gia tri header X-ZEvent-Signature
+        app_id (str): App ID (rong = lay tu event)
+        secret_key (str): OA Secret Key
+    
+    Returns:
+        bool: True neu chu ky hop le
+    """
+    if not header or not header.isascii():
+        return False
+    mac = header.strip()
+    if mac.startswith('mac='):
+        mac = mac[4:]
+    expected = compute_signature(body, event.get('timestamp', ''), app_id or event.get('app_id', ''), secret_key)
+    return hmac.compare_digest(mac.lower(), expected)
+
+
+def event_user_id(event):
+    """User cua event (nguoi gui tin / nguoi follow), dung de giu thu tu event cua tung user"""
+    for key in ('sender', 'follower', 'user'):
+        value = event.get(key)
+        if isinstance(value, dict) and value.get('id'):
+            return str(value['id'])
+    return str(event.get('user_id_by_app') or '')
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    """Handler nhan event (POST WEBHOOK_PATH) va tra trang thai (GET /health)"""
+    
+    # Giu ket noi giua cac event va khong cho delayed ACK
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    timeout = 30
+    
+    def do_POST(self):
+        receiver = self.server.receiver
+        if urlparse(self.path).path != receiver.path:
+            self.close_connection = True
+            self.send_json_response(404, {'error': -1, 'message': 'Not found'})
+            return
+        
+        content_length = self.headers.get('Content-Length')
+        if content_length is None:
+            self.close_connection = True
+            self.send_json_response(411, {'error': -1, 'message': 'Content-Length required'})
+            return
+        try:
+            length = int(content_length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.close_connection = True
+            self.send_json_response(400, {'error': -1, 'message': 'Invalid Content-Length'})
+            return
+        if length > receiver.max_body_size:
+            # Khong doc body qua lon: dong ket noi sau khi tra loi
+            self.close_connection = True
+            self.send_json_response(413, {'error': -1, 'message': 'Payload too large'})
+            return
+        
+        body = self.rfile.read(length)
+        status, message = receiver.receive(body, self.headers.get(SIGNATURE_HEADER))
+        if status == 200:
+            self.send_body(200, RESPONSE_OK)
+        elif status == 503:
+            if receiver.closing:
+                self.close_connection = True
+            self.send_json_response(503, {'error': -1, 'message': message}, {'Retry-After': '1'})
+        else:
+            self.send_json_response(status, {'error': -1, 'message': message})
+    
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self.send_json_response(200, self.server.receiver.stats())
+        else:
+            self.send_json_response(404, {'error': -1, 'message': 'Not found'})
+    
+    def send_json_response(self, status, data, headers=None):
+        """Gui JSON response"""
+        self.send_body(status, json.dumps(data).encode('utf-8'), headers)
+    
+    def send_body(self, status, body, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        """Override log message to reduce noise"""
+        pass
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """HTTP server cua WebhookReceiver (backlog lon de chiu nhieu ket noi moi cung luc)"""
+    
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class WebhookReceiver:
+    """Server nhan webhook va cac thread goi handler theo lo"""
+    
+    def __init__(self, host=WEBHOOK_HOST, port=WEBHOOK_PORT, path=WEBHOOK_PATH, secret_key=None, app_id=None,
+                 verify=WEBHOOK_VERIFY_SIGNATURE, queue_size=WEBHOOK_QUEUE_SIZE, workers=WEBHOOK_WORKERS,
+                 batch_size=WEBHOOK_BATCH_SIZE, batch_interval=WEBHOOK_BATCH_INTERVAL,
+                 enqueue_timeout=WEBHOOK_ENQUEUE_TIMEOUT, max_body_size=WEBHOOK_MAX_BODY_SIZE):
+        """
+        Args:
+            host (str): Dia chi lang nghe
+            port (int): Cong lang nghe (0 = tu chon cong trong)
+            path (str): Duong dan nhan event
+            secret_key (str): OA Secret Key (None = WEBHOOK_OA_SECRET_KEY)
+            app_id (str): App ID dung khi tinh chu ky (None = APP_ID, rong = lay tu event)
+            verify (bool): Kiem tra chu ky moi event
+            queue_size (int): So event toi da cho xu ly
+            workers (int): So thread goi handler
+            batch_size (int): So event toi da moi lan goi handler
+            batch_interval (float): Thoi gian toi da gom mot lo (giay)
+            enqueue_timeout (float): Thoi gian cho cho trong queue truoc khi tra 503 (giay)
+            max_body_size (int): Kich thuoc body toi da (bytes)
+        """
+        self.path = path
+        self.secret_key = WEBHOOK_OA_SECRET_KEY if secret_key is None else secret_key
+        self.app_id = APP_ID if app_id is None else app_id
+        self.verify = verify
+        if self.verify and not self.secret_key:
+            raise ValueError("Webhook signature check requires WEBHOOK_OA_SECRET_KEY (or verify=False)")
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_body_size = max_body_size
+        
+        self._handlers = []
+        self._lock = threading.Lock()
+        # Dang dong: receive() tra 503; close() cho cac lan receive() dang chay xong moi dung worker
+        self._closing = False
+        self._in_flight = 0
+        self._idle = threading.Condition(self._lock)
+        self._counts = {
+            'received': 0,
+            'accepted': 0,
+            'invalid': 0,
+            'unauthorized': 0,
+            'busy': 0,
+            'processed': 0,
+            'handler_errors': 0
+        }
+        # Moi worker mot queue rieng: event cua cung user luon duoc xu ly theo thu tu den
+        shard_size = max(1, queue_size // workers)
+        self._queues = [queue.Queue(maxsize=shard_size) for _ in range(workers)]
+        self._workers = []
+        self._thread = None
+        
+        self.server = WebhookServer((host, port), WebhookHandler)
+        self.server.receiver = self
+    
+    @property
+    def closing(self):
+        """True khi receiver dang dong (khong nhan event moi)"""
+        return self._closing
+    
+    @property
+    def url(self):
+        """URL nhan event (dung khi port = 0)"""
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}{self.path}"
+    
+    def add_handler(self, handler, event_names=None):
+        """
+        Dang ky handler
+        
+        Args:
+            handler (callable): Ham nhan list event (dict), cung mot user theo dung thu tu
+            event_names (list): Chi nhan cac event_name nay (None = tat ca)
+        """
+        names = set(event_names) if event_names else None
+        with self._lock:
+            self._handlers.append((handler, names))
+        return handler
+    
+    def on(self, *event_names):
+        """Decorator dang ky handler, vd @receiver.on('user_send_text')"""
+        def decorator(handler):
+            return self.add_handler(handler, event_names or None)
+        return decorator
+    
+    def receive(self, body, signature):
+        """
+        Kiem tra va dua mot event vao queue
+        
+        Args:
+            body (bytes): Body cua request
+            signature (str): Header X-ZEvent-Signature
+        
+        Returns:
+            tuple: (HTTP status, thong bao)
+        """
+        with self._lock:
+            if self._closing:
+                self._counts['received'] += 1
+                self._counts['busy'] += 1
+                return 503, 'Shutting down, retry later'
+            self._in_flight += 1
+        try:
+            return self._receive(body, signature)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                if not self._in_flight:
+                    self._idle.notify_all()
+    
+    def _receive(self, body, signature):
+        self._count('received')
+        try:
+            event = json.loads(body)
+        except ValueError:
+            event = None
+        if not isinstance(event, dict):
+            self._count('invalid')
+            return 400, 'Invalid JSON'
+        
+        if self.verify and not verify_signature(body, event, signature, self.app_id, self.secret_key):
+            self._count('unauthorized')
+            return 401, 'Invalid signature'
+        
+        if not self.put(event):
+            self._count('busy')
+            return 503, 'Queue full, retry later'
+        self._count('accepted')
+        return 200, 'Success'
+    
+    def put(self, event):
+        """
+        Dua event (da kiem tra) vao queue cua worker xu ly user do
+        
+        Returns:
+            bool: False neu queue van day sau enqueue_timeout
+        """
+        shard = self._queues[zlib.crc32(event_user_id(event).encode('utf-8')) % len(self._queues)]
+        try:
+            shard.put(event, timeout=self.enqueue_timeout)
+            return True
+        except queue.Full:
+            return False
+    
+    def stats(self):
+        """So event theo trang thai va so event dang cho"""
+        with self._lock:
+            stats = dict(self._counts)
+        stats['queued'] = sum(shard.qsize() for shard in self._queues)
+        return stats
+    
+    def _count(self, key, amount=1):
+        with self._lock:
+            self._counts[key] += amount
+    
+    def _run_worker(self, events):
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            
+            # Gom lo: lay them event den khi du batch_size hoac het batch_interval
+            batch = [event]
+            stopping = False
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = events.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if event is None:
+                    stopping = True
+                    break
+                batch.append(event)
+            
+            self._dispatch(batch)
+            if stopping:
+                return
+    
+    def _dispatch(self, batch):
+        with self._lock:
+            handlers = list(self._handlers)
+        
+        for handler, names in handlers:
+            events = batch if names is None else [event for event in batch if event.get('event_name') in names]
+            if not events:
+                continue
+            try:
+                handler(events)
+            except Exception as e:
+                self._count('handler_errors')
+                print(f"Webhook handler {getattr(handler, '__name__', handler)} failed: {str(e)}")
+        self._count('processed', len(batch))
+    
+    def start(self):
+        """Chay server va cac worker trong thread nen"""
+        self._workers = [
+            threading.Thread(target=self._run_worker, args=(events,), name=f'zalo-webhook-worker-{i}', daemon=True)
+            for i, events in enumerate(self._queues)
+        ]
+        for thread in self._workers:
+            thread.start()
+        self._thread = threading.Thread(target=self.server.serve_forever, name='zalo-webhook-server', daemon=True)
+        self._thread.start()
+        return self
+    
+    def close(self):
+        """Dung nhan event moi, xu ly het event con trong queue roi dung worker"""
+        # Ket noi keep-alive con mo van goi receive() sau shutdown(): tra 503 de Zalo gui lai
+        with self._lock:
+            self._closing = True
+            while self._in_flight:
+                self._idle.wait()
+        
+        if self._thread:
+            self.server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self.server.server_close()
+        
+        for events in self._queues:
+            if self._workers:
+                events.put(None)
+        for thread in self._workers:
+            thread.join()
+        self._workers = []
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+def print_events(events):
+    """Handler mac dinh: in event ra man hinh"""
+    for event in events:
+        print(f"{event.get('event_name')} from {event_user_id(event) or '-'}: "
+              f"{json.dumps(event.get('message', {}), ensure_ascii=False)}")
+
+
+def main():
+    """Chay webhook receiver, in event nhan duoc cho den khi Ctrl+C"""
+    print("=" * 60)
+    print("ZALO OA WEBHOOK RECEIVER")
+    print("=" * 60)
+    
+    if WEBHOOK_VERIFY_SIGNATURE and not WEBHOOK_OA_SECRET_KEY:
+        print("Error: WEBHOOK_OA_SECRET_KEY is not set in config.py")
+        return
+    
+    with WebhookReceiver() as receiver:
+        receiver.add_handler(print_events)
+        print(f"Listening on {receiver.url}")
+        print("Press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\nStopping...")
+    
+    print(f"Stats: {receiver.stats()}")
+
+
+if __name__ == "__main__":
+    main()